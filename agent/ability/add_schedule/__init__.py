@@ -1,4 +1,4 @@
-"""Add schedule ability: append items to schedule.json."""
+"""Add schedule ability: append items to the schedule."""
 from .action import AddScheduleAction
 
 __all__ = ["AddScheduleAction"]
@@ -1,4 +1,4 @@
-"""Add schedule: append a schedule item to schedule.json."""
+"""Add schedule: append a schedule item to the schedule."""
 import re
 from datetime import datetime, timedelta
 from typing import Optional
@@ -8,7 +8,7 @@ from libs.scheduler import append_schedule_item, normalize_datetime
 
 
 class AddScheduleAction(BaseAgentAction):
-    """Append a schedule item to workspace/schedule.json."""
+    """Append a schedule item to the workspace schedule."""
 
     @staticmethod
     def _parse_relative_minutes(dt_str: str) -> Optional[int]:
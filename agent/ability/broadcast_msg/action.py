@@ -1,30 +1,14 @@
-"""Broadcast message: write to broadcast_pending.json for agent to flush to channels."""
-import json
+"""Broadcast message: queue in the workspace state store for agent to flush to channels."""
 from pathlib import Path
 
 from libs.base_agent_action import BaseAgentAction
-
-BROADCAST_PENDING = "broadcast_pending.json"
+from libs.state_store import BROADCAST_PENDING, get_state_store
 
 
 def _append_broadcast_pending(workspace: Path, message: str, channels: list) -> None:
-    """Append a broadcast request to workspace/broadcast_pending.json."""
-    path = workspace / BROADCAST_PENDING
-    path.parent.mkdir(parents=True, exist_ok=True)
+    """Append a broadcast request to the broadcast_pending list."""
     item = {"message": message, "channels": channels if channels else []}
-    existing = {"pending": []}
-    if path.exists():
-        try:
-            raw = path.read_text(encoding="utf-8").strip()
-            if raw:
-                data = json.loads(raw)
-                existing["pending"] = data.get("pending", [])
-                if not isinstance(existing["pending"], list):
-                    existing["pending"] = []
-        except (json.JSONDecodeError, OSError):
-            pass
-    existing["pending"].append(item)
-    path.write_text(json.dumps(existing, indent=2), encoding="utf-8")
+    get_state_store(workspace).append_items(BROADCAST_PENDING, [item])
 
 
 class BroadcastMsgAction(BaseAgentAction):
@@ -18,6 +18,8 @@ from libs.remote_chrome_utils import dismiss_consent
 class BrowserVisionAction(BaseAgentAction):
     """Capture webpage: screenshot, HTML, and body text."""
 
+    SIDE_EFFECT_FREE = True  # only reads the page; files go to workspace/output
+
     PAGE_LOAD_TIMEOUT = 10
     MAX_SCREENSHOT_DIMENSION = 32767  # Chrome CDP limit
     DEFAULT_WIDTH = 800
@@ -1,4 +1,4 @@
-"""Delete schedule ability: remove items from schedule.json."""
+"""Delete schedule ability: remove items from the schedule."""
 from .action import DeleteScheduleAction
 
 __all__ = ["DeleteScheduleAction"]
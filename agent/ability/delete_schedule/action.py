@@ -1,4 +1,4 @@
-"""Delete schedule: remove matching items from schedule.json."""
+"""Delete schedule: remove matching items from the schedule."""
 from libs.base_agent_action import BaseAgentAction
 from libs.scheduler import remove_schedule_items
 
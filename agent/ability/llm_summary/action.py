@@ -1,13 +1,29 @@
 """LLM summary: summarize file content via LLM."""
 import json
 import os
+import threading
 from pathlib import Path
+from typing import Dict, Tuple
 
 from libs.base_agent_action import BaseAgentAction
+from libs.base_llm import BaseLLM
 from libs.logger import dialog, log
 
 from llm import get_llm
 
+_llms: Dict[Tuple[str, str, str], BaseLLM] = {}
+_llms_lock = threading.Lock()
+
+
+def _summary_llm(workspace: Path, provider: str, model: str) -> BaseLLM:
+    """LLM instance per workspace, provider and model, reused across summaries (keeps its connections)."""
+    key = (str(workspace), provider, model)
+    with _llms_lock:
+        llm = _llms.get(key)
+        if llm is None:
+            llm = _llms[key] = get_llm(workspace=workspace, provider=provider, model=model)
+        return llm
+
 
 class LLMSummaryAction(BaseAgentAction):
     """Summarize content file using LLM."""
@@ -40,18 +56,20 @@ class LLMSummaryAction(BaseAgentAction):
         content = path.read_text(encoding="utf-8")
 
         try:
-            summary_prompt = (
-                "Summary in 100 words or less to the following content of a website body: \n"
-                + content
-            )
-            if self._get_thinking():
-                dialog("Waiting for LLM...")
+            instruction = "Summary in 100 words or less to the following content of a website body:"
             cfg = self._get_config()
             llm_cfg = cfg.get("llm", {})
             provider = llm_cfg.get("provider") or os.getenv("LLM_PROVIDER", "ollama")
             model = llm_cfg.get("model") or os.getenv("LLM_MODEL", "llama3.1:8B")
-            llm = get_llm(workspace=self.workspace, provider=provider, model=model)
-            output = llm.chat(summary_prompt)
+            llm = _summary_llm(self.workspace, provider, model)
+            if self._get_thinking():
+                dialog("Waiting for LLM...")
+            # Timeout-bounded, cached per page text (no_cache: true in params forces a fresh one) and
+            # answered by the llm.cascade small model for short pages
+            output = llm.request(instruction, content, use_cache=not self.params.get("no_cache"))
+            if output is None:
+                output = "Error: no summary from LLM."
+                log("(Check LLM_PROVIDER and API key in .env)")
         except Exception as e:
             output = f"Error: {e}"
             log("(Check LLM_PROVIDER and API key in .env)")
@@ -1,4 +1,4 @@
-"""Memory write ability: update memory.json with new key-value pairs."""
+"""Memory write ability: update memory with new key-value pairs."""
 from .action import MemoryWriteAction
 
 __all__ = ["MemoryWriteAction"]
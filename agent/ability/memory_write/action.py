@@ -1,24 +1,20 @@
-"""Memory write: merge new_memory into memory.json."""
-import json
-from pathlib import Path
-
+"""Memory write: merge new_memory into the workspace memory."""
 from libs.base_agent_action import BaseAgentAction
+from libs.memory_index import get_memory_index
+from libs.state_store import get_state_store
 
 
 class MemoryWriteAction(BaseAgentAction):
-    """Write/merge memory to workspace/memory.json."""
+    """Write/merge memory into the workspace state store (only the given keys are written).
+    Returns only the keys that changed, not the whole memory (the result lands in history)."""
 
     def execute(self):
-        memory_path = self.workspace / "memory.json"
-        old_memory = json.loads(memory_path.read_text(encoding="utf-8")) if memory_path.exists() else {}
         new_memory = self.params["new_memory"]
 
-        merged_memory = {**old_memory, **new_memory}
-
-        with open(memory_path, "w", encoding="utf-8") as f:
-            json.dump(merged_memory, f, indent=2)
+        changed = get_state_store(self.workspace).merge_memory(new_memory)
+        get_memory_index(self.workspace).sync()
 
         return {
             "action": "_MEMORY_WRITE",
-            "text": f"Memory updated: {merged_memory}",
+            "text": f"Memory updated: {changed}" if changed else "Memory unchanged (same values already stored)",
         }
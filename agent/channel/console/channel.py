@@ -38,6 +38,20 @@ class ConsoleChannel(BaseChannel):
         print(f"\nSafeClaw: {message}\n", flush=True)
         print("You: ", end="", flush=True)
 
+    def _stream_printer(self, streamed_text: list):
+        """on_delta callback: print reply text progressively. Collects deltas into streamed_text."""
+
+        def on_delta(delta: str) -> None:
+            if not delta:
+                print("\n", flush=True)
+                return
+            if not streamed_text:
+                print("\nSafeClaw: ", end="", flush=True)
+            streamed_text.append(delta)
+            print(delta, end="", flush=True)
+
+        return on_delta
+
     def run(self, agent) -> None:
         """Blocking loop: receive -> process -> send."""
         agent._ensure_ready()
@@ -63,9 +77,14 @@ class ConsoleChannel(BaseChannel):
                 continue
             agent.broadcast_to_other_channels(user_input, exclude_source=source)
             stop_typing = agent.start_typing_except(source)
+            streamed_text = []
             try:
-                result = agent.process(user_input, source, flush_broadcasts_after=True)
+                result = agent.process(
+                    user_input, source, flush_broadcasts_after=True, on_delta=self._stream_printer(streamed_text)
+                )
                 response, streamed = result if isinstance(result, tuple) else (result, False)
+                if streamed_text and (response or "").strip() == "".join(streamed_text).strip():
+                    streamed = True
                 if not streamed:
                     self.send(response)
                 agent.broadcast_response_to_other_channels(
@@ -4,7 +4,7 @@ LAN services use RequestClient to push requests; this channel uses ResponseClien
 to consume them and return agent responses.
 """
 import os
-from typing import Tuple
+from typing import Optional, Tuple
 
 from libs.base_channel import BaseChannel
 from libs.logger import log
@@ -29,6 +29,40 @@ class HeadlessChannel(BaseChannel):
             "LAN_QUEUE_OUT",
             cfg.get("queue_out", "safeclaw:lan_response_queue"),
         )
+        # Requests handled at once (each is a full agent turn on the turn engine)
+        self._workers = self._parse_workers(cfg.get("workers"))
+        # Seconds a request may wait in the queue before it is answered with an error instead (queue wait only)
+        self._deadline_s = self._parse_deadline(cfg.get("deadline_s"))
+
+    @staticmethod
+    def _parse_workers(value) -> int:
+        """workers as a count >= 1 (numbers and numeric strings); 1 if unset or invalid."""
+        if value is None or value == "":
+            return 1
+        try:
+            workers = int(value)
+        except (TypeError, ValueError):
+            log(f"[Headless] Ignoring invalid workers {value!r} (expected a count); using 1")
+            return 1
+        if workers < 1:
+            log(f"[Headless] workers {value!r} is below 1; using 1")
+            return 1
+        return workers
+
+    @staticmethod
+    def _parse_deadline(value) -> Optional[float]:
+        """deadline_s as seconds (numbers and numeric strings); None if unset or invalid."""
+        if value is None or value == "":
+            return None
+        try:
+            deadline = float(value)
+        except (TypeError, ValueError):
+            log(f"[Headless] Ignoring invalid deadline_s {value!r} (expected seconds); requests never expire")
+            return None
+        if deadline <= 0:
+            log(f"[Headless] Ignoring deadline_s {value!r} (must be > 0); requests never expire")
+            return None
+        return deadline
 
     @property
     def source_name(self) -> str:
@@ -56,7 +90,7 @@ class HeadlessChannel(BaseChannel):
             log("[Headless] Channel disabled or REDIS_URL not set. Skipping.")
             return
         agent._ensure_ready()
-        log(f"[Headless] Listening on {self._queue_in} -> {self._queue_out}")
+        log(f"[Headless] Listening on {self._queue_in} -> {self._queue_out} (workers={self._workers})")
 
         def handler(request: dict) -> dict:
             prompt = (request.get("prompt") or "").strip()
@@ -67,9 +101,28 @@ class HeadlessChannel(BaseChannel):
                     "response": "[Error] Empty prompt.",
                     "type": "response",
                 }
+            on_delta = None
+            if request.get("stream") and request_id:
+                # Partial reply text goes to {queue_out}:{id}, ahead of the final response on the same list
+                def on_delta(delta: str) -> None:
+                    if delta:
+                        client.push_frame(request_id, {"id": request_id, "type": "partial", "response": delta})
+
+            on_progress = None
+            if request.get("progress") and request_id:
+                # Progress frames (reply text, then each action's result) go to {queue_out}:{id} as well
+                def on_progress(frame: dict) -> None:
+                    client.push_frame(request_id, {"id": request_id, "type": "progress", **frame})
+
             try:
                 agent.broadcast_to_other_channels(prompt, exclude_source=self.SOURCE_NAME)
-                result = agent.process(prompt, source=self.SOURCE_NAME, flush_broadcasts_after=True)
+                result = agent.process(
+                    prompt,
+                    source=self.SOURCE_NAME,
+                    flush_broadcasts_after=True,
+                    on_delta=on_delta,
+                    on_progress=on_progress,
+                )
                 response, streamed = result if isinstance(result, tuple) else (result, False)
                 agent._flush_pending_broadcasts()
                 agent.broadcast_response_to_other_channels(
@@ -82,4 +135,4 @@ class HeadlessChannel(BaseChannel):
                 return {"id": request_id, "response": err_msg, "type": "response"}
 
         client = ResponseClient(self._redis_url, self._queue_in, self._queue_out)
-        client.run(handler)
+        client.run(handler, workers=self._workers, deadline_s=self._deadline_s)
@@ -2,8 +2,10 @@
 Telegram channel. Pure I/O for Telegram bot.
 """
 import asyncio
+import concurrent.futures
 import sys
 import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Callable, Optional, Set, Tuple
@@ -19,6 +21,67 @@ CHANNEL_DIR = Path(__file__).resolve().parent.parent
 AGENT_DIR = CHANNEL_DIR.parent
 
 
+class _TelegramStreamer:
+    """Shows streamed reply text in one Telegram message: the first delta sends it, later deltas edit it.
+    Edits are throttled to one per interval seconds (Telegram rate-limits message edits) and never block the
+    agent thread: at most one edit is in flight, and it shows all text received by the time it runs."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, message, interval: float):
+        self._loop = loop
+        self._message = message
+        self._interval = interval
+        self._text = ""
+        self._shown = ""
+        self._sent = None
+        self._last_push = 0.0
+        self._in_flight: Optional[concurrent.futures.Future] = None
+
+    def on_delta(self, delta: str) -> None:
+        """Called from the agent worker thread for each text delta."""
+        if not delta:
+            return
+        self._text += delta
+        now = time.monotonic()
+        if now - self._last_push < self._interval:
+            return
+        if self._in_flight is not None and not self._in_flight.done():
+            return  # text is merged into the next edit
+        self._last_push = now
+        self._in_flight = asyncio.run_coroutine_threadsafe(self._show_latest(), self._loop)
+        self._in_flight.add_done_callback(self._edit_done)
+
+    @staticmethod
+    def _edit_done(future: concurrent.futures.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            log(f"[Telegram stream] {future.exception()}")
+
+    async def _show_latest(self) -> None:
+        await self._show(self._text)
+
+    async def _show(self, text: str) -> None:
+        text = text[:4096]
+        if not text.strip() or text == self._shown:
+            return
+        if self._sent is None:
+            self._sent = await self._message.reply_text(text)
+        else:
+            await self._sent.edit_text(text)
+        self._shown = text
+
+    async def finish(self, final_text: str) -> bool:
+        """Wait for the in-flight edit, then replace the streamed message with the final response.
+        Returns False if nothing was streamed."""
+        if self._in_flight is not None:
+            try:
+                await asyncio.wait_for(asyncio.wrap_future(self._in_flight), timeout=10)
+            except Exception:
+                pass  # logged by _edit_done
+        if self._sent is None:
+            return False
+        await self._show(final_text)
+        return True
+
+
 class TelegramChannel(BaseChannel):
     """Telegram I/O. Uses python-telegram-bot polling."""
 
@@ -35,6 +98,7 @@ class TelegramChannel(BaseChannel):
         self._broadcast_chat_ids: Set[int] = set(
             int(x) for x in cfg.get("broadcast_chat_ids", []) if str(x).lstrip("-").isdigit()
         )
+        self._stream_edit_interval = float(cfg.get("stream_edit_interval", 1.0))
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._application: Optional[Application] = None
 
@@ -178,9 +242,12 @@ class TelegramChannel(BaseChannel):
             agent.broadcast_to_other_channels(user_input, exclude_source=source)
             try:
                 loop = asyncio.get_event_loop()
+                streamer = _TelegramStreamer(loop, update.message, self._stream_edit_interval)
                 process_task = loop.run_in_executor(
                     None,
-                    lambda: agent.process(user_input, source, flush_broadcasts_after=True),
+                    lambda: agent.process(
+                        user_input, source, flush_broadcasts_after=True, on_delta=streamer.on_delta
+                    ),
                 )
                 async def keep_typing():
                     while True:
@@ -191,7 +258,8 @@ class TelegramChannel(BaseChannel):
                 _, result = await asyncio.gather(keep_typing(), process_task)
                 response, streamed = result if isinstance(result, tuple) else (result, False)
                 text = (response or "(no response)")[:4096]
-                await update.message.reply_text(text)
+                if not await streamer.finish(text):
+                    await update.message.reply_text(text)
                 agent.broadcast_response_to_other_channels(
                     text, exclude_source=source, exclude_console_when_streamed=streamed
                 )
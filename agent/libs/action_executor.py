@@ -11,6 +11,7 @@ from typing import Optional
 
 from redis import Redis
 
+from libs.artifact_store import get_artifact_store
 from libs.debug_log import debug_log, truncate_debug
 from libs.logger import dialog, log
 
@@ -67,11 +68,13 @@ class ActionExecutor:
             debug_log(f"ActionExecutor: router action={self.action!r} params_keys={list(self.params.keys())}")
             params = dict(self.params)
             if params.get("option") == "USE_ARTIFACT":
-                artifact_data = self._load_artifact()
-                if artifact_data is not None:
-                    params["artifact"] = artifact_data
+                # Handle only (key, size, where to fetch); the skill fetches the content itself
+                handle = get_artifact_store(self.workspace).latest_handle()
+                if handle is not None:
+                    params["artifact"] = handle
+                    debug_log(f"USE_ARTIFACT: handle key={handle['key'][:12]} size={handle['size']}")
                 else:
-                    log("USE_ARTIFACT: artifact.json not found or invalid, proceeding without artifact")
+                    log("USE_ARTIFACT: no artifact stored, proceeding without artifact")
             execution_message += f"Router Action: {self.action}\n"
             execution_message += f"Params: {params}\n"
 
@@ -118,16 +121,6 @@ class ActionExecutor:
 
         return result
 
-    def _load_artifact(self):
-        """Load workspace/artifact.json. Returns parsed dict or None if missing/invalid."""
-        artifact_path = self.workspace / "artifact.json"
-        if not artifact_path.exists():
-            return None
-        try:
-            return json.loads(artifact_path.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
-            return None
-
     def _get_redis(self):
         url = os.getenv("REDIS_URL")
         if url is None:
@@ -0,0 +1,153 @@
+"""
+Artifact store: the last N artifacts (bridge results that USE_ARTIFACT actions consume) as
+content-addressed blobs under workspace/artifacts/<sha256>.json, with metadata in
+workspace/artifacts/index.json (oldest first). Blobs are also published to Redis
+(safeclaw:artifact:<sha256>, with a TTL) so router skills on another machine can fetch them.
+
+USE_ARTIFACT router actions get a handle (key, size, where to fetch) instead of the content; skills
+fetch it lazily with BaseSkill.fetch_artifact(). Config (config.json):
+  "artifacts": {"keep": 20, "redis_ttl_h": 24}
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from redis import Redis
+
+from libs.debug_log import debug_log
+from libs.workspace_state import read_json, update_json, write_json_atomic
+
+ARTIFACT_DIR_NAME = "artifacts"
+REDIS_PREFIX = "safeclaw:artifact:"
+HANDLE_TYPE = "artifact_handle"
+LEGACY_FILE = "artifact.json"
+
+_stores: Dict[Path, "ArtifactStore"] = {}
+_stores_lock = threading.Lock()
+
+
+class ArtifactStore:
+    """Content-addressed artifacts for one workspace. put() stores, latest_handle() references."""
+
+    def __init__(self, directory: Path, keep: int = 20, redis_ttl_s: float = 86400):
+        self.directory = Path(directory)
+        self.keep = max(1, int(keep))
+        self.redis_ttl_s = max(60, int(redis_ttl_s))
+        self.index_path = self.directory / "index.json"
+        self._redis: Optional[Redis] = None
+
+    def _redis_client(self) -> Optional[Redis]:
+        url = os.getenv("REDIS_URL")
+        if not url:
+            return None
+        if self._redis is None:
+            self._redis = Redis.from_url(url)
+        return self._redis
+
+    def blob_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def put(self, data: Any, source: str = "") -> dict:
+        """Store data (if new) as the latest artifact and publish it to Redis. Returns its handle."""
+        raw = json.dumps(data, ensure_ascii=False)
+        key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        size = len(raw.encode("utf-8"))
+        path = self.blob_path(key)
+        if not path.exists():
+            write_json_atomic(path, data, indent=None, ensure_ascii=False)
+        entry = {"key": key, "size": size, "created": int(time.time() * 1000), "source": source}
+        dropped: List[str] = []
+
+        def append(index):
+            index = [e for e in (index if isinstance(index, list) else []) if e.get("key") != key]
+            index.append(entry)
+            dropped.extend(e.get("key") for e in index[:-self.keep])
+            return index[-self.keep:]
+
+        update_json(self.index_path, [], append)
+        for old in dropped:
+            if old:
+                self.blob_path(old).unlink(missing_ok=True)
+        self._publish(key, raw)
+        debug_log(f"artifact_store: put key={key[:12]} size={size} source={source!r} dropped={len(dropped)}")
+        return self._handle(entry)
+
+    def _publish(self, key: str, raw: Optional[str] = None) -> bool:
+        """Make sure Redis holds the blob (refreshing its TTL). Returns False without Redis."""
+        try:
+            r = self._redis_client()
+            if r is None:
+                return False
+            redis_key = f"{REDIS_PREFIX}{key}"
+            if raw is None:
+                if r.expire(redis_key, self.redis_ttl_s):
+                    return True
+                raw = self.blob_path(key).read_text(encoding="utf-8")
+            r.set(redis_key, raw, ex=self.redis_ttl_s)
+            return True
+        except Exception as e:
+            debug_log(f"artifact_store: Redis publish failed key={key[:12]} {e!r}")
+            return False
+
+    def _handle(self, entry: dict, published: bool = True) -> dict:
+        return {
+            "type": HANDLE_TYPE,
+            "key": entry["key"],
+            "size": entry["size"],
+            "created": entry.get("created"),
+            "source": entry.get("source", ""),
+            "redis_key": f"{REDIS_PREFIX}{entry['key']}" if published else None,
+            "path": str(self.blob_path(entry["key"]).resolve()),
+        }
+
+    def history(self) -> List[dict]:
+        """Index entries, oldest first."""
+        self._import_legacy()
+        index = read_json(self.index_path, [])
+        return [e for e in index if isinstance(e, dict) and self.blob_path(e.get("key", "")).exists()]
+
+    def latest_handle(self) -> Optional[dict]:
+        """Handle of the latest artifact (re-published to Redis if it expired there), or None."""
+        entries = self.history()
+        if not entries:
+            return None
+        entry = entries[-1]
+        return self._handle(entry, published=self._publish(entry["key"]))
+
+    def load(self, key: str) -> Optional[Any]:
+        """Content of artifact key, or None if unknown."""
+        return read_json(self.blob_path(key), None)
+
+    def _import_legacy(self) -> None:
+        """Import a workspace/artifact.json from before the store (once, while the store is empty).
+        The file is left in place and ignored afterwards."""
+        if self.index_path.exists():
+            return
+        legacy = self.directory.parent / LEGACY_FILE
+        data = read_json(legacy, None) if legacy.exists() else None
+        if data is not None:
+            self.put(data, source=LEGACY_FILE)
+
+
+def get_artifact_store(workspace: Path, config: Optional[dict] = None) -> ArtifactStore:
+    """Shared store for workspace. config defaults to workspace/../config.json."""
+    directory = Path(workspace) / ARTIFACT_DIR_NAME
+    store = _stores.get(directory)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(directory)
+            if store is None:
+                if config is None:
+                    config = read_json(Path(workspace).parent / "config.json", {})
+                cfg = config.get("artifacts", {}) if isinstance(config, dict) else {}
+                cfg = cfg if isinstance(cfg, dict) else {}
+                try:
+                    store = ArtifactStore(directory, cfg.get("keep", 20), float(cfg.get("redis_ttl_h", 24)) * 3600)
+                except (TypeError, ValueError):
+                    store = ArtifactStore(directory)
+                _stores[directory] = store
+    return store
@@ -2,6 +2,7 @@
 Base agent: workspace, process_turn logic, and channels.
 Channels are I/O (ConsoleChannel, TelegramChannel, etc.) - parts of the agent.
 On startup: load config.json (clone from config_initial.json if missing), use llm settings to select LLM class.
+Channels and LLM providers are imported lazily, only when config enables them, to keep startup fast.
 """
 import atexit
 import json
@@ -10,18 +11,19 @@ import shutil
 import sys
 import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 from dotenv import load_dotenv
 
-from channel.console.channel import ConsoleChannel
-from channel.headless.channel import HeadlessChannel
+from libs import startup_profile
 from libs.agent_config import AgentConfig
 from libs.debug_log import debug_log, init_from_argv, is_debug, truncate_debug
+from libs.intent_router import fast_path
+from libs.llm_dispatcher import INTERACTIVE, SCHEDULED, llm_priority
 from libs.logger import dialog, log, logging_setup
 from libs.scheduler import Scheduler
-from channel.telegram.channel import TelegramChannel
-from llm import get_llm
+from libs.turn_engine import get_engine
+from libs.state_store import BROADCAST_PENDING, HISTORY, HISTORY_SUMMARY, SCHEDULE, get_state_store
 
 
 class BaseAgent:
@@ -31,12 +33,6 @@ class BaseAgent:
     AGENT_DIR = Path(__file__).resolve().parent.parent
     WORKSPACE = AGENT_DIR / "workspace"
 
-    WORKSPACE_DEFAULTS = {
-        "memory.json": {},
-        "input_history.json": [],
-        "schedule.json": [],
-    }
-
     WORKSPACE_INITIAL_TEMPLATES = {
         "agent_action.json": "agent_action_initial.json",
         "router_action.json": "router_action_initial.json",
@@ -66,14 +62,19 @@ class BaseAgent:
             self.console_monitor = console_monitor
             self._llm = None
             self._provider = None
+            self._ready_lock = threading.Lock()
             self._scheduler = Scheduler(agent=self)
             return
-        self.config = config or self.load_config()
+        with startup_profile.phase("load config"):
+            self.config = config or self.load_config()
         self.console_monitor = console_monitor
-        self.channels = self._build_channels()
+        with startup_profile.phase("build channels"):
+            self.channels = self._build_channels()
         self._llm = None
         self._provider = None
-        self._scheduler = Scheduler(agent=self)
+        self._ready_lock = threading.Lock()
+        with startup_profile.phase("scheduler init"):
+            self._scheduler = Scheduler(agent=self)
 
 
 
@@ -84,27 +85,41 @@ class BaseAgent:
 
     
     def _build_channels(self) -> List:
-        """Build channels: ConsoleChannel (always) + others from config."""
+        """Build channels: ConsoleChannel (always) + others from config.
+        Channel modules are imported here so disabled channels (e.g. python-telegram-bot) are never loaded."""
+        from channel.console.channel import ConsoleChannel
+
         channels = [ConsoleChannel()]
         for c in self.config.get("channels", []):
-            if c.get("name") == "telegram" and c.get("enabled"):
+            if c.get("name") == "telegram" and c.get("enabled") and c.get("bot_token"):
+                with startup_profile.phase("import telegram channel"):
+                    from channel.telegram.channel import TelegramChannel
                 ch = TelegramChannel(channel_cfg=c)
                 if ch.bot_token:
                     channels.append(ch)
             elif c.get("name") == "headless" and c.get("enabled", True):
+                with startup_profile.phase("import headless channel"):
+                    from channel.headless.channel import HeadlessChannel
                 ch = HeadlessChannel(channel_cfg=c)
                 if ch.enabled:
                     channels.append(ch)
         return channels
 
     def _ensure_ready(self) -> None:
-        if self._llm is None:
+        if self._llm is not None:
+            return
+        with self._ready_lock:
+            if self._llm is not None:
+                return
             self.ensure_workspace_files()
             # LLM settings from config.json (config first, env fallback)
             llm_cfg = self.config.get("llm", {})
             self._provider = llm_cfg.get("provider") or os.getenv("LLM_PROVIDER", "ollama")
             self._model = llm_cfg.get("model") or os.getenv("LLM_MODEL", "llama3.1:8B")
-            self._llm = get_llm(workspace=self.WORKSPACE, provider=self._provider, model=self._model)
+            with startup_profile.phase(f"llm init ({self._provider})"):
+                from llm import get_llm
+
+                self._llm = get_llm(workspace=self.WORKSPACE, provider=self._provider, model=self._model)
 
     def print_banner(self) -> None:
         """Show startup banner in console dialog and log."""
@@ -135,7 +150,12 @@ class BaseAgent:
         if self._exit_clear:
             return
         self.ensure_workspace_files()
+        if startup_profile.is_enabled():
+            self._ensure_ready()
+            dialog(startup_profile.report())
+            return
         self.print_banner()
+        self._start_llm_warm_up()
         self._scheduler.start()
         atexit.register(self._scheduler.stop)
         try:
@@ -167,6 +187,20 @@ class BaseAgent:
         finally:
             self._scheduler.stop()
 
+    def _start_llm_warm_up(self) -> None:
+        """Preload the LLM model in the background (config llm.warm_up, default true)."""
+        if not self.config.get("llm", {}).get("warm_up", True):
+            return
+
+        def warm_up() -> None:
+            try:
+                self._ensure_ready()
+                self._llm.warm_up()
+            except Exception as e:
+                log(f"LLM warm-up error: {e}")
+
+        threading.Thread(target=warm_up, daemon=True).start()
+
     def broadcast_to_other_channels(self, user_input: str, exclude_source: str) -> None:
         """Replicate user input to all channels except the source."""
         for ch in self.channels:
@@ -192,30 +226,16 @@ class BaseAgent:
                     ch.send_broadcast(message)
 
     def _flush_pending_broadcasts(self) -> None:
-        """Read workspace/broadcast_pending.json, send to channels, delete file."""
-        path = self.WORKSPACE / "broadcast_pending.json"
-        if not path.exists():
-            return
+        """Take the pending broadcasts (one transaction), then send to channels."""
+        pending = get_state_store(self.WORKSPACE).take_items(BROADCAST_PENDING)
         try:
-            raw = path.read_text(encoding="utf-8").strip()
-            data = json.loads(raw) if raw else {}
-            pending = data.get("pending", [])
-            if isinstance(pending, dict):
-                pending = [pending]
-            if not isinstance(pending, list):
-                pending = []
             for item in pending:
                 if isinstance(item, dict) and item.get("message"):
                     msg = item.get("message", "")
                     ch_list = item.get("channels")
                     self.broadcast_message(msg, ch_list if ch_list else None)
-        except (json.JSONDecodeError, OSError):
-            pass
-        finally:
-            try:
-                path.unlink(missing_ok=True)
-            except OSError:
-                pass
+        except (AttributeError, TypeError) as e:
+            log(f"Broadcast flush error: {e}")
 
     def start_typing_except(self, source: str):
         """Start typing on channels that support it (e.g. Telegram) when another channel is processing.
@@ -233,12 +253,37 @@ class BaseAgent:
 
         return stop
 
-    def process(self, user_input: str, source: str = "Console", flush_broadcasts_after: bool = False):
-        """Process one turn. Returns (response, streamed_to_console). flush_broadcasts_after: if True, caller flushes."""
+    def process(
+        self,
+        user_input: str,
+        source: str = "Console",
+        flush_broadcasts_after: bool = False,
+        on_delta: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ):
+        """Process one turn. Returns (response, streamed_to_console). flush_broadcasts_after: if True, caller flushes.
+        on_delta: source channel callback for streamed reply text (config llm.stream).
+        on_progress: source channel callback for progress frames (see BaseLLM.process_turn)."""
         debug_log(f"process: source={source!r} input={truncate_debug(user_input)}")
         self._ensure_ready()
+        # Structured requests (time, "remind me in 5 mins ...", ...) skip the LLM (libs/intent_router.py);
+        # scheduled prompts always go to the LLM
+        fast = fast_path(self, user_input) if source != "Schedule" else None
+        if fast is not None:
+            if not flush_broadcasts_after:
+                self._flush_pending_broadcasts()
+            debug_log(f"process: fast path source={source!r} response_preview={truncate_debug(fast, 400)}")
+            return (fast, False)
         thinking = self.config.get("thinking", True)
-        result = self._llm.process_turn(user_input, thinking=thinking)
+        priority = SCHEDULED if source == "Schedule" else INTERACTIVE
+
+        def turn():
+            with llm_priority(priority):
+                return self._llm.process_turn(user_input, thinking=thinking, on_delta=on_delta, on_progress=on_progress)
+
+        # Bounded worker pool: turns from different channels run concurrently up to turn_workers.
+        # LLM calls of scheduled turns yield to interactive ones in the LLM dispatcher.
+        result = get_engine(self.config).run(turn)
         if not flush_broadcasts_after:
             self._flush_pending_broadcasts()
         resp_preview = result[0] if isinstance(result, tuple) else result
@@ -247,13 +292,10 @@ class BaseAgent:
 
     @classmethod
     def ensure_workspace_files(cls) -> None:
-        """Create workspace files if missing."""
+        """Create workspace files if missing. Memory, history, schedule and pending broadcasts live in
+        workspace/state.db (libs/state_store.py), created here; old JSON files are imported once."""
         cls.WORKSPACE.mkdir(parents=True, exist_ok=True)
-        for filename, default in cls.WORKSPACE_DEFAULTS.items():
-            path = cls.WORKSPACE / filename
-            if not path.exists():
-                with open(path, "w", encoding="utf-8") as f:
-                    json.dump(default, f, indent=2)
+        get_state_store(cls.WORKSPACE)
         for target, source in cls.WORKSPACE_INITIAL_TEMPLATES.items():
             target_path = cls.WORKSPACE / target
             source_path = cls.WORKSPACE / source
@@ -263,16 +305,17 @@ class BaseAgent:
 
     @classmethod
     def clear_workspace(cls) -> None:
-        """Reset input_history.json, delete schedule.json, clear logs, and workspace/output/."""
+        """Reset history, schedule and pending broadcasts, delete artifacts/, clear logs, and workspace/output/."""
         cls.WORKSPACE.mkdir(parents=True, exist_ok=True)
+        store = get_state_store(cls.WORKSPACE)
+        for name in (HISTORY, HISTORY_SUMMARY, SCHEDULE, BROADCAST_PENDING):
+            store.replace(name, [])
         artifact_path = cls.WORKSPACE / "artifact.json"
         if artifact_path.exists():
             artifact_path.unlink()
-        with open(cls.WORKSPACE / "input_history.json", "w", encoding="utf-8") as f:
-            json.dump([], f, indent=2)
-        schedule_path = cls.WORKSPACE / "schedule.json"
-        if schedule_path.exists():
-            schedule_path.unlink()
+        artifacts_dir = cls.WORKSPACE / "artifacts"
+        if artifacts_dir.exists():
+            shutil.rmtree(artifacts_dir)
         logs_dir = (cls.AGENT_DIR / "logs").resolve()
         logs_dir.mkdir(parents=True, exist_ok=True)
         for log_name in ("system.log", "llm.log", "schedule.log", "debug.log"):
@@ -287,7 +330,7 @@ class BaseAgent:
             shutil.rmtree(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         print(
-            "Cleared input_history.json, schedule.json (deleted), artifact.json (deleted), "
+            "Cleared history (and its summary), schedule, pending broadcasts, artifacts/ (deleted), "
             "system.log, llm.log, schedule.log, debug.log, and workspace/output/",
             flush=True,
         )
@@ -9,6 +9,11 @@ from typing import Any, Optional
 class BaseAgentAction(ABC):
     """Base for all agent actions. Subclasses implement execute()."""
 
+    # True only if execute() changes nothing the user would notice when the turn then fails (no memory,
+    # schedule or message writes). Such actions may start before the response is fully parsed
+    # (llm.early_dispatch, libs/tool_stream_parser.py).
+    SIDE_EFFECT_FREE = False
+
     def __init__(self, workspace: Path, params: dict):
         self.workspace = workspace
         self.params = params
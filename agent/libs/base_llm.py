@@ -6,13 +6,25 @@ import json
 import os
 import re
 import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
 
+from libs.context_packer import ContextPacker, context_budget, format_counts, get_tokenizer
 from libs.debug_log import debug_log
-from libs.logger import dialog
+from libs.llm_dispatcher import FOLLOW_UP, get_dispatcher, llm_priority
+from libs.logger import dialog, log
+from libs.memory_index import DEFAULT_TOP_K, get_memory_index
+from libs.model_cascade import cascade_settings, data_chars, known_actions, record_summary, record_turn, review
+from libs.prompt_format import prompt_format, serialize
+from libs.prompt_template import PROMPT_CACHE_WRITER, PromptTemplate, SectionCache, write_prompt_cache
+from libs.tool_selector import DEFAULT_ALWAYS_ON, DEFAULT_MIN_COVERAGE, DEFAULT_TOOLS_TOP_K, get_tool_selector
+from libs.tool_stream_parser import EarlyActionDispatcher
+from libs.history_summary import SUMMARY_KEY, get_compactor, summary_entry, summary_settings
+from libs.state_store import HISTORY, HISTORY_SUMMARY, get_state_store
 
 
 class LLMResponseError(Exception):
@@ -20,6 +32,219 @@ class LLMResponseError(Exception):
     pass
 
 
+class LLMCancelled(Exception):
+    """Raised inside a provider call when the caller gave up on it (timeout)."""
+    pass
+
+
+# Per-thread cancel event of the running LLM call (set by _chat_with_timeout in the call thread)
+_call_local = threading.local()
+_call_stats_lock = threading.Lock()
+_call_stats = {
+    "in_flight": 0, "draining": 0, "started": 0, "completed": 0, "failed": 0, "timed_out": 0,
+    "hedged": 0, "hedge_won": 0,
+}
+
+
+def llm_call_stats() -> dict:
+    """Gauge of LLM calls in this process. in_flight: calls still running; draining: calls that timed out
+    (or lost a hedge) and were cancelled but have not torn down yet (should drop back to 0 quickly)."""
+    with _call_stats_lock:
+        return dict(_call_stats)
+
+
+class ToolCodeStreamFilter:
+    """Passes streamed text through until the <tool_code> marker, so tool JSON is never shown.
+    Holds back a trailing partial marker (e.g. "<tool_") until the next chunk decides it."""
+
+    MARKER = "<tool_code>"
+
+    def __init__(self):
+        self._pending = ""
+        self.stopped = False
+
+    def feed(self, chunk: str) -> str:
+        """Return the part of chunk that is safe to show now."""
+        if self.stopped or not chunk:
+            return ""
+        text = self._pending + chunk
+        idx = text.lower().find(self.MARKER)
+        if idx >= 0:
+            self.stopped = True
+            self._pending = ""
+            return text[:idx]
+        hold = text.rfind("<", max(0, len(text) - len(self.MARKER) + 1))
+        if hold >= 0 and self.MARKER.startswith(text[hold:].lower()):
+            self._pending = text[hold:]
+            return text[:hold]
+        self._pending = ""
+        return text
+
+    def flush(self) -> str:
+        """Return held-back text at end of stream (it was not a marker after all)."""
+        out, self._pending = ("" if self.stopped else self._pending), ""
+        return out
+
+
+class _DeltaGate:
+    """Routes the streamed output of exactly one call: the first call that produces a chunk claims the
+    stream; chunks from other (hedged) calls are dropped. on_delta gets displayable text (up to
+    <tool_code>), on_raw every raw chunk (incremental tool_code parsing)."""
+
+    def __init__(
+        self, on_delta: Optional[Callable[[str], None]] = None, on_raw: Optional[Callable[[str], None]] = None
+    ):
+        self._on_delta = on_delta
+        self._on_raw = on_raw
+        self._lock = threading.Lock()
+        self.owner: Optional["_LLMCall"] = None
+
+    def claim(self, call: "_LLMCall") -> bool:
+        with self._lock:
+            if self.owner is None:
+                self.owner = call
+            return self.owner is call
+
+    def emit(self, call: "_LLMCall", text: str) -> None:
+        if self._on_delta is not None and self.claim(call):
+            self._on_delta(text)
+
+    def raw(self, call: "_LLMCall", chunk: str) -> None:
+        if self.claim(call) and self._on_raw is not None:
+            self._on_raw(chunk)
+
+
+class _LLMCall:
+    """One provider call on its own daemon thread, with its own cancel event and stats accounting."""
+
+    def __init__(
+        self,
+        llm: "BaseLLM",
+        prompt: str,
+        options: Optional[list],
+        messages: Optional[list],
+        gate: Optional[_DeltaGate],
+        changed: threading.Event,
+        on_finish: Optional[Callable[[], None]] = None,
+    ):
+        self.llm, self.prompt, self.options, self.messages = llm, prompt, options, messages
+        self.gate, self.changed, self.on_finish = gate, changed, on_finish
+        self.result: Optional[str] = None
+        self.exc: Optional[BaseException] = None
+        self.first = threading.Event()
+        self.done = threading.Event()
+        self.started_at = self.first_at = self.done_at = 0.0
+        self._cancel = threading.Event()
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self) -> None:
+        """Ask the provider to stop (no-op if the call already finished)."""
+        with _call_stats_lock:
+            if self.done.is_set() or self._cancel.is_set():
+                return
+            self._cancel.set()
+            _call_stats["draining"] += 1
+
+    def _run(self) -> None:
+        llm = self.llm
+        _call_local.cancel = self._cancel
+        with _call_stats_lock:
+            _call_stats["in_flight"] += 1
+            _call_stats["started"] += 1
+        try:
+            if self.gate is None:
+                if self.messages:
+                    self.result = llm.chat_messages(self.messages, options=self.options)
+                else:
+                    self.result = llm.chat(self.prompt, options=self.options)
+                return
+            if self.messages:
+                chunks = llm.chat_messages_stream(self.messages, options=self.options)
+            else:
+                chunks = llm.chat_stream(self.prompt, options=self.options)
+            parts = []
+            shown_any = False
+            stream_filter = ToolCodeStreamFilter()
+            try:
+                for chunk in chunks:
+                    llm._check_cancelled()
+                    if not chunk:
+                        continue
+                    if not self.first.is_set():
+                        self.first_at = time.monotonic()
+                        self.first.set()
+                        self.changed.set()
+                    parts.append(chunk)
+                    self.gate.raw(self, chunk)
+                    shown = stream_filter.feed(chunk)
+                    if shown:
+                        shown_any = True
+                        self.gate.emit(self, shown)
+            finally:
+                close = getattr(chunks, "close", None)
+                if close:
+                    close()
+            tail = stream_filter.flush()
+            if tail:
+                shown_any = True
+                self.gate.emit(self, tail)
+            if shown_any and self.gate.owner is self:
+                self.gate.emit(self, "")  # end of stream
+            self.result = "".join(parts)
+        except Exception as e:
+            self.exc = e
+        finally:
+            _call_local.cancel = None
+            self.done_at = time.monotonic()
+            with _call_stats_lock:
+                _call_stats["in_flight"] -= 1
+                if self._cancel.is_set():
+                    _call_stats["draining"] -= 1
+                else:
+                    _call_stats["failed" if self.exc else "completed"] += 1
+                self.done.set()
+            if self.on_finish:
+                self.on_finish()
+            self.changed.set()
+
+
+class _LatencyTracker:
+    """Recent successful latencies of one provider/model (time to first token or to completion)."""
+
+    MIN_SAMPLES = 20
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q-quantile of the samples, or None until MIN_SAMPLES are recorded."""
+        with self._lock:
+            if len(self._samples) < self.MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_latency_trackers: Dict[Tuple[str, str, bool], _LatencyTracker] = {}
+
+
+def _latency_tracker(provider: str, model: str, streaming: bool) -> _LatencyTracker:
+    key = (provider, model, streaming)
+    tracker = _latency_trackers.get(key)
+    if tracker is None:
+        with _call_stats_lock:
+            tracker = _latency_trackers.setdefault(key, _LatencyTracker())
+    return tracker
+
+
 class BaseLLM(ABC):
     """Base LLM: prompt, parse, process_turn. Subclasses implement chat() for provider-specific connection."""
 
@@ -29,45 +254,61 @@ class BaseLLM(ABC):
         self.model = model or os.getenv("LLM_MODEL", "llama3.1:8B")
         self._root = Path(__file__).resolve().parent.parent
         self.output_file = workspace / "output" / "prompt_cache.txt"
+        self._sections = SectionCache()
+        self._packer: Optional[ContextPacker] = None
+        self._packer_cfg: Optional[dict] = None
+        self._template_tokens: Optional[tuple] = None
+        self.last_call_stats: dict = {}
+        self.connection: dict = {}  # per-instance host/options overrides (CONNECTION_KEYS), set by get_llm
+
+    def _get_config(self) -> dict:
+        """config.json (agent dir), re-parsed only when the file changes."""
+        return self._sections.get("config", self.workspace.parent / "config.json", self._read_config)
+
+    def _read_config(self) -> dict:
+        cfg_path = self.workspace.parent / "config.json"
+        if cfg_path.exists():
+            try:
+                cfg = json.loads(cfg_path.read_text(encoding="utf-8").strip())
+                return cfg if isinstance(cfg, dict) else {}
+            except (json.JSONDecodeError, OSError):
+                pass
+        return {}
 
     # --- Prompt (from prompt.py) ---
+    def _prompt_format(self) -> str:
+        """Serialization of memory, actions and history (llm.prompt_format, libs/prompt_format.py)."""
+        return prompt_format(self._get_config().get("llm", {}), self.provider)
+
     def _load_file(self, path: Path, default: str = "") -> str:
         if path.exists():
             return path.read_text(encoding="utf-8").strip()
         return default
 
-    def _load_memory(self) -> str:
-        path = self.workspace / "memory.json"
-        if not path.exists():
-            return "{}"
-        raw = path.read_text(encoding="utf-8").strip()
-        if not raw:
-            return "{}"
+    def _load_memory(self, query: str) -> str:
+        """Memory entries relevant to query (libs/memory_index.py): top-k plus pinned keys (llm.memory)."""
+        cfg = self._get_config().get("llm", {}).get("memory", {})
+        cfg = cfg if isinstance(cfg, dict) else {}
         try:
-            data = json.loads(raw)
-            if not isinstance(data, dict):
-                return json.dumps(dict(data) if hasattr(data, "__iter__") else {}, indent=2)
-            return json.dumps(data, indent=2)
-        except json.JSONDecodeError:
-            return raw
+            top_k = int(cfg.get("top_k", DEFAULT_TOP_K))
+        except (TypeError, ValueError):
+            top_k = DEFAULT_TOP_K
+        pinned = cfg.get("pinned", [])
+        index = get_memory_index(self.workspace)
+        selected = index.select(query, top_k, pinned if isinstance(pinned, list) else [])
+        text = serialize(selected, self._prompt_format())
+        total = len(index.sync())
+        if len(selected) < total:
+            text += f"\n({len(selected)} of {total} entries shown: pinned and most relevant to this message)"
+        return text
 
     def _load_agent_actions(self) -> str:
-        path = self.workspace / "agent_action.json"
-        if not path.exists():
-            return "[]"
-        raw = path.read_text(encoding="utf-8").strip()
-        if not raw:
-            return "[]"
-        try:
-            data = json.loads(raw)
-            if not isinstance(data, list):
-                return json.dumps([data], indent=2)
-            return json.dumps(data, indent=2)
-        except json.JSONDecodeError:
-            return raw
+        return self._load_actions(self.workspace / "agent_action.json")
 
     def _load_router_actions(self) -> str:
-        path = self.workspace / "router_action.json"
+        return self._load_actions(self.workspace / "router_action.json")
+
+    def _load_actions(self, path: Path) -> str:
         if not path.exists():
             return "[]"
         raw = path.read_text(encoding="utf-8").strip()
@@ -76,36 +317,70 @@ class BaseLLM(ABC):
         try:
             data = json.loads(raw)
             if not isinstance(data, list):
-                return json.dumps([data], indent=2)
-            return json.dumps(data, indent=2)
+                return serialize([data], self._prompt_format())
+            return serialize(data, self._prompt_format())
         except json.JSONDecodeError:
             return raw
 
-    MAX_HISTORY_CHARS = 8000
+    def _tool_selection(self) -> Optional[dict]:
+        """config.json llm.tool_selection if enabled (off by default), else None."""
+        cfg = self._get_config().get("llm", {}).get("tool_selection", {})
+        cfg = cfg if isinstance(cfg, dict) else {}
+        return cfg if cfg.get("enabled", False) else None
 
-    def _load_input_history(self) -> str:
-        path = self.workspace / "input_history.json"
-        if not path.exists():
-            return "[]"
-        raw = path.read_text(encoding="utf-8").strip()
-        if not raw:
-            return "[]"
+    def _action_sections(self, query: str) -> Tuple[str, str]:
+        """AGENT_ACTIONS and ROUTER_ACTIONS. With llm.tool_selection only the actions relevant to query
+        plus the always-on ones (libs/tool_selector.py; all of them on a weak match); dropped actions are
+        logged."""
+        cfg = self._tool_selection()
+        fmt = self._prompt_format()
+        if cfg is None:
+            return (
+                self._section(f"agent_actions:{fmt}", "agent_action.json", self._load_agent_actions),
+                self._section(f"router_actions:{fmt}", "router_action.json", self._load_router_actions),
+            )
         try:
-            data = json.loads(raw)
-            if not isinstance(data, list):
-                return json.dumps([data], indent=2)
-            out = json.dumps(data, indent=2)
-            if len(out) <= self.MAX_HISTORY_CHARS:
-                return out
-            # Truncate: keep last 4 entries, shorten each response to ~150 chars
-            kept = data[-4:] if len(data) > 4 else data
-            for e in kept:
-                r = e.get("response", "")
-                if isinstance(r, str) and len(r) > 150:
-                    e["response"] = r[:147] + "..."
-            return json.dumps(kept, indent=2)
-        except json.JSONDecodeError:
-            return raw
+            top_k = int(cfg.get("top_k", DEFAULT_TOOLS_TOP_K))
+            min_coverage = float(cfg.get("min_coverage", DEFAULT_MIN_COVERAGE))
+        except (TypeError, ValueError):
+            top_k, min_coverage = DEFAULT_TOOLS_TOP_K, DEFAULT_MIN_COVERAGE
+        always = cfg.get("always", DEFAULT_ALWAYS_ON)
+        selected, dropped = get_tool_selector(self.workspace).select(
+            query, top_k, always if isinstance(always, (list, tuple)) else DEFAULT_ALWAYS_ON, min_coverage
+        )
+        if dropped:
+            log(f"Tool selection: dropped {', '.join(dropped)}")
+        agent = selected.get("agent")
+        router = selected.get("router")
+        return (
+            self._load_agent_actions() if agent is None else serialize(agent, fmt),
+            self._load_router_actions() if router is None else serialize(router, fmt),
+        )
+
+    def _load_history_entries(self) -> list:
+        """Turn history entries (state store), led by the rolling summary of older turns if there is one
+        (libs/history_summary.py). Trimmed per turn to the token budget by _pack_context."""
+        entries = [e for e in get_state_store(self.workspace).items(HISTORY) if isinstance(e, dict)]
+        summary = summary_entry(self.workspace)
+        return [summary] + entries if summary else entries
+
+    def _render_history(self, entries: list) -> str:
+        return serialize(entries, self._prompt_format())
+
+    def _history_messages(self, entries: list) -> list:
+        """History entries as chat messages (user_input -> user, response -> assistant)."""
+        messages = []
+        for entry in entries:
+            if entry.get(SUMMARY_KEY):
+                messages.append({"role": "system", "content": f"Summary of earlier turns: {entry[SUMMARY_KEY]}"})
+                continue
+            if entry.get("user_input"):
+                messages.append({"role": "user", "content": self._escape_user_input(str(entry["user_input"]))})
+            response = entry.get("response")
+            if response:
+                label = entry.get("follow_up_action")
+                messages.append({"role": "assistant", "content": f"[{label}] {response}" if label else str(response)})
+        return messages
 
     def _escape_user_input(self, text: str) -> str:
         if not text:
@@ -114,78 +389,448 @@ class BaseLLM(ABC):
         escaped = escaped.replace("</", "<\\/")
         return escaped
 
+    def _prompt_template(self) -> PromptTemplate:
+        """Compiled llm/{provider}/PROMPT.md (falls back to the ollama template)."""
+        prompt_path = self._root / "llm" / self.provider / "PROMPT.md"
+        if not prompt_path.exists():
+            prompt_path = self._root / "llm" / "ollama" / "PROMPT.md"
+        return PromptTemplate.load(prompt_path)
+
+    def _section(self, name: str, filename: str, loader) -> str:
+        """Rendered section for a workspace file; loader runs only when the file changed."""
+        return self._sections.get(name, self.workspace / filename, loader)
+
+    def _state_section(self, name: str, collections: Tuple[str, ...], loader) -> Any:
+        """Rendered section for state store collections; loader runs only after one of them was written."""
+        store = get_state_store(self.workspace)
+        return self._sections.get_keyed(name, tuple(store.version(c) for c in collections), loader)
+
+    def _relevance_query(self, clear_escaped_text: str) -> str:
+        """Query for memory and tool selection: this message plus the previous one (follow-ups like
+        "and tomorrow?")."""
+        history = self._state_section("history", (HISTORY, HISTORY_SUMMARY), self._load_history_entries)
+        previous = next((str(e["user_input"]) for e in reversed(history) if e.get("user_input")), "")
+        return f"{clear_escaped_text} {previous}"
+
+    def _prompt_values(self, clear_escaped_text: str) -> dict:
+        """Template values except USER_INPUT_HISTORY, which is filled after packing (see _pack_context)."""
+        now = datetime.now()
+        query = self._relevance_query(clear_escaped_text)
+        agent_actions, router_actions = self._action_sections(query)
+        return {
+            "CURRENT_DAY": now.strftime("%a"),
+            "CURRENT_DATETIME": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "MEMORY_CONTENT": self._load_memory(query),
+            "SOUL_CONTENT": self._section(
+                "soul", "SOUL.md", lambda: self._load_file(self.workspace / "SOUL.md", "You are SafeClaw.")
+            ),
+            "AGENT_ACTIONS": agent_actions,
+            "ROUTER_ACTIONS": router_actions,
+            "USER_MESSAGE": clear_escaped_text,
+        }
+
+    # Sections the context packer may drop, by config name (llm.optional_sections) -> placeholder
+    PACKABLE_SECTIONS = {
+        "memory": "MEMORY_CONTENT",
+        "soul": "SOUL_CONTENT",
+        "agent_actions": "AGENT_ACTIONS",
+        "router_actions": "ROUTER_ACTIONS",
+    }
+
+    def _context_packer(self) -> ContextPacker:
+        """Packer for the current config.json llm section; rebuilt only when the config changes."""
+        cfg = self._get_config().get("llm", {})
+        if self._packer is None or self._packer_cfg is not cfg:
+            optional = cfg.get("optional_sections", ["memory"])
+            self._packer = ContextPacker(
+                context_budget(cfg, self.model),
+                get_tokenizer(cfg),
+                optional_sections=[n for n in optional if n in self.PACKABLE_SECTIONS],
+            )
+            self._packer_cfg = cfg
+            self._template_tokens = None
+        return self._packer
+
+    def _pack_context(
+        self, template: PromptTemplate, values: dict, render_history: Callable[[list], str]
+    ) -> Tuple[dict, list]:
+        """Fit sections and history into the token budget (llm.context_budget) by priority:
+        oldest history, long responses, rest of history, then llm.optional_sections.
+        Returns (values, kept history entries) and logs per-section token counts."""
+        packer = self._context_packer()
+        if self._template_tokens is None or self._template_tokens[0] is not template:
+            self._template_tokens = (template, packer.count_tokens(template.render({})))
+        slots = set(self.PACKABLE_SECTIONS.values()) | {"USER_INPUT_HISTORY"}
+        fixed = self._template_tokens[1] + sum(
+            packer.count_tokens(v) for k, v in values.items() if k not in slots
+        )
+        if "USER_INPUT_HISTORY" in values:
+            fixed += packer.count_tokens(values["USER_INPUT_HISTORY"])
+        sections = {name: values[ph] for name, ph in self.PACKABLE_SECTIONS.items()}
+        history = self._state_section("history", (HISTORY, HISTORY_SUMMARY), self._load_history_entries)
+        sections, history, counts = packer.pack(fixed, sections, history, render_history)
+        values = dict(values)
+        for name, ph in self.PACKABLE_SECTIONS.items():
+            values[ph] = sections[name]
+        log(f"Prompt tokens ({self.model}): {format_counts(counts, packer.budget)}")
+        return values, history
+
     def create_prompt(self, user_input: str) -> Optional[str]:
         clear_escaped_text = self._escape_user_input(user_input.strip())
         if not clear_escaped_text:
             return None
 
-        prompt_path = self._root / "llm" / self.provider / "PROMPT.md"
-        if not prompt_path.exists():
-            prompt_path = self._root / "llm" / "ollama" / "PROMPT.md"
-        prompt = self._load_file(prompt_path, "{{USER_MESSAGE}}")
-        now = datetime.now()
-        prompt = prompt.replace("{{CURRENT_DAY}}", now.strftime("%a"))
-        prompt = prompt.replace("{{CURRENT_DATETIME}}", now.strftime("%Y-%m-%d %H:%M:%S"))
-        prompt = prompt.replace("{{MEMORY_CONTENT}}", self._load_memory())
-        prompt = prompt.replace("{{USER_INPUT_HISTORY}}", self._load_input_history())
-        prompt = prompt.replace("{{SOUL_CONTENT}}", self._load_file(self.workspace / "SOUL.md", "You are SafeClaw."))
-        prompt = prompt.replace("{{AGENT_ACTIONS}}", self._load_agent_actions(), 1)
-        prompt = prompt.replace("{{ROUTER_ACTIONS}}", self._load_router_actions(), 1)
-        prompt = prompt.replace("{{USER_MESSAGE}}", clear_escaped_text)
-
-        self.output_file.parent.mkdir(parents=True, exist_ok=True)
-        self.output_file.write_text(prompt, encoding="utf-8")
+        template = self._prompt_template()
+        values, history = self._pack_context(template, self._prompt_values(clear_escaped_text), self._render_history)
+        values["USER_INPUT_HISTORY"] = self._render_history(history)
+        prompt = template.render(values)
+        self._dump_prompt(prompt)
         return prompt
 
+    # Placeholders that change between turns. In chat layout everything before the first of these
+    # is sent as a stable system message, so the model server can reuse its KV cache for that prefix.
+    VOLATILE_PLACEHOLDERS = {"CURRENT_DAY", "CURRENT_DATETIME", "MEMORY_CONTENT", "USER_INPUT_HISTORY", "USER_MESSAGE"}
+    # Chosen per turn while llm.tool_selection is on, so they move to the volatile tail then
+    SELECTED_PLACEHOLDERS = {"AGENT_ACTIONS", "ROUTER_ACTIONS"}
+    HISTORY_IN_MESSAGES_NOTE = "(Earlier turns are in the previous messages.)"
+
+    def _prompt_layout(self) -> str:
+        """config.json llm.prompt_layout: single (one user message, default) or chat (system + history messages)."""
+        return str(self._get_config().get("llm", {}).get("prompt_layout", "single")).lower()
+
+    def create_messages(self, user_input: str) -> Optional[list]:
+        """Prompt as chat messages, most static first: system (static template prefix: protocols, soul,
+        actions), then history as user/assistant messages, then a user message with the volatile rest
+        (memory, datetime, user input)."""
+        clear_escaped_text = self._escape_user_input(user_input.strip())
+        if not clear_escaped_text:
+            return None
+
+        template = self._prompt_template()
+        values = self._prompt_values(clear_escaped_text)
+        values["USER_INPUT_HISTORY"] = self.HISTORY_IN_MESSAGES_NOTE
+        values, history = self._pack_context(
+            template, values, lambda entries: self._flatten_messages(self._history_messages(entries))
+        )
+        volatile_names = self.VOLATILE_PLACEHOLDERS
+        if self._tool_selection() is not None:
+            volatile_names = volatile_names | self.SELECTED_PLACEHOLDERS
+        static, volatile = template.render_split(values, volatile_names)
+        messages = [{"role": "system", "content": static.strip()}]
+        messages.extend(self._history_messages(history))
+        messages.append({"role": "user", "content": volatile.strip()})
+        self._dump_prompt(self._flatten_messages(messages))
+        return messages
+
+    @staticmethod
+    def _flatten_messages(messages: list) -> str:
+        """Join chat messages into one prompt (for providers without a messages API, and for logs). Each
+        message keeps its role label, so history turns stay attributable to user or assistant."""
+        return "\n\n".join(f"[{m.get('role', '')}]\n{m.get('content', '')}" for m in messages)
+
+    def _dump_prompt(self, prompt: str) -> None:
+        """Write prompt to output/prompt_cache.txt per config prompt_cache: async (default), sync or off."""
+        mode = str(self._get_config().get("prompt_cache", "async")).lower()
+        if mode == "off":
+            return
+        if mode == "sync":
+            write_prompt_cache(self.output_file, prompt)
+        else:
+            PROMPT_CACHE_WRITER.submit(self.output_file, prompt)
+
     @abstractmethod
     def chat(self, prompt: str, options: Optional[list[str]] = None) -> str:
         """Send prompt to LLM and return response. options: optional list of special instructions per provider."""
         pass
 
+    def chat_stream(self, prompt: str, options: Optional[list[str]] = None) -> Iterator[str]:
+        """Yield response text deltas as they arrive. Default: one chunk from chat(). Override to stream."""
+        yield self.chat(prompt, options=options)
+
+    def chat_messages(self, messages: list, options: Optional[list[str]] = None) -> str:
+        """Send chat messages (role/content dicts). Default: flatten into one prompt for chat()."""
+        return self.chat(self._flatten_messages(messages), options=options)
+
+    def chat_messages_stream(self, messages: list, options: Optional[list[str]] = None) -> Iterator[str]:
+        """Streaming variant of chat_messages(). Default: flatten into one prompt for chat_stream()."""
+        return self.chat_stream(self._flatten_messages(messages), options=options)
+
+    @staticmethod
+    def cancel_event() -> Optional[threading.Event]:
+        """Cancel event of the LLM call running on this thread, or None outside _chat_with_timeout.
+        Providers check it between chunks / polls and tear the request down when it is set."""
+        return getattr(_call_local, "cancel", None)
+
+    def _check_cancelled(self) -> None:
+        """Raise LLMCancelled if the current call was cancelled."""
+        cancel = self.cancel_event()
+        if cancel is not None and cancel.is_set():
+            raise LLMCancelled(f"{self.provider} call cancelled")
+
+    def warm_up(self) -> None:
+        """Preload the model so the first turn does not pay load time. Default: no-op. Runs in background."""
+        pass
+
+    def _set_call_stats(self, stats: dict) -> None:
+        """Record provider stats for the last call (e.g. Ollama prompt_eval_count) and log them to system.log.
+        A low prompt_eval_count relative to prompt size means the server reused its cached prefix."""
+        stats = {k: v for k, v in stats.items() if v is not None}
+        self.last_call_stats = stats
+        if stats:
+            log(f"LLM stats ({self.provider} {self.model}): " + " ".join(f"{k}={v}" for k, v in stats.items()))
+
+    def _early_dispatch_enabled(self) -> bool:
+        """Whether to start a side-effect-free first action while the response is still streaming
+        (config.json llm.early_dispatch, default False). The provider is then always called in streaming mode."""
+        return bool(self._get_config().get("llm", {}).get("early_dispatch", False))
+
+    def _stream_enabled(self) -> bool:
+        """Whether to stream text deltas to channels (config.json llm.stream, default False)."""
+        return bool(self._get_config().get("llm", {}).get("stream", False))
+
     def _get_llm_timeout(self) -> int:
         """Timeout in seconds for LLM chat (from config.json llm_timeout, default 120). Applies to all providers."""
-        cfg_path = self.workspace.parent / "config.json"
-        if cfg_path.exists():
-            try:
-                cfg = json.loads(cfg_path.read_text(encoding="utf-8").strip())
-                return int(cfg.get("llm_timeout", 120))
-            except (json.JSONDecodeError, ValueError, TypeError):
-                pass
-        return 120
+        try:
+            return int(self._get_config().get("llm_timeout", 120))
+        except (ValueError, TypeError):
+            return 120
 
-    def _chat_with_timeout(self, prompt: str, options: Optional[list[str]] = None) -> str:
-        """Run chat() with timeout. Returns error string if LLM does not respond in time."""
+    def _chat_with_timeout(
+        self,
+        prompt: str,
+        options: Optional[list[str]] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+        messages: Optional[list] = None,
+        on_raw: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Run chat() with timeout. Returns error string if LLM does not respond in time.
+        On timeout the call is cancelled (see cancel_event): providers abort the HTTP stream or tell the
+        bridge to drop the request, so timed-out generations do not keep running.
+        on_delta: if set, use chat_stream() and pass each displayable text delta (up to <tool_code>),
+        then one empty string to mark the end of the stream.
+        messages: if set (chat layout), send these instead of prompt; prompt is used for logging only.
+        on_raw: if set, the call is streamed and every raw chunk is passed on (early action dispatch).
+        The call first takes a slot from the LLM dispatcher (libs/llm_dispatcher.py) at the thread's
+        priority class; waiting for the slot also counts against the timeout.
+        With llm.fallback configured, a hedged call goes to the fallback provider when the primary has no
+        first token (streaming) or answer within its learned p95 latency and a dispatcher slot is free;
+        the first usable answer wins."""
         timeout_s = self._get_llm_timeout()
+        dispatcher = get_dispatcher(self._get_config())
+        started_at = time.monotonic()
+        if not dispatcher.acquire(timeout=timeout_s):
+            debug_log(f"LLM: no dispatcher slot within {timeout_s}s ({dispatcher.summary()})")
+            return f"{self.TIMEOUT_MARKER} Response did not complete in time."
+        queue_s = time.monotonic() - started_at
+        deadline = time.monotonic() + max(timeout_s - queue_s, 1)
         debug_log(
-            f"LLM: chat start provider={self.provider} timeout_s={timeout_s} "
-            f"prompt_len={len(prompt)} options={options!r}"
+            f"LLM: chat start provider={self.provider} timeout_s={deadline - time.monotonic():.0f} "
+            f"queue_ms={queue_s * 1000:.0f} prompt_len={len(prompt)} options={options!r} stream={on_delta is not None} raw={on_raw is not None}"
         )
-        result = [None]
-        exc = [None]
+        gate = _DeltaGate(on_delta, on_raw) if on_delta is not None or on_raw is not None else None
+        changed = threading.Event()
+        primary = _LLMCall(self, prompt, options, messages, gate, changed, on_finish=dispatcher.release)
+        primary.start()
+        calls = [primary]
 
-        def run():
-            try:
-                result[0] = self.chat(prompt, options=options)
-            except Exception as e:
-                exc[0] = e
-
-        t = threading.Thread(target=run, daemon=True)
-        t.start()
-        t.join(timeout=timeout_s)
-        if exc[0]:
-            debug_log(f"LLM: chat failed exception={exc[0]!r}")
-            raise exc[0]
-        if t.is_alive():
-            debug_log(f"LLM: chat TIMEOUT after {timeout_s}s (thread still running)")
-            return "[Timeout] Response did not complete in time."
-        out = result[0] or ""
+        fallback = self._fallback_llm()
+        if fallback is not None:
+            tracker = _latency_tracker(self.provider, self.model, streaming=gate is not None)
+            delay = min(self._hedge_delay(tracker), max(deadline - time.monotonic(), 0))
+            reached = primary.first.wait(timeout=delay) if gate is not None else primary.done.wait(timeout=delay)
+            if not reached and not primary.done.is_set():
+                # The hedge needs its own slot at the same priority; skip it rather than queue behind others
+                if not dispatcher.acquire(timeout=0):
+                    debug_log(f"LLM: no dispatcher slot for a hedge, waiting for the primary ({dispatcher.summary()})")
+                else:
+                    debug_log(f"LLM: hedging to {fallback.provider} {fallback.model} after {delay:.1f}s")
+                    with _call_stats_lock:
+                        _call_stats["hedged"] += 1
+                    hedge = _LLMCall(fallback, prompt, options, messages, gate, changed, on_finish=dispatcher.release)
+                    hedge.start()
+                    calls.append(hedge)
+
+        winner = self._await_winner(calls, gate, changed, deadline)
+        for call in calls:
+            if call is not winner:
+                call.cancel()
+        if primary.exc is None and primary.done.is_set() and primary.result:
+            tracker_latency = primary.first_at if gate is not None else primary.done_at
+            _latency_tracker(self.provider, self.model, streaming=gate is not None).add(tracker_latency - primary.started_at)
+        if winner is None:
+            failed = next((c for c in calls if c.exc is not None), None)
+            if failed is not None and all(c.done.is_set() for c in calls):
+                debug_log(f"LLM: chat failed exception={failed.exc!r}")
+                raise failed.exc
+            with _call_stats_lock:
+                _call_stats["timed_out"] += 1
+            debug_log("LLM: chat TIMEOUT, cancelled")
+            return f"{self.TIMEOUT_MARKER} Response did not complete in time."
+        if winner is not primary:
+            with _call_stats_lock:
+                _call_stats["hedge_won"] += 1
+            log(f"LLM: hedged answer from {winner.llm.provider} {winner.llm.model} won over {self.provider}")
+        if winner.exc is not None:
+            debug_log(f"LLM: chat failed exception={winner.exc!r}")
+            raise winner.exc
+        out = winner.result or ""
         debug_log(f"LLM: chat ok output_len={len(out)}")
         return out
 
-    def _generic_llm_request(self, instruction: str, data=None) -> Optional[str]:
-        """Send instruction (and optionally data) to LLM. Use for summarize, generate, etc. Returns response or None."""
+    @staticmethod
+    def _await_winner(
+        calls: list, gate: Optional["_DeltaGate"], changed: threading.Event, deadline: float
+    ) -> Optional["_LLMCall"]:
+        """First usable call: when streaming, the call that claimed the channel (once it finishes);
+        otherwise the first to finish with a non-empty answer. A lone finished call wins even if empty
+        or failed once nothing else is running. None on deadline."""
+        while True:
+            changed.clear()
+            if gate is not None and gate.owner is not None and gate.owner.done.is_set():
+                return gate.owner
+            if gate is None or gate.owner is None:
+                for call in calls:
+                    if call.done.is_set() and call.exc is None and call.result:
+                        return call
+                if all(c.done.is_set() for c in calls):
+                    return next((c for c in calls if c.exc is None), None) or (calls[0] if len(calls) == 1 else None)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            changed.wait(timeout=remaining)
+
+    def _fallback_llm(self) -> Optional["BaseLLM"]:
+        """LLM for hedged requests (config.json llm.fallback: provider, model, optional host/options), or None."""
+        cfg = self._get_config().get("llm", {}).get("fallback")
+        if not isinstance(cfg, dict) or not cfg.get("provider"):
+            return None
+        return self._secondary_llm("_fallback", str(cfg["provider"]).lower(), cfg.get("model") or self.model, cfg)
+
+    # Connection settings a fallback or cascade entry may set for its own LLM; absent keys fall back to
+    # the top-level llm values (providers read them through self.connection, e.g. OllamaLLM._llm_config)
+    CONNECTION_KEYS = ("host", "hosts", "health_interval_s", "keep_alive", "options")
+
+    def _secondary_llm(self, attr: str, provider: str, model: str, entry: dict) -> Optional["BaseLLM"]:
+        """LLM for a fallback / cascade entry, cached on attr; None if it is this LLM itself (same provider,
+        model and connection settings)."""
+        connection = {k: entry[k] for k in self.CONNECTION_KEYS if k in entry}
+        key = (provider, model, connection)
+        if key == (self.provider, self.model, self.connection):
+            return None
+        cached = getattr(self, attr, None)
+        if cached is None or (cached.provider, cached.model, cached.connection) != key:
+            from llm import get_llm
+
+            cached = get_llm(workspace=self.workspace, provider=provider, model=model, connection=connection)
+            setattr(self, attr, cached)
+        return cached
+
+    def _hedge_delay(self, tracker: "_LatencyTracker") -> float:
+        """Seconds to wait for the primary before hedging: learned quantile (llm.fallback.quantile, default
+        0.95) of recent primary latencies, at least min_hedge_s; hedge_after_s until enough samples."""
+        cfg = self._get_config().get("llm", {}).get("fallback", {})
+        try:
+            learned = tracker.quantile(float(cfg.get("quantile", 0.95)))
+            if learned is None:
+                return float(cfg.get("hedge_after_s", 15))
+            return max(learned, float(cfg.get("min_hedge_s", 2)))
+        except (TypeError, ValueError):
+            return 15.0
+
+    def _cascade_llm(self) -> Optional[Tuple["BaseLLM", dict]]:
+        """(small LLM, settings) for cascaded routing (config.json llm.cascade), or None. The small
+        model's own instance never cascades further."""
+        settings = cascade_settings(self._get_config().get("llm", {}))
+        if settings is None:
+            return None
+        small = settings["small"]
+        cached = self._secondary_llm("_cascade_small", small["provider"], small["model"], small)
+        return (cached, settings) if cached is not None else None
+
+    def _cascade_attempt(self, user_input: str, prompt: str, messages: Optional[list]) -> Optional[str]:
+        """Small-model output for this turn if it passes review (libs/model_cascade.py), else None so
+        the turn goes to this (large) model. Not streamed: a rejected answer must not reach the channel."""
+        routed = self._cascade_llm()
+        if routed is None:
+            return None
+        small, settings = routed
+        if len(user_input) > settings["max_input_chars"]:
+            record_turn("direct", "long_input")
+            log(f"Cascade: {self.model} directly (long_input, {len(user_input)} chars)")
+            return None
+        started = time.perf_counter()
+        try:
+            output = small._chat_with_timeout(prompt, messages=messages)
+        except Exception as e:
+            debug_log(f"cascade: small model failed {e!r}")
+            output = ""
+        reason = None
+        if not output or output.startswith(self.TIMEOUT_MARKER):
+            reason = "no_answer"
+        else:
+            try:
+                _, actions = self._parse_response(output)
+                reason = review(settings, actions, known_actions(self.workspace))
+            except (LLMResponseError, ValueError):
+                reason = "parse_error"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if reason:
+            record_turn("escalated", reason)
+            log(f"Cascade: {small.model} rejected ({reason}) after {elapsed_ms:.0f}ms, escalating to {self.model}")
+            return None
+        record_turn("small")
+        log(f"Cascade: {small.model} answered in {elapsed_ms:.0f}ms")
+        return output
+
+    def _llm_for_data(self, data) -> "BaseLLM":
+        """LLM for a summary of data: the cascade's small model while data is at most
+        llm.cascade.max_data_chars, else this model."""
+        routed = self._cascade_llm()
+        if routed is None:
+            return self
+        small, settings = routed
+        use_small = data_chars(data) <= settings["max_data_chars"]
+        record_summary(use_small)
+        debug_log(f"cascade: summary of {data_chars(data)} chars -> {small.model if use_small else self.model}")
+        return small if use_small else self
+
+    TIMEOUT_MARKER = "[Timeout]"
+
+    def cached_request(
+        self, instruction: str, data, compute: Callable[[], Optional[str]], use_cache: bool = True
+    ) -> Optional[str]:
+        """Return compute() through the LLM result cache (libs/llm_cache.py), keyed on provider, model,
+        instruction and normalized data. use_cache=False bypasses the cache for this call.
+        Empty results and timeouts are not cached."""
+        from libs import llm_cache
+
+        cache = llm_cache.get_cache(self.workspace, self._get_config()) if use_cache else None
+        key = llm_cache.make_key(self.provider, self.model, instruction, data) if cache else None
+        if cache:
+            hit = cache.get(key)
+            if hit is not None:
+                debug_log(f"LLM cache: hit key={key[:12]} len={len(hit)}")
+                return hit
+        out = compute()
+        if cache and out and not out.startswith(self.TIMEOUT_MARKER):
+            cache.put(key, out)
+        return out
+
+    def request(self, instruction: str, data=None, use_cache: bool = True) -> Optional[str]:
+        """One-shot request outside a turn (summaries for abilities and background jobs): instruction plus
+        data, bounded by llm_timeout, cached and routed like action-result summaries (_generic_llm_request).
+        Returns the response, or None on failure or empty output."""
+        return self._generic_llm_request(instruction, data, use_cache=use_cache)
+
+    def _generic_llm_request(self, instruction: str, data=None, use_cache: bool = True) -> Optional[str]:
+        """Send instruction (and optionally data) to LLM. Use for summarize, generate, etc. Returns response or None.
+        Repeated instruction + data is answered from the LLM result cache unless use_cache=False.
+        With llm.cascade set, data up to max_data_chars is summarized by the small model."""
         if not instruction:
             return None
+        llm = self._llm_for_data(data)
+        if llm is not self:
+            return llm._generic_llm_request(instruction, data, use_cache=use_cache)
         if data is None:
             prompt = instruction
         else:
@@ -196,10 +841,16 @@ class BaseLLM(ABC):
             else:
                 data_str = str(data)
             prompt = f"{instruction}\n\n{data_str}" if data_str.strip() else instruction
-        try:
-            return self._chat_with_timeout(prompt, options=["RENEW_SESSION"]).strip()
-        except Exception:
-            return None
+
+        def compute() -> Optional[str]:
+            try:
+                # Summaries of action results queue behind live turns (never above the caller's class)
+                with llm_priority(FOLLOW_UP):
+                    return self._chat_with_timeout(prompt, options=["RENEW_SESSION"]).strip()
+            except Exception:
+                return None
+
+        return self.cached_request(instruction, data, compute, use_cache=use_cache)
 
     # --- Response parsing (from llm_response.py) ---
     def _parse_response(self, output: str) -> Tuple[str, Optional[list]]:
@@ -227,10 +878,27 @@ class BaseLLM(ABC):
         return (text, None)
 
     # --- Process turn (from chat_core.py) ---
-    def process_turn(self, user_input: str, thinking: bool = True) -> str:
-        input_history = json.loads((self.workspace / "input_history.json").read_text(encoding="utf-8"))
+    def process_turn(
+        self,
+        user_input: str,
+        thinking: bool = True,
+        on_delta: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ) -> str:
+        """Run one Think-Act-Observe turn. on_delta: channel callback for streamed reply text
+        (used only when config llm.stream is on). on_progress: channel callback for progress frames
+        while actions run: {"stage": "message", "response"} once the reply is parsed, then
+        {"stage": "action", "index", "action", "response"} after each action (the text flushed to
+        the dialog for it). Returns (response, streamed_to_console)."""
+        if on_delta is not None and not self._stream_enabled():
+            on_delta = None
 
-        prompt = self.create_prompt(user_input)
+        messages = None
+        if self._prompt_layout() == "chat":
+            messages = self.create_messages(user_input)
+            prompt = self._flatten_messages(messages) if messages else None
+        else:
+            prompt = self.create_prompt(user_input)
         if not prompt:
             return ("(Empty prompt, skipping)", False)
 
@@ -244,11 +912,22 @@ class BaseLLM(ABC):
         if thinking:
             dialog("Waiting for LLM...")
         debug_log(f"process_turn: built prompt len={len(prompt)}")
-        try:
-            output = self._chat_with_timeout(prompt)
-        except Exception as e:
-            debug_log(f"process_turn: LLM error {e!r}")
-            return (self._format_chat_error(e), False)
+        # Small model first when llm.cascade is set; None means this model answers
+        output = self._cascade_attempt(user_input, prompt, messages)
+        early = None
+        if output is None:
+            # Start actions as soon as their <tool_code> object is complete (config llm.early_dispatch)
+            early = EarlyActionDispatcher(self.workspace) if self._early_dispatch_enabled() else None
+            try:
+                output = self._chat_with_timeout(
+                    prompt, on_delta=on_delta, messages=messages, on_raw=early.feed if early else None
+                )
+            except Exception as e:
+                debug_log(f"process_turn: LLM error {e!r}")
+                return (self._with_early_results(self._format_chat_error(e), user_input, early), False)
+            finally:
+                if early:
+                    early.close()
 
         # Log A when LLM responds (collapse newlines between text and <tool_code>)
         ts_a = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -266,6 +945,8 @@ class BaseLLM(ABC):
                 debug_log("process_turn: no tool_code; text-only reply")
             response_parts = [message]
             follow_up_results = []
+            if actions and (message or "").strip():
+                self._emit_progress(on_progress, {"stage": "message", "response": message})
 
             if actions:
                 from libs.action_executor import ActionExecutor
@@ -280,12 +961,16 @@ class BaseLLM(ABC):
                         return [_strip_params(x) for x in d]
                     return d
 
-                for action in actions:
+                for index, action in enumerate(actions):
                     prev_len = len(response_parts)
                     try:
                         try:
-                            executor = ActionExecutor(action["name"], action["params"], workspace=self.workspace)
-                            executed_result = executor.execute()
+                            future = early.take(index, action) if early else None
+                            if future is not None:
+                                executed_result = future.result()
+                            else:
+                                executor = ActionExecutor(action["name"], action["params"], workspace=self.workspace)
+                                executed_result = executor.execute()
                             data = _strip_params(executed_result) if executed_result is not None else None
                         except Exception as e:
                             response_parts.append(f"Error: {e}")
@@ -319,38 +1004,93 @@ class BaseLLM(ABC):
                                     summary = self._generic_llm_request(
                                         data["instruction"],
                                         raw_data,
+                                        use_cache=not data.get("no_cache"),
                                     )
                                     if summary:
                                         response_parts.append(summary)
                                         digests.append({"Q": data["instruction"], "A": summary})
                     finally:
                         # Flush new content before next action so QUERY result appears before UPDATE
-                        if len(response_parts) > prev_len:
-                            to_flush = "\n\n".join(response_parts[prev_len:])
-                            if to_flush.strip():
-                                dialog(to_flush)
+                        to_flush = "\n\n".join(response_parts[prev_len:])
+                        if to_flush.strip():
+                            dialog(to_flush)
+                        self._emit_progress(
+                            on_progress,
+                            {"stage": "action", "index": index, "action": action.get("name"), "response": to_flush},
+                        )
 
             if actions and digests:
                 response_for_history = "\n\n".join(d["A"] for d in digests)
             else:
                 response_for_history = message
-            entry = {"user_input": user_input, "response": response_for_history}
-            input_history.append(entry)
+            # Early results the final parse did not use (timeout, changed action) still get reported
+            ran = self._early_results(early)
+            if ran:
+                response_parts.append(ran)
+                response_for_history = f"{response_for_history}\n\n{ran}"
+                if actions:
+                    dialog(ran)
+            entries = [{"user_input": user_input, "response": response_for_history}]
             for fu in follow_up_results:
-                input_history.append({"follow_up_action": fu["action"], "response": fu["output"]})
-            if len(input_history) > 10:
-                input_history = input_history[-10:]
-            (self.workspace / "input_history.json").write_text(
-                json.dumps(input_history, indent=2), encoding="utf-8"
-            )
+                entries.append({"follow_up_action": fu["action"], "response": fu["output"]})
+            self._commit_history(entries)
 
             response = "\n\n".join(response_parts)
             # When we had actions and flushed incrementally, skip duplicate send to Console
             streamed_to_console = bool(actions)
             return (response, streamed_to_console)
 
-        except LLMResponseError as e:
-            return (f"(Parse error: {e})", False)
+        except (LLMResponseError, json.JSONDecodeError) as e:
+            return (self._with_early_results(f"(Parse error: {e})", user_input, early), False)
+
+    def _early_results(self, early: Optional[EarlyActionDispatcher]) -> str:
+        """What actions dispatched early but not used by the final parse did (parse error, timeout, changed
+        action list), so the user learns about work that already ran. Waits up to llm_timeout for each."""
+        parts = []
+        for action, future in early.unclaimed() if early else []:
+            try:
+                result = future.result(timeout=self._get_llm_timeout())
+                text = result.get("text") if isinstance(result, dict) else None
+                parts.append(f"Already ran {action['name']}: {text or 'done'}")
+            except Exception as e:
+                parts.append(f"Already ran {action['name']}: failed ({e})")
+        return "\n\n".join(parts)
+
+    def _with_early_results(self, text: str, user_input: str, early: Optional[EarlyActionDispatcher]) -> str:
+        """Error text plus unused early results; those are also committed to history."""
+        ran = self._early_results(early)
+        if not ran:
+            return text
+        self._commit_history([{"user_input": user_input, "response": ran}])
+        return f"{text}\n\n{ran}"
+
+    @staticmethod
+    def _emit_progress(on_progress: Optional[Callable[[dict], None]], frame: dict) -> None:
+        """Send a progress frame to the channel; a failing channel never breaks the turn."""
+        if on_progress is None:
+            return
+        try:
+            on_progress(frame)
+        except Exception as e:
+            debug_log(f"process_turn: on_progress failed {e!r}")
+
+    HISTORY_MAX_ENTRIES = 10
+    # With the rolling summary on, the background compactor shortens history; this cap only applies
+    # if it cannot keep up (e.g. the LLM is down)
+    HISTORY_MAX_UNSUMMARIZED = 30
+
+    def _commit_history(self, entries: list) -> None:
+        """Append this turn's entries to the history in one transaction, so turns running concurrently
+        do not overwrite each other's history, then start folding older entries into the rolling
+        summary in the background (llm.history_summary). Without it the last HISTORY_MAX_ENTRIES are kept."""
+        settings = summary_settings(self._get_config().get("llm", {}))
+        keep_last = self.HISTORY_MAX_UNSUMMARIZED if settings["enabled"] else self.HISTORY_MAX_ENTRIES
+        get_state_store(self.workspace).append_items(HISTORY, entries, keep_last=keep_last)
+        get_compactor(self.workspace).maybe_start(self, settings)
+
+    def record_turn(self, user_input: str, response: str) -> None:
+        """Add a turn answered outside process_turn (e.g. the intent router's fast path) to history."""
+        self._commit_history([{"user_input": user_input, "response": response}])
 
     def _format_chat_error(self, e: Exception) -> str:
         """Override in subclasses for provider-specific error messages."""
@@ -1,20 +1,20 @@
 """
-Channel commands: whoami, memory, soul, restart, schedule.
+Channel commands: whoami, memory, soul, restart, schedule, status.
 Logic lives here; channels call these and send the response to the user.
 """
-import json
 import os
 import sys
 from pathlib import Path
 from typing import List, Optional, Tuple
 
-from libs.scheduler import SCHEDULE_JSON
+from libs.state_store import SCHEDULE, get_state_store
 
 COMMANDS: List[Tuple[str, str]] = [
     ("whoami", "Show your chat ID"),
     ("memory", "Show current memory"),
     ("soul", "Show agent identity and beliefs"),
     ("schedule", "List all scheduled reminders"),
+    ("status", "Show LLM cache and runtime stats"),
     ("restart", "Restart the agent"),
 ]
 
@@ -34,15 +34,9 @@ def whoami(source: str, chat_id: Optional[int] = None) -> str:
 
 
 def memory(workspace: Path) -> str:
-    """Return formatted memory content from workspace/memory.json."""
-    path = workspace / "memory.json"
-    if not path.exists():
-        return "(No memory)"
+    """Return formatted memory content from the workspace state store."""
     try:
-        raw = path.read_text(encoding="utf-8").strip()
-        data = json.loads(raw) if raw else {}
-        if not isinstance(data, dict):
-            data = {}
+        data = get_state_store(workspace).memory()
         if not data:
             return "(Empty memory)"
         lines = [f"• {k}: {v}" for k, v in data.items()]
@@ -66,14 +60,9 @@ def soul(workspace: Path) -> str:
 
 
 def schedule(workspace: Path) -> str:
-    """Return formatted schedule list from workspace/schedule.json, sorted by datetime."""
-    path = workspace / SCHEDULE_JSON
-    if not path.exists():
-        return "Schedule (0 items):\n(No scheduled reminders)"
+    """Return formatted schedule list from the workspace state store, sorted by datetime."""
     try:
-        raw = path.read_text(encoding="utf-8").strip()
-        data = json.loads(raw) if raw else []
-        items = [i for i in (data if isinstance(data, list) else []) if isinstance(i, dict)]
+        items = [i for i in get_state_store(workspace).items(SCHEDULE) if isinstance(i, dict)]
         items.sort(key=lambda x: (x.get("datetime") or ""))
         if not items:
             return "Schedule (0 items):\n(No scheduled reminders)"
@@ -93,6 +82,49 @@ def schedule(workspace: Path) -> str:
         return f"Error reading schedule: {e}"
 
 
+def status(workspace: Path) -> str:
+    """Return runtime stats: turn engine, LLM dispatcher queues, LLM calls in flight, Headless gateway
+    queue-wait/handler times, history summary runs, intent router hits, model cascade escalation rate,
+    LLM cache hit/miss counts."""
+    from libs import model_cascade
+    from libs.base_llm import llm_call_stats
+    from libs.intent_router import current_router
+    from libs.llm_dispatcher import current_dispatcher
+    from libs.llm_cache import all_caches
+    from libs.turn_engine import current_engine
+
+    calls = llm_call_stats()
+    lines = [
+        "Status:",
+        "• LLM calls: in_flight={in_flight} draining={draining} started={started} completed={completed} "
+        "failed={failed} timed_out={timed_out} hedged={hedged} hedge_won={hedge_won}".format(**calls),
+    ]
+    engine = current_engine()
+    lines.append(f"• Turns: {engine.summary()}" if engine else "• Turns: (none yet)")
+    dispatcher = current_dispatcher()
+    lines.append(f"• LLM dispatcher: {dispatcher.summary()}" if dispatcher else "• LLM dispatcher: (no calls yet)")
+    pool_module = sys.modules.get("llm.ollama_pool.llm")  # only when the ollama_pool provider is in use
+    for pool in (pool_module.all_pools().values() if pool_module else []):
+        lines.append(f"• Ollama hosts: {pool.summary()}")
+    gateway_module = sys.modules.get("libs.response_client")  # only when the Headless channel runs
+    for client in (gateway_module.all_clients().values() if gateway_module else []):
+        lines.append(f"• Headless gateway: {client.summary()}")
+    summary_module = sys.modules.get("libs.history_summary")
+    for compactor in (summary_module.all_compactors().values() if summary_module else []):
+        lines.append(f"• History summary: {compactor.summary()}")
+    router = current_router()
+    lines.append(f"• Intent router: {router.summary()}" if router else "• Intent router: (no turns yet)")
+    cascade = model_cascade.summary()
+    if cascade:
+        lines.append(f"• Model cascade: {cascade}")
+    caches = all_caches()
+    if not caches:
+        lines.append("• LLM cache: (not used yet)")
+    for directory, cache in caches.items():
+        lines.append(f"• LLM cache: {cache.summary()}")
+    return "\n".join(lines)
+
+
 def restart(workspace: Path) -> str:
     """Return restart message. Call perform_restart() after sending to user."""
     return "Restarting agent..."
@@ -129,6 +161,8 @@ def run_command(
         return soul(workspace)
     if name == "schedule":
         return schedule(workspace)
+    if name == "status":
+        return status(workspace)
     if name == "restart":
         return restart(workspace)
     return None
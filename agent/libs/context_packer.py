@@ -0,0 +1,156 @@
+"""
+Token-budgeted context packing for prompts.
+Estimates tokens per prompt section and trims to a per-model budget by priority:
+oldest history entries first, then long history responses, then the rest of history,
+then optional sections (config llm.optional_sections, default ["memory"]).
+
+Config (config.json llm):
+  "context_budget": 6000                      or {"default": 6000, "llama3.1:8B": 4000}
+  "tokenizer": "estimate"                     or a name registered with register_tokenizer()
+  "token_estimate": {"chars_per_token": 4.0, "cjk_tokens_per_char": 1.0, "escape_tokens": 3.0}
+  "optional_sections": ["memory"]
+"""
+import math
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUDGET = 6000
+
+# CJK ideographs, kana, hangul and full-width forms: roughly one token (or more) per character
+CJK_RE = re.compile(r"[　-〿぀-ヿ㐀-䶿一-鿿가-힯＀-￯]")
+# \uXXXX escapes from json.dumps(ensure_ascii=True): several tokens each
+UNICODE_ESCAPE_RE = re.compile(r"\\u[0-9a-fA-F]{4}")
+
+
+class TokenEstimator:
+    """Calibrated token estimate without a tokenizer: ASCII by chars_per_token, CJK per character,
+    \\uXXXX escapes per escape. Calibrate against the model's real prompt_eval_count."""
+
+    def __init__(self, chars_per_token: float = 4.0, cjk_tokens_per_char: float = 1.0, escape_tokens: float = 3.0):
+        self.chars_per_token = max(float(chars_per_token), 0.5)
+        self.cjk_tokens_per_char = float(cjk_tokens_per_char)
+        self.escape_tokens = float(escape_tokens)
+
+    def __call__(self, text: str) -> int:
+        if not text:
+            return 0
+        escapes = len(UNICODE_ESCAPE_RE.findall(text))
+        cjk = len(CJK_RE.findall(text))
+        other = max(len(text) - cjk - escapes * 6, 0)
+        return math.ceil(
+            other / self.chars_per_token + cjk * self.cjk_tokens_per_char + escapes * self.escape_tokens
+        )
+
+
+_tokenizers: Dict[str, Callable[[str], int]] = {}
+
+
+def register_tokenizer(name: str, count_tokens: Callable[[str], int]) -> None:
+    """Register a real tokenizer (text -> token count) selectable with config llm.tokenizer."""
+    _tokenizers[name] = count_tokens
+
+
+def get_tokenizer(llm_cfg: dict) -> Callable[[str], int]:
+    """Tokenizer named by llm.tokenizer, or the calibrated estimator (llm.token_estimate)."""
+    name = llm_cfg.get("tokenizer", "estimate")
+    if name in _tokenizers:
+        return _tokenizers[name]
+    calibration = llm_cfg.get("token_estimate")
+    return TokenEstimator(**calibration) if isinstance(calibration, dict) else TokenEstimator()
+
+
+def context_budget(llm_cfg: dict, model: str) -> int:
+    """Prompt token budget for model: llm.context_budget as int or {model: int, "default": int}."""
+    budget = llm_cfg.get("context_budget", DEFAULT_BUDGET)
+    if isinstance(budget, dict):
+        budget = budget.get(model, budget.get("default", DEFAULT_BUDGET))
+    try:
+        return int(budget)
+    except (TypeError, ValueError):
+        return DEFAULT_BUDGET
+
+
+class ContextPacker:
+    """Fits prompt sections and history into a token budget. Token counts of unchanged sections are memoized."""
+
+    OMITTED = "(omitted to fit the context budget)"
+
+    def __init__(
+        self,
+        budget: int,
+        count_tokens: Callable[[str], int],
+        keep_recent: int = 2,
+        max_response_chars: int = 150,
+        optional_sections: Optional[List[str]] = None,
+    ):
+        self.budget = budget
+        self.count_tokens = count_tokens
+        self.keep_recent = keep_recent
+        self.max_response_chars = max_response_chars
+        self.optional_sections = optional_sections if optional_sections is not None else ["memory"]
+        self._memo: Dict[str, Tuple[str, int]] = {}
+
+    def _count(self, name: str, text: str) -> int:
+        cached = self._memo.get(name)
+        if cached and cached[0] is text:
+            return cached[1]
+        count = self.count_tokens(text)
+        self._memo[name] = (text, count)
+        return count
+
+    def pack(
+        self,
+        fixed_tokens: int,
+        sections: Dict[str, str],
+        history: list,
+        render_history: Callable[[list], str],
+    ) -> Tuple[Dict[str, str], list, Dict[str, int]]:
+        """Return (sections, history, token counts per section incl. fixed, history and total).
+        fixed_tokens: template text, user message and other parts that are never trimmed."""
+        sections = dict(sections)
+        counts = {name: self._count(name, text) for name, text in sections.items()}
+        history = [dict(e) if isinstance(e, dict) else e for e in history]
+
+        def history_tokens() -> int:
+            return self.count_tokens(render_history(history)) if history else 0
+
+        def total(h: int) -> int:
+            return fixed_tokens + sum(counts.values()) + h
+
+        h = history_tokens()
+        # 1. Oldest history entries first (keep the most recent few)
+        while total(h) > self.budget and len(history) > self.keep_recent:
+            history.pop(0)
+            h = history_tokens()
+        # 2. Long responses in the remaining entries, oldest first
+        if total(h) > self.budget:
+            for entry in history:
+                r = entry.get("response", "") if isinstance(entry, dict) else ""
+                if isinstance(r, str) and len(r) > self.max_response_chars:
+                    entry["response"] = r[: self.max_response_chars - 3] + "..."
+                    h = history_tokens()
+                    if total(h) <= self.budget:
+                        break
+        # 3. The rest of history, then optional sections in configured order
+        while total(h) > self.budget and history:
+            history.pop(0)
+            h = history_tokens()
+        for name in self.optional_sections:
+            if total(h) <= self.budget:
+                break
+            if name in sections and sections[name] != self.OMITTED:
+                sections[name] = self.OMITTED
+                counts[name] = self.count_tokens(self.OMITTED)
+
+        grand_total = total(h)
+        counts["fixed"] = fixed_tokens
+        counts["history"] = h
+        counts["total"] = grand_total
+        return sections, history, counts
+
+
+def format_counts(counts: Dict[str, int], budget: int) -> str:
+    """One log line: total/budget then per-section counts."""
+    parts = [f"{k}={v}" for k, v in counts.items() if k != "total"]
+    over = " (over budget)" if counts.get("total", 0) > budget else ""
+    return f"total={counts.get('total', 0)}/{budget}{over} " + " ".join(parts)
@@ -1,40 +1,22 @@
 """Utility to send prompts to Gemini via API bridge (Redis queues)."""
 
-import base64
-import binascii
 import json
-import time
+import threading
 from pathlib import Path
-from typing import Any, Optional
+from typing import Optional
 
 import redis
 
 from libs.debug_log import debug_log
+from libs.image_store import DEFAULT_MAX_BYTES, save_base64_images
+from libs.reply_demux import get_demux, new_request_id, reply_key
+from libs.artifact_store import get_artifact_store
 
 REDIS_URL = "redis://192.168.1.153:6379"
 PROMPT_QUEUE_IN = "GEMINI_PROMPT_IN"
 PROMPT_QUEUE_OUT = "GEMINI_PROMPT_OUT"
-
-
-def _save_first_multimodal_image(workspace: Path, images: list[Any]) -> Optional[Path]:
-    """Write the first base64 image from the bridge to workspace/output/images/download_<ms>.png."""
-    if not images:
-        return None
-    first = images[0]
-    if not isinstance(first, str) or not first.strip():
-        return None
-    try:
-        data = base64.standard_b64decode(first.strip())
-    except (ValueError, binascii.Error):
-        return None
-    if not data:
-        return None
-    out_dir = workspace / "output" / "images"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    ts = int(time.time() * 1000)
-    path = out_dir / f"download_{ts}.png"
-    path.write_bytes(data)
-    return path
+# Seconds per BLPOP wait; the cancel event is checked between waits
+CANCEL_POLL_S = 1
 
 
 def ask_gemini(
@@ -42,17 +24,24 @@ def ask_gemini(
     redis_url: str = REDIS_URL,
     options: Optional[list] = None,
     workspace: Optional[Path] = None,
+    cancel: Optional[threading.Event] = None,
+    max_image_bytes: int = DEFAULT_MAX_BYTES,
 ) -> str:
     """
-    Send prompt to GEMINI_PROMPT_IN, wait for response from GEMINI_PROMPT_OUT.
+    Send prompt to GEMINI_PROMPT_IN, wait for the response on GEMINI_PROMPT_OUT:<id> (the request's
+    reply_to list). Replies a bridge still pushes to GEMINI_PROMPT_OUT are moved there by ReplyDemux,
+    so concurrent calls (e.g. a turn and a summary) each get their own response.
     options: optional list of special instructions for the bridge.
-    workspace: if provided, store full response JSON to workspace/artifact.json.
+    workspace: if provided, store the full response JSON in the workspace artifact store.
     Returns the response text. Parses extension JSON: for text/json/xml/yaml/csv/html code-blocks,
     returns the structured content string only. For multimodal with images, if workspace is set,
-    decodes the first image to workspace/output/images/download_<timestamp>.png and returns the
-    text content plus a short [Image saved: …] line (no embedded base64). If workspace is omitted,
-    multimodal still returns the full JSON string so nothing is dropped.
+    decodes every image (chunked, up to max_image_bytes per response) to
+    workspace/output/images/<sha256>.<ext> (libs/image_store.py; duplicates are stored once) and
+    returns the text content plus one [Image saved: …] line per image (no embedded base64). If
+    workspace is omitted, multimodal still returns the full JSON string so nothing is dropped.
     Timeout is enforced by BaseLLM._chat_with_timeout for all providers.
+    cancel: set by the caller on timeout; the wait stops and {"id", "cancel": true} is pushed to
+    GEMINI_PROMPT_IN so the bridge can drop the request. A late response expires with its reply list.
     """
     if not prompt or not str(prompt).strip():
         raise ValueError("Prompt is empty")
@@ -63,29 +52,35 @@ def ask_gemini(
             f"GEMINI bridge: connected queue_in={PROMPT_QUEUE_IN} queue_out={PROMPT_QUEUE_OUT} "
             f"redis_hint={_redis_log_hint(redis_url)}"
         )
-        # Drain stale responses from previous requests (e.g. timeouts) so we get our response
-        drained = 0
-        while r.llen(PROMPT_QUEUE_OUT) > 0:
-            r.lpop(PROMPT_QUEUE_OUT)
-            drained += 1
-        if drained:
-            debug_log(f"GEMINI bridge: drained {drained} stale item(s) from {PROMPT_QUEUE_OUT}")
-        req_id = f"req_{int(time.time() * 1000)}"
-        payload = {"id": req_id, "prompt": prompt}
+        req_id = new_request_id()
+        reply_to = reply_key(PROMPT_QUEUE_OUT, req_id)
+        payload = {"id": req_id, "prompt": prompt, "reply_to": reply_to}
         if options and "RENEW_SESSION" in options:
             payload["option"] = "RENEW_SESSION"
         payload_json = json.dumps(payload, ensure_ascii=False)
-        r.lpush(PROMPT_QUEUE_IN, payload_json)
-        debug_log(
-            f"GEMINI bridge: LPUSH {PROMPT_QUEUE_IN} ok id={req_id} prompt_len={len(prompt)} "
-            f"payload_bytes={len(payload_json.encode('utf-8'))}"
-        )
-
-        _, raw = r.blpop(PROMPT_QUEUE_OUT)
+        demux = get_demux(redis_url, PROMPT_QUEUE_OUT)
+        demux.register(req_id)
+        try:
+            r.lpush(PROMPT_QUEUE_IN, payload_json)
+            debug_log(
+                f"GEMINI bridge: LPUSH {PROMPT_QUEUE_IN} ok id={req_id} prompt_len={len(prompt)} "
+                f"payload_bytes={len(payload_json.encode('utf-8'))}"
+            )
+            item = None
+            while item is None:
+                if cancel is not None and cancel.is_set():
+                    r.lpush(PROMPT_QUEUE_IN, json.dumps({"id": req_id, "cancel": True}))
+                    debug_log(f"GEMINI bridge: cancelled id={req_id}, cancel marker sent")
+                    return ""
+                item = r.blpop(reply_to, timeout=CANCEL_POLL_S)
+        finally:
+            demux.unregister(req_id)
+        _, raw = item
         s = raw.decode("utf-8") if isinstance(raw, bytes) else raw
         resp = json.loads(s)
+        del item, raw, s  # large multimodal payloads: keep only the parsed copy
         raw_response = resp.get("response", "")
-        debug_log(f"GEMINI bridge: BLPOP {PROMPT_QUEUE_OUT} ok id={resp.get('id', req_id)} response_len={len(str(raw_response))}")
+        debug_log(f"GEMINI bridge: BLPOP {reply_to} ok response_len={len(str(raw_response))}")
 
         # Parse JSON-encoded response from extension (text, json, xml, yaml, multimodal, …)
         content = raw_response
@@ -98,19 +93,19 @@ def ask_gemini(
             if isinstance(parsed, dict) and "content" in parsed:
                 if parsed.get("type") == "multimodal" and parsed.get("images"):
                     if workspace:
-                        saved = _save_first_multimodal_image(workspace, parsed["images"])
+                        saved, skipped = save_base64_images(workspace, parsed["images"], max_image_bytes)
                         if saved:
-                            rel = saved.relative_to(workspace).as_posix()
+                            rels = [p.relative_to(workspace).as_posix() for p in saved]
+                            lines = [f"[Image saved: {rel}]" for rel in rels]
+                            if skipped:
+                                lines.append(f"[{skipped} image(s) skipped: invalid or over the size limit]")
                             text_part = (parsed.get("content") or "").strip()
-                            content = (
-                                f"{text_part}\n\n[Image saved: {rel}]"
-                                if text_part
-                                else f"[Image saved: {rel}]"
-                            )
+                            content = "\n\n".join([text_part, "\n".join(lines)] if text_part else lines)
+                            # Drop the base64 strings now: only paths go to the artifact store
                             parsed = {
                                 **parsed,
-                                "images": [rel],
-                                "images_note": "first image written to workspace path above; base64 omitted",
+                                "images": rels,
+                                "images_note": "images written to the workspace paths above; base64 omitted",
                             }
                         else:
                             content = json.dumps(parsed, ensure_ascii=False)
@@ -121,16 +116,14 @@ def ask_gemini(
         except (json.JSONDecodeError, TypeError):
             pass
 
-        # Store full response to workspace/artifact.json
-        # Skip overwrite when content contains <tool_code> - LLM is delegating to tools, not final result.
-        # Preserve previous artifact so USE_ARTIFACT can access the last meaningful result.
+        # Store full response as the latest artifact (libs/artifact_store.py)
+        # Skip when content contains <tool_code> - LLM is delegating to tools, not final result.
+        # Keep the previous artifact latest so USE_ARTIFACT can access the last meaningful result.
         if workspace:
             content_str = content if isinstance(content, str) else json.dumps(content)
             if "<tool_code>" not in content_str.lower():
-                artifact_path = workspace / "artifact.json"
-                artifact_path.parent.mkdir(parents=True, exist_ok=True)
                 to_store = parsed if parsed is not None and isinstance(parsed, dict) else resp
-                artifact_path.write_text(json.dumps(to_store, indent=2, ensure_ascii=False), encoding="utf-8")
+                get_artifact_store(workspace).put(to_store, source="bridged_gemini")
 
         return content if isinstance(content, str) else json.dumps(content)
     except Exception as e:
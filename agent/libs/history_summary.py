@@ -0,0 +1,159 @@
+"""
+Rolling history summary: older turns are folded into a short summary by a background LLM call, off the
+turn path, so <user_input_history> stays small and the agent still knows what happened many turns ago.
+
+After a turn is committed, if history holds more than keep_recent + batch entries, a daemon thread
+summarizes the oldest ones (keeping the newest keep_recent) together with the previous summary at
+BACKGROUND priority (libs/llm_dispatcher.py), stores the new summary (state store list
+"history_summary", one record) and then removes the folded entries. If the LLM call fails the entries
+simply stay in history until the next attempt. The summary is shown as the first history entry.
+
+Off unless enabled (config_initial.json enables it for new installs). Config (config.json llm):
+  "history_summary": {"enabled": true, "keep_recent": 6, "batch": 4, "max_words": 200}
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from libs.debug_log import debug_log
+from libs.llm_dispatcher import BACKGROUND, llm_priority
+from libs.state_store import HISTORY, HISTORY_SUMMARY, get_state_store
+
+DEFAULTS = {"enabled": False, "keep_recent": 6, "batch": 4, "max_words": 200}
+SUMMARY_KEY = "earlier_turns_summary"  # key of the summary's pseudo-entry in history
+
+INSTRUCTION = (
+    "You keep a running summary of a conversation between a user and an assistant (SafeClaw). "
+    "Update the summary with the new turns below. Keep facts, names, dates, decisions, requests and "
+    "open tasks; drop greetings and small talk. Write plain sentences, at most {max_words} words. "
+    "Reply with the updated summary only."
+)
+
+_compactors: Dict[Path, "HistoryCompactor"] = {}
+_compactors_lock = threading.Lock()
+
+
+def summary_settings(llm_cfg: dict) -> dict:
+    """llm.history_summary merged over DEFAULTS (invalid numbers fall back to the default)."""
+    cfg = llm_cfg.get("history_summary", {}) if isinstance(llm_cfg, dict) else {}
+    cfg = cfg if isinstance(cfg, dict) else {}
+    settings = dict(DEFAULTS)
+    settings["enabled"] = bool(cfg.get("enabled", DEFAULTS["enabled"]))
+    for key in ("keep_recent", "batch", "max_words"):
+        try:
+            settings[key] = max(1, int(cfg.get(key, DEFAULTS[key])))
+        except (TypeError, ValueError):
+            pass
+    return settings
+
+
+def summary_entry(workspace: Path) -> Optional[dict]:
+    """History pseudo-entry {SUMMARY_KEY: text} for the stored summary, or None."""
+    records = get_state_store(workspace).items(HISTORY_SUMMARY)
+    text = records[-1].get("summary") if records and isinstance(records[-1], dict) else None
+    return {SUMMARY_KEY: text} if text else None
+
+
+class HistoryCompactor:
+    """Runs at most one compaction at a time for a workspace."""
+
+    def __init__(self, workspace: Path):
+        self.workspace = Path(workspace)
+        self._running = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"runs": 0, "failed": 0, "folded": 0, "last_ms": 0}
+
+    def maybe_start(self, llm, settings: dict) -> bool:
+        """Start a background compaction if history is long enough and none is running."""
+        if not settings["enabled"]:
+            return False
+        if len(get_state_store(self.workspace).items(HISTORY)) <= settings["keep_recent"] + settings["batch"]:
+            return False
+        if not self._running.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._run, args=(llm, settings), name="history-summary", daemon=True).start()
+        return True
+
+    def _run(self, llm, settings: dict) -> None:
+        started = time.perf_counter()
+        try:
+            with llm_priority(BACKGROUND):
+                folded = self.compact(llm, settings)
+            with self._stats_lock:
+                self.stats["runs"] += 1
+                if folded:
+                    self.stats["folded"] += folded
+                else:
+                    self.stats["failed"] += 1
+                self.stats["last_ms"] = int((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            debug_log(f"history_summary: compaction failed {e!r}")
+            with self._stats_lock:
+                self.stats["failed"] += 1
+        finally:
+            self._running.release()
+
+    def compact(self, llm, settings: dict) -> int:
+        """Fold all but the newest keep_recent entries into the summary. Returns entries folded (0 if the
+        LLM gave no usable summary; history is then left as is)."""
+        store = get_state_store(self.workspace)
+        entries = store.items(HISTORY)
+        fold = entries[:max(0, len(entries) - settings["keep_recent"])]
+        if not fold:
+            return 0
+        records = store.items(HISTORY_SUMMARY)
+        previous = records[-1] if records and isinstance(records[-1], dict) else {}
+        data = {"summary_so_far": previous.get("summary", ""), "new_turns": fold}
+        out = llm.request(
+            INSTRUCTION.format(max_words=settings["max_words"]),
+            json.dumps(data, ensure_ascii=False),
+            use_cache=False,
+        )
+        if not out or out.startswith(llm.TIMEOUT_MARKER):
+            debug_log(f"history_summary: no summary from LLM, {len(fold)} entries kept")
+            return 0
+        record = {
+            "summary": out.strip(),
+            "entries": int(previous.get("entries", 0)) + len(fold),
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        }
+        # Summary first: a crash in between only re-folds these entries next time
+        store.replace(HISTORY_SUMMARY, [record])
+        remaining = list(fold)
+
+        def folded(entry) -> bool:
+            if entry in remaining:
+                remaining.remove(entry)
+                return True
+            return False
+
+        taken = store.take_items(HISTORY, folded, limit=len(fold))
+        debug_log(f"history_summary: folded {len(taken)} entries (summary covers {record['entries']})")
+        return len(taken)
+
+    def summary(self) -> str:
+        records = get_state_store(self.workspace).items(HISTORY_SUMMARY)
+        record = records[-1] if records and isinstance(records[-1], dict) else {}
+        with self._stats_lock:
+            s = dict(self.stats)
+        return (
+            f"covers {record.get('entries', 0)} entries (updated {record.get('updated', '-')}), "
+            f"runs={s['runs']} failed={s['failed']} folded={s['folded']} last={s['last_ms']}ms"
+        )
+
+
+def get_compactor(workspace: Path) -> HistoryCompactor:
+    workspace = Path(workspace).resolve()
+    compactor = _compactors.get(workspace)
+    if compactor is None:
+        with _compactors_lock:
+            compactor = _compactors.setdefault(workspace, HistoryCompactor(workspace))
+    return compactor
+
+
+def all_compactors() -> Dict[Path, HistoryCompactor]:
+    """Compactors started in this process (for /status)."""
+    return dict(_compactors)
@@ -0,0 +1,126 @@
+"""
+Content-addressed image storage for base64 images (multimodal bridge responses).
+Each image is decoded in chunks straight to a temp file while its SHA-256 is computed, then renamed to
+workspace/output/images/<sha256>.<ext>. The same image returned twice is stored once, and decoded bytes
+are never held in memory as a whole. A per-response byte cap stops oversized payloads mid-decode.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from libs.debug_log import debug_log
+
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024  # decoded bytes per response
+CHUNK_CHARS = 64 * 1024  # base64 characters decoded per step (multiple of 4)
+
+_WHITESPACE = re.compile(r"\s+")
+_DATA_URL = re.compile(r"^data:image/[\w.+-]+;base64,", re.IGNORECASE)
+_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
+class ImageTooLarge(Exception):
+    """Decoded image would exceed the remaining byte budget."""
+
+
+def _extension(head: bytes) -> str:
+    for magic, ext in _MAGIC:
+        if head.startswith(magic):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return "png"  # what the bridge sends; kept as the default name
+
+
+def _decode_to_file(b64: str, fh, limit: int) -> Tuple[str, str, int]:
+    """Decode b64 in CHUNK_CHARS steps into fh. Returns (sha256 hex, extension, size).
+    Raises ImageTooLarge past limit bytes, binascii.Error on invalid base64."""
+    match = _DATA_URL.match(b64)
+    start = match.end() if match else 0
+    hasher = hashlib.sha256()
+    head = b""
+    size = 0
+    carry = ""
+    for pos in range(start, len(b64), CHUNK_CHARS):
+        piece = carry + _WHITESPACE.sub("", b64[pos:pos + CHUNK_CHARS])
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        if not usable:
+            continue
+        data = base64.b64decode(piece[:usable], validate=True)
+        size += len(data)
+        if size > limit:
+            raise ImageTooLarge(f"{size} > {limit} bytes")
+        if len(head) < 16:
+            head += data[:16 - len(head)]
+        hasher.update(data)
+        fh.write(data)
+    if carry:  # unpadded tail
+        data = base64.b64decode(carry + "=" * (-len(carry) % 4), validate=True)
+        size += len(data)
+        if size > limit:
+            raise ImageTooLarge(f"{size} > {limit} bytes")
+        head += data[:16]
+        hasher.update(data)
+        fh.write(data)
+    return hasher.hexdigest(), _extension(head), size
+
+
+def save_base64_image(out_dir: Path, b64: str, limit: int = DEFAULT_MAX_BYTES) -> Optional[Tuple[Path, int]]:
+    """Store one base64 image under out_dir/<hash>.<ext>. Returns (path, decoded size) or None if the
+    data is empty or not base64. Raises ImageTooLarge past limit bytes (nothing is kept)."""
+    if not isinstance(b64, str) or not b64.strip():
+        return None
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tmp = out_dir / f".incoming.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            digest, ext, size = _decode_to_file(b64, fh, limit)
+        if size == 0:
+            return None
+        path = out_dir / f"{digest}.{ext}"
+        if path.exists():
+            debug_log(f"image_store: duplicate image {path.name} ({size} bytes), stored once")
+        else:
+            os.replace(tmp, path)
+        return path, size
+    except (ValueError, binascii.Error):
+        return None
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def save_base64_images(
+    workspace: Path, images: List[Any], max_bytes: int = DEFAULT_MAX_BYTES
+) -> Tuple[List[Path], int]:
+    """Store every base64 image of one response under workspace/output/images/.
+    max_bytes caps the decoded total. Returns (unique paths in order, number of images skipped:
+    invalid or over the cap)."""
+    out_dir = workspace / "output" / "images"
+    saved: List[Path] = []
+    skipped = 0
+    remaining = max_bytes
+    for b64 in images or []:
+        try:
+            result = save_base64_image(out_dir, b64, remaining)
+        except ImageTooLarge as e:
+            debug_log(f"image_store: image skipped, response image cap reached ({e})")
+            skipped += 1
+            continue
+        if result is None:
+            skipped += 1
+            continue
+        path, size = result
+        remaining -= size
+        if path not in saved:
+            saved.append(path)
+    return saved, skipped
@@ -0,0 +1,258 @@
+"""
+Fast-path intent router: common, structured requests are answered without an LLM call.
+BaseAgent.process() asks the router first. A rule matches the whole message (case-insensitive, trailing
+punctuation removed) and yields either a direct reply or an agent action with params, plus a confidence.
+A match at or above min_confidence is executed right away (ActionExecutor) and recorded in history like
+a normal turn; anything else goes to the LLM as before. Off unless enabled; scheduled prompts
+(source Schedule) never take the fast path.
+
+Built-in intents: time (current date/time), remind_in ("remind me in 5 mins to ..."), delete_at
+("delete the 17:00 reminder", only when exactly one item is at that time), list_schedule.
+Config (config.json):
+  "intent_router": {"enabled": true, "min_confidence": 0.9, "disabled": ["time"],
+                    "intents": [{"name": "hn", "pattern": "open hacker news", "action": "_BROWSER_VISION",
+                                 "params": {"url": "https://news.ycombinator.com"}, "confidence": 0.95},
+                                {"name": "hello", "pattern": "(hi|hello)", "reply": "Hi! How can I help?"}]}
+Custom intents: "pattern" is a regex for the whole message; string params and "reply" may use its named
+groups ({name}); "action" must be an agent ability (router actions need the LLM to summarize results).
+Hit counts: /status.
+"""
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from libs.debug_log import debug_log
+from libs.logger import log
+from libs.state_store import SCHEDULE, get_state_store
+
+DEFAULT_MIN_CONFIDENCE = 0.9
+
+# A rule returns (plan, confidence) or None. plan: {"reply": text} or {"action": name, "params": {...}}
+Rule = Callable[[re.Match, Path], Optional[Tuple[dict, float]]]
+
+_router: Optional["IntentRouter"] = None
+_router_lock = threading.Lock()
+
+_UNIT = r"(min(?:ute)?s?|hours?)"
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip()).rstrip(" .!?")
+
+
+def _time(match: re.Match, workspace: Path) -> Tuple[dict, float]:
+    now = datetime.now()
+    return {"reply": f"It is {now.strftime('%a %Y-%m-%d %H:%M')}."}, 0.99
+
+
+def _remind_in(match: re.Match, workspace: Path) -> Optional[Tuple[dict, float]]:
+    from ability.add_schedule.action import AddScheduleAction
+
+    groups = match.groupdict()
+    minutes = AddScheduleAction._parse_relative_minutes(f"in {groups['amount']} {groups['unit']}")
+    message = (groups.get("message") or "").strip()
+    if minutes is None or not message:
+        return None
+    params = {"type": "reminder", "relative_minutes": minutes, "datetime": "", "data": {"message": message}}
+    return {"action": "_ADD_SCHEDULE", "params": params}, 0.95
+
+
+def _delete_at(match: re.Match, workspace: Path) -> Tuple[dict, float]:
+    hour, minute = (match.group("time") or match.group("time2")).split(":")
+    hhmm = f"{int(hour):02d}:{minute}"
+    items = [
+        i for i in get_state_store(workspace).items(SCHEDULE)
+        if isinstance(i, dict) and str(i.get("datetime", "")).endswith(f" {hhmm}")
+    ]
+    if len(items) != 1:  # none or ambiguous: let the LLM ask or explain
+        return {}, 0.0
+    return {"action": "_DELETE_SCHEDULE", "params": {"datetime": items[0]["datetime"]}}, 0.95
+
+
+def _list_schedule(match: re.Match, workspace: Path) -> Tuple[dict, float]:
+    from libs.command import schedule
+
+    return {"reply": schedule(workspace)}, 0.95
+
+
+BUILTIN_RULES: List[Tuple[str, str, Rule]] = [
+    (
+        "time",
+        r"(what time is it|what(?:'s| is) the (?:time|date)|what day is (?:it|today)|what(?:'s| is) today'?s date)"
+        r"(?: now| today)?",
+        _time,
+    ),
+    (
+        "remind_in",
+        rf"remind me (?:in|after) (?P<amount>\d+) ?(?P<unit>{_UNIT}) (?:to |that |about )?(?P<message>.+)",
+        _remind_in,
+    ),
+    (
+        "remind_in",
+        rf"remind me (?:to |that |about )?(?P<message>.+?) (?:in|after) (?P<amount>\d+) ?(?P<unit>{_UNIT})",
+        _remind_in,
+    ),
+    (
+        "delete_at",
+        r"(?:delete|cancel|remove) (?:the |my )?(?:(?P<time>\d{1,2}:\d{2}) reminder"
+        r"|reminder (?:at|for) (?P<time2>\d{1,2}:\d{2}))",
+        _delete_at,
+    ),
+    (
+        "list_schedule",
+        r"(?:show|list|what are) (?:me )?(?:my |all )?(?:reminders|schedule|scheduled items)",
+        _list_schedule,
+    ),
+]
+
+
+def _custom_rule(spec: dict) -> Rule:
+    """Rule for a config intent: fixed reply or agent action, {group} placeholders filled from the match."""
+    confidence = float(spec.get("confidence", 1.0))
+
+    def fill(value: Any, groups: dict) -> Any:
+        if isinstance(value, str):
+            return value.format(**groups)
+        if isinstance(value, dict):
+            return {k: fill(v, groups) for k, v in value.items()}
+        if isinstance(value, list):
+            return [fill(v, groups) for v in value]
+        return value
+
+    def rule(match: re.Match, workspace: Path) -> Optional[Tuple[dict, float]]:
+        groups = {k: (v or "").strip() for k, v in match.groupdict().items()}
+        try:
+            if "reply" in spec:
+                return {"reply": fill(spec["reply"], groups)}, confidence
+            return {"action": spec["action"], "params": fill(spec.get("params", {}), groups)}, confidence
+        except (KeyError, IndexError, ValueError) as e:
+            debug_log(f"intent_router: intent {spec.get('name')!r} params failed {e!r}")
+            return None
+
+    return rule
+
+
+class IntentRouter:
+    """Rules tried in order (custom intents first, then built-ins); the first confident match wins."""
+
+    def __init__(self, config: dict):
+        cfg = config.get("intent_router", {}) if isinstance(config, dict) else {}
+        cfg = cfg if isinstance(cfg, dict) else {}
+        self.enabled = bool(cfg.get("enabled", False))
+        try:
+            self.min_confidence = float(cfg.get("min_confidence", DEFAULT_MIN_CONFIDENCE))
+        except (TypeError, ValueError):
+            self.min_confidence = DEFAULT_MIN_CONFIDENCE
+        disabled = set(cfg.get("disabled", []) or [])
+        self.rules: List[Tuple[str, re.Pattern, Rule]] = []
+        for spec in cfg.get("intents", []) or []:
+            self._add_custom(spec)
+        for name, pattern, rule in BUILTIN_RULES:
+            if name not in disabled:
+                self.rules.append((name, re.compile(pattern, re.IGNORECASE), rule))
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"checked": 0, "hits": 0, "below_threshold": 0, "by_intent": {}}
+
+    def _add_custom(self, spec: Any) -> None:
+        from ability import get_action_class
+
+        if not isinstance(spec, dict) or not spec.get("pattern") or not ("reply" in spec or spec.get("action")):
+            log(f"Intent router: ignored intent {spec!r} (needs pattern and reply or action)")
+            return
+        if "reply" not in spec and get_action_class(spec["action"]) is None:
+            log(f"Intent router: ignored intent {spec.get('name')!r} ({spec['action']} is not an agent ability)")
+            return
+        try:
+            pattern = re.compile(spec["pattern"], re.IGNORECASE)
+        except re.error as e:
+            log(f"Intent router: ignored intent {spec.get('name')!r} (bad pattern: {e})")
+            return
+        self.rules.append((str(spec.get("name") or spec["pattern"]), pattern, _custom_rule(spec)))
+
+    def match(self, user_input: str, workspace: Path) -> Optional[Tuple[str, dict, float]]:
+        """(intent name, plan, confidence) of the first confident match, or None (use the LLM)."""
+        if not self.enabled:
+            return None
+        text = _normalize(user_input)
+        with self._lock:
+            self.stats["checked"] += 1
+        for name, pattern, rule in self.rules:
+            m = pattern.fullmatch(text)
+            if not m:
+                continue
+            result = rule(m, workspace)
+            if result is None:
+                continue
+            plan, confidence = result
+            if confidence >= self.min_confidence and plan:
+                with self._lock:
+                    self.stats["hits"] += 1
+                    self.stats["by_intent"][name] = self.stats["by_intent"].get(name, 0) + 1
+                return name, plan, confidence
+            with self._lock:
+                self.stats["below_threshold"] += 1
+            debug_log(f"intent_router: {name} matched below threshold ({confidence:.2f})")
+        return None
+
+    def execute(self, plan: dict, workspace: Path) -> str:
+        """Reply text for a matched plan: the reply itself, or the action's result text."""
+        if "reply" in plan:
+            return plan["reply"]
+        from libs.action_executor import ActionExecutor
+
+        try:
+            result = ActionExecutor(plan["action"], plan.get("params", {}), workspace=workspace).execute()
+        except Exception as e:
+            return f"Error: {e}"
+        if not isinstance(result, dict):
+            return "Action failed: no result."
+        parts = [result["text"]] if result.get("text") else []
+        if "follow_up" in result:
+            fu = result["follow_up"]
+            try:
+                out = ActionExecutor(fu["name"], fu["params"], workspace=workspace).execute()
+                parts.append(out.get("output", str(out)))
+            except Exception as e:
+                parts.append(f"Error: {e}")
+        return "\n\n".join(parts) or "Done."
+
+    def summary(self) -> str:
+        with self._lock:
+            s = dict(self.stats)
+            by_intent = dict(s["by_intent"])
+        rate = f"{100 * s['hits'] / s['checked']:.0f}%" if s["checked"] else "-"
+        intents = " ".join(f"{k}={v}" for k, v in sorted(by_intent.items()))
+        return f"hits={s['hits']}/{s['checked']} ({rate}) below_threshold={s['below_threshold']} {intents}".rstrip()
+
+
+def get_intent_router(config: Optional[dict] = None) -> IntentRouter:
+    """Shared router, built on first use from config.json intent_router."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = IntentRouter(config or {})
+    return _router
+
+
+def current_router() -> Optional[IntentRouter]:
+    """Router of this process, or None before the first turn (for /status)."""
+    return _router
+
+
+def fast_path(agent, user_input: str) -> Optional[str]:
+    """Answer user_input without the LLM if a rule matches confidently; None otherwise. Records the turn
+    in history (BaseLLM.record_turn) and logs the intent and latency to system.log."""
+    started = time.perf_counter()
+    hit = get_intent_router(agent.config).match(user_input, agent.WORKSPACE)
+    if hit is None:
+        return None
+    name, plan, confidence = hit
+    response = get_intent_router().execute(plan, agent.WORKSPACE)
+    agent._llm.record_turn(user_input, response)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    log(f"Intent router: {name} ({confidence:.2f}) -> {plan.get('action', 'reply')} in {elapsed_ms:.0f}ms")
+    return response
@@ -0,0 +1,192 @@
+"""
+LLM result cache: content-addressed, keyed on provider, model, instruction and normalized data.
+Two tiers: in-memory LRU, and JSON files under workspace/llm_cache/ with a size budget and TTL.
+Used by BaseLLM.cached_request (router summaries, _LLM_SUMMARY). Config (config.json):
+  "llm_cache": {"enabled": true, "memory_items": 256, "disk_mb": 50, "ttl_hours": 168}
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from libs.debug_log import debug_log
+
+CACHE_DIR_NAME = "llm_cache"
+
+_caches: Dict[Path, "LLMCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def _normalize_data(data: Any) -> str:
+    """Stable text for data: JSON with sorted keys for dict/list, whitespace-collapsed text otherwise."""
+    if data is None:
+        return ""
+    if isinstance(data, (dict, list)):
+        return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return re.sub(r"\s+", " ", str(data)).strip()
+
+
+def make_key(provider: str, model: str, instruction: str, data: Any = None) -> str:
+    """sha256 over provider, model, instruction and sha256 of normalized data."""
+    data_hash = hashlib.sha256(_normalize_data(data).encode("utf-8")).hexdigest()
+    raw = json.dumps([provider, model, (instruction or "").strip(), data_hash], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """In-memory LRU in front of a file store. Thread-safe."""
+
+    def __init__(self, directory: Path, memory_items: int = 256, disk_bytes: int = 50 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.directory = directory
+        self.memory_items = max(0, int(memory_items))
+        self.disk_bytes = max(0, int(disk_bytes))
+        self.ttl_seconds = float(ttl_seconds)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_size: Optional[int] = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+        path = self._path(key)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+            created, value = float(record["created"]), record["value"]
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        if self._expired(created):
+            self._remove_file(path)
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, created, value)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+            self.stats["writes"] += 1
+        if self.disk_bytes <= 0:
+            return
+        path = self._path(key)
+        data = json.dumps({"created": created, "value": value}, ensure_ascii=False).encode("utf-8")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            debug_log(f"LLM cache: write failed {e!r}")
+            return
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += len(data)
+        self._enforce_budget()
+
+    def _remember(self, key: str, created: float, value: str) -> None:
+        """Insert into the memory tier (caller holds the lock)."""
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _remove_file(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size -= size
+
+    def _enforce_budget(self) -> None:
+        """Drop expired files, then oldest files until the disk tier fits disk_bytes."""
+        with self._lock:
+            if self._disk_size is not None and self._disk_size <= self.disk_bytes:
+                return
+        files = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for mtime, size, path in files:
+            if total <= self.disk_bytes and not self._expired(mtime):
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_size = total
+            self.stats["evictions"] += evicted
+
+    def summary(self) -> str:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        rate = f"{hits / lookups:.0%}" if lookups else "n/a"
+        return (
+            f"hits={hits} (memory={self.stats['memory_hits']}, disk={self.stats['disk_hits']}) "
+            f"misses={self.stats['misses']} hit_rate={rate} writes={self.stats['writes']} "
+            f"evictions={self.stats['evictions']}"
+        )
+
+
+def get_cache(workspace: Path, config: Optional[dict] = None) -> Optional[LLMCache]:
+    """Shared cache for workspace, or None if disabled (config llm_cache.enabled = false)."""
+    cfg = (config or {}).get("llm_cache", {})
+    if not isinstance(cfg, dict) or not cfg.get("enabled", True):
+        return None
+    directory = Path(workspace) / CACHE_DIR_NAME
+    cache = _caches.get(directory)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(directory)
+            if cache is None:
+                cache = LLMCache(
+                    directory,
+                    memory_items=cfg.get("memory_items", 256),
+                    disk_bytes=float(cfg.get("disk_mb", 50)) * 1024 * 1024,
+                    ttl_seconds=float(cfg.get("ttl_hours", 168)) * 3600,
+                )
+                _caches[directory] = cache
+    return cache
+
+
+def all_caches() -> Dict[Path, LLMCache]:
+    """Caches created in this process (for /status)."""
+    return dict(_caches)
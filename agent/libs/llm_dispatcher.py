@@ -0,0 +1,126 @@
+"""
+Central LLM dispatcher: every BaseLLM call takes a slot here before it reaches the provider.
+Limits parallel LLM calls to what the backend can serve (config llm_dispatch.parallel) and hands free
+slots out by priority class: interactive > follow-up > scheduled > background. Waiting calls age
+(one class up per llm_dispatch.aging_s seconds) so background work is never starved.
+
+The class of a call comes from the calling thread's context (llm_priority); the agent sets it per turn
+(Schedule source -> scheduled) and around action follow-ups. Config (config.json):
+  "llm_dispatch": {"parallel": 1, "aging_s": 30}
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INTERACTIVE = 0
+FOLLOW_UP = 1
+SCHEDULED = 2
+BACKGROUND = 3
+CLASS_NAMES = {INTERACTIVE: "interactive", FOLLOW_UP: "follow_up", SCHEDULED: "scheduled", BACKGROUND: "background"}
+
+_context = threading.local()
+
+
+def current_priority() -> int:
+    """Priority class of LLM calls made on this thread (default interactive)."""
+    return getattr(_context, "priority", INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """Run the block's LLM calls at priority. Never raises priority: a follow-up inside a scheduled
+    turn stays scheduled."""
+    previous = current_priority()
+    _context.priority = max(previous, priority)
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+class LLMDispatcher:
+    """Priority slots for LLM calls. acquire() blocks until a slot is free and this call is next."""
+
+    def __init__(self, parallel: int = 1, aging_s: float = 30.0):
+        self.parallel = max(1, int(parallel))
+        self.aging_s = max(float(aging_s), 0.001)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._seq = itertools.count()
+        self._waiting: List[Tuple[int, int, float]] = []  # (seq, priority, enqueued_at)
+        self.stats: Dict[int, Dict[str, float]] = {
+            p: {"calls": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0} for p in CLASS_NAMES
+        }
+
+    def _effective(self, entry: Tuple[int, int, float], now: float) -> Tuple[float, int]:
+        seq, priority, enqueued_at = entry
+        return (priority - (now - enqueued_at) / self.aging_s, seq)
+
+    def acquire(self, priority: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Wait for a slot. Returns False if timeout (seconds) passed first."""
+        priority = current_priority() if priority is None else priority
+        entry = (next(self._seq), priority, time.monotonic())
+        deadline = None if timeout is None else entry[2] + timeout
+        with self._cond:
+            self._waiting.append(entry)
+            while True:
+                now = time.monotonic()
+                if self._active < self.parallel and min(self._waiting, key=lambda e: self._effective(e, now)) is entry:
+                    break
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(entry)
+                    self._cond.notify_all()
+                    return False
+                # Re-check periodically: aging can change the order without a release
+                self._cond.wait(timeout=min(remaining, 1.0) if remaining is not None else 1.0)
+            self._waiting.remove(entry)
+            self._active += 1
+            wait_ms = (time.monotonic() - entry[2]) * 1000
+            s = self.stats[priority]
+            s["calls"] += 1
+            s["wait_ms_total"] += wait_ms
+            s["wait_ms_max"] = max(s["wait_ms_max"], wait_ms)
+            self._cond.notify_all()
+        return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._active = max(0, self._active - 1)
+            self._cond.notify_all()
+
+    def summary(self) -> str:
+        with self._cond:
+            parts = [f"parallel={self.parallel} active={self._active} waiting={len(self._waiting)}"]
+            for p, name in CLASS_NAMES.items():
+                s = self.stats[p]
+                if s["calls"]:
+                    avg = s["wait_ms_total"] / s["calls"]
+                    parts.append(f"{name}: calls={s['calls']:.0f} wait_avg={avg:.0f}ms wait_max={s['wait_ms_max']:.0f}ms")
+        return "; ".join(parts)
+
+
+_dispatcher: Optional[LLMDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(config: Optional[dict] = None) -> LLMDispatcher:
+    """Process-wide dispatcher, created on first use from config.json llm_dispatch."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                cfg = (config or {}).get("llm_dispatch", {})
+                cfg = cfg if isinstance(cfg, dict) else {}
+                try:
+                    _dispatcher = LLMDispatcher(cfg.get("parallel", 1), cfg.get("aging_s", 30))
+                except (TypeError, ValueError):
+                    _dispatcher = LLMDispatcher()
+    return _dispatcher
+
+
+def current_dispatcher() -> Optional[LLMDispatcher]:
+    """Dispatcher of this process, or None before the first LLM call (for /status)."""
+    return _dispatcher
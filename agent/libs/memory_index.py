@@ -0,0 +1,79 @@
+"""
+Memory index: the prompt gets the memory entries most relevant to the turn (BM25 top-k, libs/text_index.py)
+plus pinned keys, not all of memory, so prompt size stays flat as memory grows. While memory holds no more
+than top_k + pinned entries, all of it is shown (as before).
+
+The index follows the state store: after a memory write (e.g. _MEMORY_WRITE) only keys whose value changed
+are re-indexed. Config (config.json llm):
+  "memory": {"top_k": 8, "pinned": ["name"]}
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from libs.debug_log import debug_log
+from libs.state_store import MEMORY, StateStore, get_state_store
+from libs.text_index import BM25Index
+
+DEFAULT_TOP_K = 8
+
+_indexes: Dict[Path, "MemoryIndex"] = {}
+_indexes_lock = threading.Lock()
+
+
+def _entry_text(key: str, value: Any) -> str:
+    """Indexed text of one entry: key and value (strings as is, other values as JSON)."""
+    return f"{key} {value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)}"
+
+
+class MemoryIndex:
+    """BM25 index over the memory entries of one state store."""
+
+    def __init__(self, store: StateStore):
+        self._store = store
+        self._index = BM25Index()
+        self._texts: Dict[str, str] = {}
+        self._memory: Dict[str, Any] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def sync(self) -> Dict[str, Any]:
+        """Re-index entries changed since the last sync (none if memory was not written). Returns memory."""
+        with self._lock:
+            version = self._store.version(MEMORY)
+            if version == self._version:
+                return self._memory
+            memory = self._store.memory()
+            texts = {key: _entry_text(key, value) for key, value in memory.items()}
+            for key in self._texts.keys() - texts.keys():
+                self._index.remove(key)
+            changed = [key for key, text in texts.items() if self._texts.get(key) != text]
+            for key in changed:
+                self._index.add(key, texts[key])
+            self._texts, self._memory, self._version = texts, memory, version
+        if changed:
+            debug_log(f"memory_index: re-indexed {len(changed)} of {len(memory)} entries")
+        return memory
+
+    def select(self, query: str, top_k: int = DEFAULT_TOP_K, pinned: Iterable[str] = ()) -> Dict[str, Any]:
+        """Pinned keys plus the top_k entries most relevant to query, in memory order.
+        All of memory while it has no more than top_k + len(pinned) entries."""
+        memory = self.sync()
+        pinned = [key for key in pinned if key in memory]
+        if len(memory) <= top_k + len(pinned):
+            return memory
+        with self._lock:
+            hits = self._index.search(query, top_k)
+        keys = set(pinned) | {key for key, _ in hits}
+        return {key: value for key, value in memory.items() if key in keys}
+
+
+def get_memory_index(workspace: Path) -> MemoryIndex:
+    """Shared index for the workspace's state store."""
+    workspace = Path(workspace).resolve()
+    index = _indexes.get(workspace)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(workspace, MemoryIndex(get_state_store(workspace)))
+    return index
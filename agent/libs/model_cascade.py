@@ -0,0 +1,117 @@
+"""
+Cascaded model routing: a small model answers first, the configured llm.model only when needed.
+The LLM from get_llm() is the large model. With llm.cascade set, process_turn() sends the turn's prompt
+to the small model first (not streamed, no early dispatch, since its answer may be discarded) and
+escalates to the large model when:
+  - the message is longer than max_input_chars (large model directly, small never called)
+  - the small model times out, fails or returns nothing
+  - its output fails _parse_response (including invalid <tool_code> JSON)
+  - it calls an action that is not in agent_action.json / router_action.json or lacks params
+  - it calls one of escalate_actions (e.g. router actions whose results need the large model)
+Action-result summaries and one-shot requests (_generic_llm_request, BaseLLM.request, e.g. _LLM_SUMMARY)
+use the small model while their data is at most max_data_chars. The small entry may set its own host,
+keep_alive and options (else the top-level llm values apply). Each decision is logged to system.log; escalation rates are in /status.
+
+Config (config.json llm):
+  "cascade": {"enabled": true, "small": {"provider": "ollama", "model": "llama3.2:3b", "host": "http://small:11434"},
+              "max_input_chars": 1500, "max_data_chars": 6000, "escalate_actions": ["_BROWSER_VISION"]}
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from libs.tool_selector import ACTION_FILES, read_actions
+
+DEFAULTS = {"enabled": True, "max_input_chars": 1500, "max_data_chars": 6000, "escalate_actions": []}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {
+    "turns": 0, "small": 0, "escalated": 0, "direct": 0, "summaries_small": 0, "summaries_large": 0, "reasons": {},
+}
+
+
+def cascade_settings(llm_cfg: dict) -> Optional[dict]:
+    """llm.cascade merged over DEFAULTS, or None if off or without a small model."""
+    cfg = llm_cfg.get("cascade") if isinstance(llm_cfg, dict) else None
+    if not isinstance(cfg, dict) or not cfg.get("enabled", DEFAULTS["enabled"]):
+        return None
+    small = cfg.get("small")
+    if not isinstance(small, dict) or not small.get("model"):
+        return None
+    settings = dict(DEFAULTS)
+    # Keeps the entry's own host, keep_alive, options, ... (BaseLLM.CONNECTION_KEYS)
+    settings["small"] = dict(small, provider=str(small.get("provider") or llm_cfg.get("provider") or "ollama").lower())
+    for key in ("max_input_chars", "max_data_chars"):
+        try:
+            settings[key] = max(0, int(cfg.get(key, DEFAULTS[key])))
+        except (TypeError, ValueError):
+            pass
+    settings["escalate_actions"] = [str(a) for a in cfg.get("escalate_actions", []) or []]
+    return settings
+
+
+def data_chars(data: Any) -> int:
+    """Length of data as it goes into a summary prompt."""
+    if data is None:
+        return 0
+    if isinstance(data, (dict, list)):
+        return len(json.dumps(data, ensure_ascii=False))
+    return len(str(data))
+
+
+def known_actions(workspace: Path) -> set:
+    """Action names the prompt can offer (agent_action.json and router_action.json)."""
+    names = set()
+    for filename in ACTION_FILES.values():
+        names.update(str(a.get("name")) for a in read_actions(Path(workspace) / filename) or [])
+    return names
+
+
+def review(settings: dict, actions: Optional[list], known: set) -> Optional[str]:
+    """Reason to escalate a parsed small-model answer with these actions, or None to keep it."""
+    if actions is None:
+        return None
+    if not isinstance(actions, list):
+        return "invalid_tool_code"
+    for action in actions:
+        if not isinstance(action, dict) or not isinstance(action.get("params"), dict):
+            return "invalid_action"
+        name = str(action.get("name", ""))
+        if name not in known:
+            return "unknown_action"
+        if name in settings["escalate_actions"]:
+            return f"action:{name}"
+    return None
+
+
+def record_turn(outcome: str, reason: Optional[str] = None) -> None:
+    """outcome: small (kept), escalated (small answer rejected) or direct (large model only)."""
+    with _stats_lock:
+        _stats["turns"] += 1
+        _stats[outcome] += 1
+        if reason:
+            _stats["reasons"][reason] = _stats["reasons"].get(reason, 0) + 1
+
+
+def record_summary(small: bool) -> None:
+    with _stats_lock:
+        _stats["summaries_small" if small else "summaries_large"] += 1
+
+
+def summary() -> Optional[str]:
+    """Cascade stats for /status, or None before the first routed call."""
+    with _stats_lock:
+        s = dict(_stats)
+        reasons = dict(s["reasons"])
+    if not s["turns"] and not s["summaries_small"] and not s["summaries_large"]:
+        return None
+    large = s["escalated"] + s["direct"]
+    rate = f"{100 * large / s['turns']:.0f}%" if s["turns"] else "-"
+    text = (
+        f"turns={s['turns']} small={s['small']} escalated={s['escalated']} direct={s['direct']} "
+        f"large_rate={rate} summaries small={s['summaries_small']} large={s['summaries_large']}"
+    )
+    if reasons:
+        text += " reasons: " + " ".join(f"{k}={v}" for k, v in sorted(reasons.items()))
+    return text
@@ -0,0 +1,86 @@
+"""
+Serialization of structured prompt sections (memory, agent/router actions, history).
+  pretty    - json.dumps(indent=2), non-ASCII escaped as \\uXXXX (the original format)
+  minified  - compact JSON, non-ASCII kept as is (CJK is ~1 token per character instead of ~3 per escape)
+  lines     - one line per item: "key: value" for memory, one compact JSON object per action/history entry
+
+Config (config.json llm), one format or per provider:
+  "prompt_format": "minified"          or {"default": "minified", "bridged_gemini": "pretty"}
+
+./start_agent.py prompt-bench prints the prompt tokens of the real workspace in each format.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from libs.context_packer import get_tokenizer
+from libs.state_store import HISTORY, get_state_store
+from libs.tool_selector import ACTION_FILES, read_actions
+from libs.workspace_state import read_json
+
+FORMATS = ("pretty", "minified", "lines")
+DEFAULT_FORMAT = "pretty"
+
+
+def prompt_format(llm_cfg: dict, provider: str) -> str:
+    """Format for provider from llm.prompt_format (str, or dict by provider with "default")."""
+    value = llm_cfg.get("prompt_format", DEFAULT_FORMAT)
+    if isinstance(value, dict):
+        value = value.get(provider, value.get("default", DEFAULT_FORMAT))
+    value = str(value).lower()
+    return value if value in FORMATS else DEFAULT_FORMAT
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def serialize(value: Any, fmt: str = DEFAULT_FORMAT) -> str:
+    """value (dict, list, ...) as prompt text in fmt."""
+    if fmt == "minified":
+        return _compact(value)
+    if fmt == "lines":
+        if isinstance(value, dict):
+            return "\n".join(f"{k}: {v if isinstance(v, str) else _compact(v)}" for k, v in value.items())
+        if isinstance(value, list):
+            return "\n".join(_compact(item) for item in value)
+        return _compact(value)
+    return json.dumps(value, indent=2)
+
+
+def _workspace_sections(workspace: Path) -> Dict[str, Any]:
+    """Structured sections of the workspace as the prompt sees them before selection and packing."""
+    store = get_state_store(workspace)
+    sections: Dict[str, Any] = {"memory": store.memory()}
+    for kind, filename in ACTION_FILES.items():
+        sections[f"{kind}_actions"] = read_actions(workspace / filename) or []
+    sections["history"] = [e for e in store.items(HISTORY) if isinstance(e, dict)]
+    return sections
+
+
+def run_benchmark(workspace: Optional[Path] = None, config: Optional[dict] = None) -> List[dict]:
+    """Print and return prompt tokens per section and format for the workspace (llm.token_estimate
+    or the configured tokenizer)."""
+    agent_dir = Path(__file__).resolve().parent.parent
+    workspace = workspace or agent_dir / "workspace"
+    config = config if config is not None else read_json(agent_dir / "config.json", {})
+    llm_cfg = config.get("llm", {}) if isinstance(config, dict) else {}
+    count_tokens = get_tokenizer(llm_cfg if isinstance(llm_cfg, dict) else {})
+    sections = _workspace_sections(workspace)
+    rows = []
+    for name, value in sections.items():
+        row = {"section": name, "items": len(value)}
+        row.update({fmt: count_tokens(serialize(value, fmt)) for fmt in FORMATS})
+        rows.append(row)
+    total = {"section": "total", "items": sum(r["items"] for r in rows)}
+    total.update({fmt: sum(r[fmt] for r in rows) for fmt in FORMATS})
+    rows.append(total)
+
+    print(f"Prompt tokens by section ({workspace})")
+    print(f"{'section':<16}{'items':>7}" + "".join(f"{fmt:>10}" for fmt in FORMATS) + f"{'saved':>9}")
+    for row in rows:
+        best = min(row[fmt] for fmt in FORMATS)
+        saved = f"{100 * (1 - best / row['pretty']):.0f}%" if row["pretty"] else "-"
+        print(f"{row['section']:<16}{row['items']:>7}" + "".join(f"{row[fmt]:>10}" for fmt in FORMATS) + f"{saved:>9}")
+    print(f"Current setting: {prompt_format(llm_cfg, str(llm_cfg.get('provider', 'ollama')))}")
+    return rows
@@ -0,0 +1,152 @@
+"""
+Compiled prompt template and cached prompt sections.
+PROMPT.md is split once into literal segments and {{PLACEHOLDER}} slots; rendering is a single join.
+Sections built from workspace files (memory, SOUL, actions, history) are cached by source mtime,
+so a turn only re-reads and re-serializes the files that actually changed.
+"""
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PLACEHOLDER_RE = re.compile(r"\{\{([A-Z_]+)\}\}")
+
+# Placeholders that are only substituted at their first occurrence (later ones stay literal)
+FIRST_OCCURRENCE_ONLY = {"AGENT_ACTIONS", "ROUTER_ACTIONS"}
+
+
+def _file_key(path: Path) -> Optional[Tuple[int, int]]:
+    """Cache key for a source file: (mtime_ns, size), or None if missing."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class PromptTemplate:
+    """PROMPT.md compiled into segments: (False, literal text) or (True, placeholder name)."""
+
+    _compiled: Dict[Path, Tuple[Optional[Tuple[int, int]], "PromptTemplate"]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, text: str):
+        self._segments: List[Tuple[bool, str]] = []
+        seen = set()
+        literal: List[str] = []
+        pos = 0
+        for m in PLACEHOLDER_RE.finditer(text):
+            literal.append(text[pos:m.start()])
+            name = m.group(1)
+            if name in FIRST_OCCURRENCE_ONLY and name in seen:
+                literal.append(m.group(0))
+            else:
+                self._segments.append((False, "".join(literal)))
+                self._segments.append((True, name))
+                literal = []
+            seen.add(name)
+            pos = m.end()
+        literal.append(text[pos:])
+        self._segments.append((False, "".join(literal)))
+
+    @property
+    def placeholders(self) -> List[str]:
+        return [value for is_slot, value in self._segments if is_slot]
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Assemble the prompt in one join. Missing values render as empty strings."""
+        return "".join(values.get(value, "") if is_slot else value for is_slot, value in self._segments)
+
+    def render_split(self, values: Dict[str, str], volatile: set) -> Tuple[str, str]:
+        """Render as (static prefix, volatile tail). The tail starts at the paragraph holding the first
+        placeholder in volatile, so the prefix stays byte-identical while static sections are unchanged."""
+        split_at = next(
+            (i for i, (is_slot, value) in enumerate(self._segments) if is_slot and value in volatile),
+            len(self._segments),
+        )
+        head, carry = self._segments[:split_at], ""
+        if head and not head[-1][0]:
+            literal = head[-1][1]
+            cut = literal.rfind("\n\n")
+            if cut >= 0:
+                head = head[:-1] + [(False, literal[:cut])]
+                carry = literal[cut:]
+
+        def join(segments):
+            return "".join(values.get(value, "") if is_slot else value for is_slot, value in segments)
+
+        return join(head), carry + join(self._segments[split_at:])
+
+    @classmethod
+    def load(cls, path: Path, default: str = "{{USER_MESSAGE}}") -> "PromptTemplate":
+        """Return the compiled template for path, recompiling only when the file changes."""
+        key = _file_key(path)
+        cached = cls._compiled.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        with cls._lock:
+            text = path.read_text(encoding="utf-8").strip() if key is not None else default
+            template = cls(text)
+            cls._compiled[path] = (key, template)
+        return template
+
+
+class SectionCache:
+    """Rendered values keyed by name, invalidated when the source file's mtime or size changes
+    (or, with get_keyed, when the given version key changes)."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Optional[Tuple[int, int]], Any]] = {}
+
+    def get(self, name: str, path: Path, render: Callable[[], Any]) -> Any:
+        return self.get_keyed(name, _file_key(path), render)
+
+    def get_keyed(self, name: str, key: Any, render: Callable[[], Any]) -> Any:
+        """Like get(), with a caller-supplied version key (e.g. StateStore.version())."""
+        cached = self._entries.get(name)
+        if cached and cached[0] == key:
+            return cached[1]
+        value = render()
+        self._entries[name] = (key, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class PromptCacheWriter:
+    """Background writer for output/prompt_cache.txt. Keeps only the latest prompt per path."""
+
+    def __init__(self):
+        self._pending: Dict[Path, str] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, path: Path, text: str) -> None:
+        with self._cond:
+            self._pending[path] = text
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                items, self._pending = self._pending, {}
+            for path, text in items.items():
+                write_prompt_cache(path, text)
+
+
+def write_prompt_cache(path: Path, text: str) -> None:
+    """Write the prompt dump synchronously. Errors are ignored (debug aid only)."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    except OSError:
+        pass
+
+
+PROMPT_CACHE_WRITER = PromptCacheWriter()
@@ -0,0 +1,116 @@
+"""
+Per-request reply lists for the Redis request/response queues (Gemini bridge, Headless channel).
+Each request carries a unique id and "reply_to": "{queue_out}:{id}"; the responder pushes its reply to
+that list, which expires after REPLY_TTL_S. Waiters only read their own list, so any number of requests
+can be in flight at once without stealing or discarding each other's replies, and a reply that nobody
+waits for any more (timeout, cancel) simply expires.
+
+Responders that only know the shared queue_out (e.g. an older Gemini bridge) are handled by ReplyDemux:
+one listener per queue and process that moves each reply from queue_out to its request's list.
+"""
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+
+from libs.debug_log import debug_log
+
+REPLY_TTL_S = 300
+
+
+def new_request_id(prefix: str = "req") -> str:
+    """Unique request id (two requests in the same millisecond no longer collide)."""
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+
+def reply_key(queue_out: str, request_id: str) -> str:
+    """Per-request reply list: {queue_out}:{request_id}."""
+    return f"{queue_out}:{request_id}"
+
+
+def push_reply(r: redis.Redis, key: str, data: Any) -> int:
+    """RPUSH data (dict or JSON string) to key and (re)set its expiry. Returns the payload size in bytes."""
+    raw = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    pipe = r.pipeline()
+    pipe.rpush(key, raw)
+    pipe.expire(key, REPLY_TTL_S)
+    pipe.execute()
+    return len(raw.encode("utf-8"))
+
+
+class ReplyDemux:
+    """Moves replies from a shared queue_out to their per-request lists.
+    Replies without an id go to the oldest request registered in this process (legacy bridges answer
+    in order); replies that cannot be routed are dropped and counted."""
+
+    def __init__(self, redis_url: str, queue_out: str):
+        self.redis_url = redis_url
+        self.queue_out = queue_out
+        self._pending: Dict[str, float] = {}  # request_id -> registered_at (insertion ordered)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"routed": 0, "dropped": 0}
+
+    def register(self, request_id: str) -> None:
+        """Call before pushing the request, so an id-less reply can be matched to it."""
+        with self._lock:
+            self._pending[request_id] = time.monotonic()
+        self.start()
+
+    def unregister(self, request_id: str) -> None:
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True, name=f"reply-demux:{self.queue_out}")
+        self._thread.start()
+
+    def _loop(self) -> None:
+        r = redis.from_url(self.redis_url)
+        while True:
+            try:
+                item = r.blpop(self.queue_out, timeout=5)
+                if item is not None:
+                    self._route(r, item[1])
+            except redis.RedisError as e:
+                debug_log(f"ReplyDemux {self.queue_out}: {type(e).__name__}: {e}")
+                time.sleep(1)
+
+    def _route(self, r: redis.Redis, raw: Any) -> None:
+        s = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        try:
+            data = json.loads(s)
+        except json.JSONDecodeError:
+            data = None
+        request_id = str(data.get("id") or "") if isinstance(data, dict) else ""
+        if not request_id:
+            with self._lock:
+                request_id = next(iter(self._pending), "")
+        if not request_id:
+            self.stats["dropped"] += 1
+            debug_log(f"ReplyDemux {self.queue_out}: dropped reply without id (no request pending) len={len(s)}")
+            return
+        push_reply(r, reply_key(self.queue_out, request_id), s)
+        self.stats["routed"] += 1
+        debug_log(f"ReplyDemux {self.queue_out}: routed reply id={request_id}")
+
+
+_demuxes: Dict[Tuple[str, str], ReplyDemux] = {}
+_demuxes_lock = threading.Lock()
+
+
+def get_demux(redis_url: str, queue_out: str) -> ReplyDemux:
+    """Process-wide demux for (redis_url, queue_out)."""
+    key = (redis_url, queue_out)
+    with _demuxes_lock:
+        demux = _demuxes.get(key)
+        if demux is None:
+            demux = ReplyDemux(redis_url, queue_out)
+            _demuxes[key] = demux
+    return demux
@@ -2,13 +2,17 @@
 
 import json
 import time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterator, Optional
 
 import redis
 
+from libs.reply_demux import reply_key
+
 
 class RequestClient:
-    """Sends prompts to a Redis queue. Use send_with_callback or send_and_wait."""
+    """Sends prompts to a Redis queue. Use send_with_callback or send_and_wait.
+    Each request asks for its reply on its own list ({queue_out}:{id}, see libs/reply_demux.py), so
+    several clients and threads can wait at once; request_id must be unique (new_request_id())."""
 
     def __init__(self, redis_url: str, queue_in: str, queue_out: str):
         if not redis_url or not str(redis_url).strip():
@@ -28,24 +32,31 @@ class RequestClient:
             self._redis = redis.from_url(self.redis_url)
         return self._redis
 
-    def _validate_and_push(self, request_id: str, prompt: str) -> None:
+    def _validate_and_push(self, request_id: str, prompt: str, **flags: Any) -> None:
         if request_id is None or not str(request_id).strip():
             raise ValueError("request_id is required and must be non-empty")
         if not prompt or not str(prompt).strip():
             raise ValueError("prompt is required and must be non-empty")
-        payload = {"id": request_id, "prompt": prompt, "timestamp": int(time.time() * 1000)}
+        payload = {
+            "id": request_id,
+            "prompt": prompt,
+            "reply_to": reply_key(self.queue_out, request_id),
+            "timestamp": int(time.time() * 1000),
+            **flags,
+        }
         self.redis.lpush(self.queue_in, json.dumps(payload))
 
     def _wait_for_response(self, request_id: str) -> dict[str, Any]:
+        key = reply_key(self.queue_out, request_id)
         while True:
-            result = self.redis.blpop(self.queue_out, timeout=0)
+            result = self.redis.blpop(key, timeout=0)
             if result is None:
                 raise TimeoutError("No response received")
             _, raw = result
             data = json.loads(raw)
-            if data.get("id") == request_id:
+            if data.get("type", "response") == "response":
                 return data
-            # Mismatch: stale/previous response. Discard and keep waiting for ours.
+            # Intermediate frame (e.g. "partial" text delta) on the same list: keep waiting for the response.
 
     def send_with_callback(
         self, request_id: str, prompt: str, callback: Callable[[Any], None]
@@ -84,6 +95,49 @@ class RequestClient:
         self._validate_and_push(request_id, prompt)
         return self._wait_for_response(request_id)
 
+    def send_and_iter(
+        self,
+        request_id: str,
+        prompt: str,
+        progress: bool = True,
+        partial: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Push a prompt and yield its frames as they arrive, ending with the final response.
+
+        Args:
+            request_id: Unique ID for this request.
+            prompt: Text to send.
+            progress: Ask for "progress" frames (reply text, then each action's result).
+            partial: Ask for "partial" frames (streamed reply text; needs llm.stream on the agent).
+            timeout: Max seconds to wait for each next frame (None = no limit).
+
+        Yields:
+            Frame dicts with keys id, type ("partial", "progress" or "response"), seq, response,
+            timestamp; progress frames also have stage ("message" or "action") and, for actions,
+            index and action. The last frame has type "response".
+
+        Raises:
+            ValueError: If request_id or prompt is invalid.
+            TimeoutError: If no frame arrived within timeout.
+        """
+        flags = {}
+        if progress:
+            flags["progress"] = True
+        if partial:
+            flags["stream"] = True
+        self._validate_and_push(request_id, prompt, **flags)
+        key = reply_key(self.queue_out, request_id)
+        while True:
+            result = self.redis.blpop(key, timeout=timeout or 0)
+            if result is None:
+                raise TimeoutError(f"No frame received within {timeout}s")
+            frame = json.loads(result[1])
+            yield frame
+            if frame.get("type", "response") == "response":
+                return
+
     def close(self) -> None:
         """Close the Redis connection."""
         if self._redis:
@@ -1,12 +1,19 @@
 """Client for the gateway side: consumes requests from queue_in, calls handler, pushes results to queue_out."""
 
 import json
+import socket
+import threading
 import time
-from typing import Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
 
 import redis
 
 from libs.debug_log import debug_log, truncate_debug
+from libs.logger import log
+from libs.reply_demux import push_reply
+
+_clients: Dict[str, "ResponseClient"] = {}
 
 
 class ResponseClient:
@@ -15,9 +22,11 @@ class ResponseClient:
     and pushes the handler's return value to queue_out.
 
     The application (gateway) provides a handler and never touches Redis.
+    consumer names this gateway's processing list (default: hostname); gateways sharing queue_in
+    need different names so one does not requeue another's in-flight requests.
     """
 
-    def __init__(self, redis_url: str, queue_in: str, queue_out: str):
+    def __init__(self, redis_url: str, queue_in: str, queue_out: str, consumer: Optional[str] = None):
         if not redis_url or not str(redis_url).strip():
             raise ValueError("redis_url is required and must be non-empty")
         if queue_in is None or not str(queue_in).strip():
@@ -27,7 +36,17 @@ class ResponseClient:
         self.redis_url = redis_url.strip()
         self.queue_in = queue_in.strip()
         self.queue_out = queue_out.strip()
+        self.consumer = (consumer or socket.gethostname() or "gateway").strip()
         self._redis: Optional[redis.Redis] = None
+        self._reliable = True  # BLMOVE + processing list; False after falling back to BLPOP (Redis < 6.2)
+        self._stats_lock = threading.Lock()
+        self._frame_lock = threading.Lock()
+        self._frame_seq: Dict[str, int] = {}  # request_id -> last frame seq
+        self.stats = {
+            "active": 0, "completed": 0, "expired": 0, "failed": 0,
+            "wait_ms_total": 0.0, "wait_ms_max": 0.0, "handler_ms_total": 0.0, "handler_ms_max": 0.0,
+        }
+        _clients[self.queue_in] = self
 
     @property
     def redis(self) -> redis.Redis:
@@ -35,53 +54,234 @@ class ResponseClient:
             self._redis = redis.from_url(self.redis_url)
         return self._redis
 
-    def run(self, handler: Callable[[dict[str, Any]], dict[str, Any]]) -> None:
+    FRAME_TTL = 300  # seconds a per-request frame list lives if nobody consumes it
+
+    def frame_key(self, request_id: str) -> str:
+        """Per-request list for intermediate frames: {queue_out}:{request_id}."""
+        return f"{self.queue_out}:{request_id}"
+
+    def push_frame(self, request_id: str, frame: dict[str, Any]) -> None:
+        """
+        Push an intermediate frame (type "partial" with a text delta, or "progress") for one request.
+        Frames go to frame_key(request_id), never the shared queue_out. Each frame gets "seq"
+        (1, 2, ...; the final response takes the next one), so clients can order frames and see gaps.
+        """
+        if not request_id:
+            return  # frames are per request; without an id there is no list to push to
+        if "timestamp" not in frame:
+            frame = {**frame, "timestamp": int(time.time() * 1000)}
+        key = self.frame_key(request_id)
+        with self._frame_lock:  # seq order == list order
+            seq = self._frame_seq.get(request_id, 0) + 1
+            self._frame_seq[request_id] = seq
+            pipe = self.redis.pipeline()
+            pipe.rpush(key, json.dumps({**frame, "seq": seq}, ensure_ascii=False))
+            pipe.expire(key, self.FRAME_TTL)
+            pipe.execute()
+
+    def processing_key(self) -> str:
+        """Reliable-queue list holding requests taken from queue_in until their response is pushed."""
+        return f"{self.queue_in}:processing:{self.consumer}"
+
+    def run(
+        self,
+        handler: Callable[[dict[str, Any]], dict[str, Any]],
+        workers: int = 1,
+        deadline_s: Optional[float] = None,
+    ) -> None:
         """
-        Run the gateway loop. For each request from queue_in:
-        - Call handler(request)
-        - Push handler's return value to queue_out
+        Run the gateway loop. For each request from queue_in (oldest first):
+        - Move it to processing_key() (BLMOVE), so a crash does not lose it
+        - Call handler(request) on one of `workers` threads
+        - Push handler's return value to the request's reply_to list ({queue_out}:{id}), or to
+          queue_out for clients that do not send reply_to
+        - Remove it from processing_key() (acknowledge)
 
         The handler receives the request dict (e.g. id, prompt, timestamp) and must return
         a result dict (e.g. id, response, type, timestamp) to be pushed to queue_out.
+        Requests left in processing_key() by a previous run are requeued at startup.
+        BLMOVE/LMOVE need Redis 6.2 or later; on an older server the loop falls back to BLPOP, which
+        has no acknowledgement or requeue (a request in progress during a crash is lost).
 
         Args:
             handler: Callable that receives request dict and returns result dict.
+            workers: Requests handled at once. A request is taken only when a worker is free.
+            deadline_s: Max queue wait. If set, a request whose timestamp is older than this when a
+                worker picks it up gets an "[Error] Request expired" response instead of running the
+                handler. Handler time is not limited by it.
         """
         if handler is None:
             raise ValueError("handler is required")
+        workers = max(1, int(workers))
+        try:
+            self._requeue_unacked()
+        except redis.ResponseError as e:
+            if not self._command_missing(e):
+                raise
+        free = threading.BoundedSemaphore(workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gateway") as pool:
+            while True:
+                free.acquire()
+                try:
+                    raw = self._take()
+                except redis.RedisError as e:
+                    free.release()
+                    if self._command_missing(e):
+                        continue
+                    debug_log(f"LAN queue: {self._take_command()} {self.queue_in} failed: {e!r}")
+                    time.sleep(1)
+                    continue
+                if raw is None:
+                    free.release()
+                    continue
+                taken_at = time.time()
+                with self._stats_lock:
+                    self.stats["active"] += 1
+
+                def work(raw=raw, taken_at=taken_at) -> None:
+                    try:
+                        self._handle(raw, handler, taken_at, deadline_s)
+                    finally:
+                        with self._stats_lock:
+                            self.stats["active"] -= 1
+                        free.release()
+
+                pool.submit(work)
+
+    def _take_command(self) -> str:
+        return "BLMOVE" if self._reliable else "BLPOP"
 
-        while True:
-            result = self.redis.blpop(self.queue_in, timeout=0)
-            if result is None:
-                continue
-            _, raw = result
-            if isinstance(raw, bytes):
-                raw = raw.decode("utf-8")
-            request = json.loads(raw)
+    def _take(self) -> Any:
+        """Next request from queue_in (oldest first), or None after a 5 s wait. With BLMOVE it is also
+        moved to processing_key() until acknowledged."""
+        if self._reliable:
+            return self.redis.blmove(self.queue_in, self.processing_key(), 5, "RIGHT", "LEFT")
+        result = self.redis.blpop(self.queue_in, timeout=5)
+        return result[1] if result else None
+
+    def _command_missing(self, e: Exception) -> bool:
+        """True if Redis rejected BLMOVE/LMOVE as an unknown command (server older than 6.2); the gateway
+        then switches to BLPOP without acks or requeue (logged once)."""
+        if not (isinstance(e, redis.ResponseError) and "unknown command" in str(e).lower()):
+            return False
+        if self._reliable:
+            self._reliable = False
+            log(
+                f"[Gateway] Redis does not support BLMOVE/LMOVE ({e}); using BLPOP, so requests are not "
+                "acknowledged or requeued after a crash (needs Redis 6.2 or later)"
+            )
+        return True
+
+    def _requeue_unacked(self) -> None:
+        """Move requests a crashed run left in processing_key() back to the front of queue_in."""
+        moved = 0
+        while self.redis.lmove(self.processing_key(), self.queue_in, "LEFT", "RIGHT") is not None:
+            moved += 1
+        if moved:
+            log(f"[Gateway] Requeued {moved} unacknowledged request(s) from {self.processing_key()}")
+
+    def _handle(
+        self,
+        raw: Any,
+        handler: Callable[[dict[str, Any]], dict[str, Any]],
+        taken_at: float,
+        deadline_s: Optional[float],
+    ) -> None:
+        text = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        reply_to = None
+        rid = ""
+        wait_s = 0.0
+        ok = False
+        try:
+            request = json.loads(text)
             rid = request.get("id", "")
+            reply_to = request.get("reply_to")
+            if not (isinstance(reply_to, str) and reply_to.startswith(f"{self.queue_out}:")):
+                reply_to = None  # only per-request lists under queue_out, never arbitrary keys
+            sent_at = request.get("timestamp")
+            wait_s = max(0.0, taken_at - sent_at / 1000) if isinstance(sent_at, (int, float)) else 0.0
             prompt_preview = truncate_debug((request.get("prompt") or "").strip(), 200)
-            debug_log(f"LAN queue: BLPOP {self.queue_in} ok id={rid!r} prompt_preview={prompt_preview}")
+            debug_log(
+                f"LAN queue: {self._take_command()} {self.queue_in} ok id={rid!r} wait_ms={wait_s * 1000:.0f} "
+                f"prompt_preview={prompt_preview}"
+            )
+            if deadline_s is not None and wait_s > deadline_s:
+                self._record(wait_s, None, "expired")
+                self._push_response(reply_to, self._error_response(rid, f"Request expired ({wait_s:.0f}s in queue)"))
+                log(f"[Gateway] Request {rid!r} expired after {wait_s:.0f}s in queue")
+                ok = True
+                return
+            started = time.monotonic()
+            response = handler(request)
+            handler_s = time.monotonic() - started
+            if response is not None:
+                if "timestamp" not in response:
+                    response = {**response, "timestamp": int(time.time() * 1000)}
+                out_bytes = self._push_response(reply_to, response)
+                debug_log(
+                    f"LAN queue: RPUSH {reply_to or self.queue_out} ok id={response.get('id', rid)!r} "
+                    f"bytes={out_bytes} handler_ms={handler_s * 1000:.0f}"
+                )
+            self._record(wait_s, handler_s, "completed")
+            ok = True
+        except Exception as e:
+            # Push error response so RequestClient doesn't block forever
+            self._record(wait_s, None, "failed")
             try:
-                response = handler(request)
-                if response is not None:
-                    if "timestamp" not in response:
-                        response = {**response, "timestamp": int(time.time() * 1000)}
-                    out_raw = json.dumps(response, ensure_ascii=False)
-                    self.redis.rpush(self.queue_out, out_raw)
-                    debug_log(
-                        f"LAN queue: RPUSH {self.queue_out} ok id={response.get('id', rid)!r} "
-                        f"bytes={len(out_raw.encode('utf-8'))}"
-                    )
-            except Exception as e:
-                # Push error response so RequestClient doesn't block forever
-                err_response = {
-                    "id": request.get("id", ""),
-                    "response": f"[Error] {e}",
-                    "type": "response",
-                    "timestamp": int(time.time() * 1000),
-                }
-                self.redis.rpush(self.queue_out, json.dumps(err_response))
-                debug_log(f"LAN queue: RPUSH {self.queue_out} error_response id={rid!r} exc={e!r}")
+                self._push_response(reply_to, self._error_response(rid, str(e)))
+                ok = True
+            except redis.RedisError:
+                pass  # not acknowledged: requeued on the next start
+            debug_log(f"LAN queue: RPUSH {reply_to or self.queue_out} error_response id={rid!r} exc={e!r}")
+        finally:
+            if ok and self._reliable:
+                self.redis.lrem(self.processing_key(), 1, raw)
+
+    @staticmethod
+    def _error_response(request_id: str, message: str) -> dict[str, Any]:
+        return {
+            "id": request_id,
+            "response": f"[Error] {message}",
+            "type": "response",
+            "timestamp": int(time.time() * 1000),
+        }
+
+    def _record(self, wait_s: float, handler_s: Optional[float], outcome: str) -> None:
+        with self._stats_lock:
+            s = self.stats
+            s[outcome] += 1
+            s["wait_ms_total"] += wait_s * 1000
+            s["wait_ms_max"] = max(s["wait_ms_max"], wait_s * 1000)
+            if handler_s is not None:
+                s["handler_ms_total"] += handler_s * 1000
+                s["handler_ms_max"] = max(s["handler_ms_max"], handler_s * 1000)
+
+    def summary(self) -> str:
+        """Queue-wait and handler-time metrics (for /status)."""
+        with self._stats_lock:
+            s = dict(self.stats)
+        done = s["completed"] + s["expired"] + s["failed"]
+        wait_avg = s["wait_ms_total"] / done if done else 0
+        handler_avg = s["handler_ms_total"] / s["completed"] if s["completed"] else 0
+        return (
+            f"{self.queue_in} active={s['active']} completed={s['completed']} expired={s['expired']} "
+            f"failed={s['failed']} wait_avg={wait_avg:.0f}ms wait_max={s['wait_ms_max']:.0f}ms "
+            f"handler_avg={handler_avg:.0f}ms handler_max={s['handler_ms_max']:.0f}ms"
+        )
+
+    def _push_response(self, reply_to: Optional[str], response: dict[str, Any]) -> int:
+        """Final response to the request's own list (expires), or the shared queue_out. Returns bytes.
+        Responses without an id get no seq (they cannot have frames)."""
+        rid = str(response.get("id") or "")
+        if rid:
+            with self._frame_lock:
+                seq = self._frame_seq.pop(rid, 0) + 1
+            response = {**response, "seq": seq}
+        if reply_to:
+            return push_reply(self.redis, reply_to, response)
+        out_raw = json.dumps(response, ensure_ascii=False)
+        self.redis.rpush(self.queue_out, out_raw)
+        return len(out_raw.encode("utf-8"))
 
     def close(self) -> None:
         """Close the Redis connection."""
@@ -94,3 +294,8 @@ class ResponseClient:
 
     def __exit__(self, *args) -> None:
         self.close()
+
+
+def all_clients() -> Dict[str, ResponseClient]:
+    """Gateways created in this process, by queue_in (for /status)."""
+    return dict(_clients)
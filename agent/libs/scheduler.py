@@ -1,16 +1,18 @@
 """
 Scheduler: tick thread, fires every minute aligned to minute boundaries.
-Agent owns it and controls lifecycle (start/stop). Loads workspace/schedule.json.
+Agent owns it and controls lifecycle (start/stop). Schedule items live in the workspace state store
+(libs/state_store.py, list "schedule").
 Logs to logs/schedule.log. No Redis, no external deps.
 See agent/README.md and agent_design_details.txt.
 """
-import json
 import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Any, List, Optional
 
-SCHEDULE_JSON = "schedule.json"
+from libs.llm_dispatcher import SCHEDULED, llm_priority
+from libs.state_store import SCHEDULE, get_state_store
+
 SCHEDULE_LOG = Path(__file__).resolve().parent.parent / "logs" / "schedule.log"
 
 
@@ -33,19 +35,8 @@ def normalize_datetime(dt_str: str) -> str:
 
 
 def append_schedule_item(workspace: Path, item: dict) -> None:
-    """Append item to schedule.json. Used by ADD_SCHEDULE action."""
-    path = Path(workspace) / SCHEDULE_JSON
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if not path.exists():
-        path.write_text("[]", encoding="utf-8")
-    try:
-        raw = path.read_text(encoding="utf-8").strip()
-        data = json.loads(raw) if raw else []
-        schedule = data if isinstance(data, list) else []
-        schedule.append(item)
-        path.write_text(json.dumps(schedule, indent=2), encoding="utf-8")
-    except (json.JSONDecodeError, OSError):
-        path.write_text(json.dumps([item], indent=2), encoding="utf-8")
+    """Append item to the schedule. Used by ADD_SCHEDULE action."""
+    get_state_store(workspace).append_items(SCHEDULE, [item])
 
 
 def remove_schedule_items(
@@ -59,15 +50,6 @@ def remove_schedule_items(
     """
     if not datetime_str and not message:
         return 0
-    path = Path(workspace) / SCHEDULE_JSON
-    if not path.exists():
-        return 0
-    try:
-        raw = path.read_text(encoding="utf-8").strip()
-        data = json.loads(raw) if raw else []
-        schedule = data if isinstance(data, list) else []
-    except (json.JSONDecodeError, OSError):
-        return 0
 
     dt_norm = normalize_datetime(datetime_str) if datetime_str else ""
     msg_lower = message.lower().strip() if message else ""
@@ -86,16 +68,11 @@ def remove_schedule_items(
                 return False
         return True
 
-    original_len = len(schedule)
-    schedule = [i for i in schedule if not matches(i)]
-    removed = original_len - len(schedule)
-    if removed > 0:
-        path.write_text(json.dumps(schedule, indent=2), encoding="utf-8")
-    return removed
+    return len(get_state_store(workspace).take_items(SCHEDULE, matches))
 
 
 class Scheduler:
-    """Tick scheduler. Agent creates, starts, and stops it. Loads schedule.json."""
+    """Tick scheduler. Agent creates, starts, and stops it. Loads the schedule from the state store."""
 
     def __init__(self, agent: Optional[object] = None):
         self._agent = agent
@@ -109,36 +86,13 @@ class Scheduler:
             return Path(self._agent.WORKSPACE)
         return Path(__file__).resolve().parent.parent / "workspace"
 
-    def _get_schedule_path(self) -> Path:
-        return self._get_workspace() / SCHEDULE_JSON
-
     def _load_schedule(self) -> None:
-        """Load schedule.json. Create with [] if missing."""
-        path = self._get_schedule_path()
-        path.parent.mkdir(parents=True, exist_ok=True)
-        if not path.exists():
-            path.write_text("[]", encoding="utf-8")
-            self._schedule = []
-            return
-        try:
-            raw = path.read_text(encoding="utf-8").strip()
-            data = json.loads(raw) if raw else []
-            self._schedule = data if isinstance(data, list) else []
-        except (json.JSONDecodeError, OSError):
-            self._schedule = []
-
-    def _save_schedule(self) -> None:
-        """Write schedule to schedule.json."""
-        try:
-            self._get_schedule_path().write_text(
-                json.dumps(self._schedule, indent=2), encoding="utf-8"
-            )
-        except OSError:
-            pass
+        """Load the schedule from the state store."""
+        self._schedule = get_state_store(self._get_workspace()).items(SCHEDULE)
 
     @property
     def schedule(self) -> List[Any]:
-        """Loaded schedule from schedule.json (read-only)."""
+        """Loaded schedule (read-only)."""
         return self._schedule
 
     def _log(self, msg: str) -> None:
@@ -204,58 +158,46 @@ class Scheduler:
 
                         workspace = self._get_workspace()
                         executor = ActionExecutor(action_name, param, workspace=workspace)
-                        result = executor.execute()
+                        with llm_priority(SCHEDULED):
+                            result = executor.execute()
                         self._log(f"[Schedule] action={action_name} result={result}")
                     except Exception as e:
                         self._log(f"[Schedule] action={action_name} error={e}")
 
         self._log(f"[Schedule] type={item_type} {item}")
 
-    def _clean_up_schedules(self) -> int:
-        """Remove invalid and expired records from schedule. Returns count removed."""
-        now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-        original_len = len(self._schedule)
-        kept: List[Any] = []
-
-        for item in self._schedule:
-            if not isinstance(item, dict):
-                continue
-            dt = item.get("datetime", "")
-            if not dt or not isinstance(dt, str):
-                continue
-            dt_norm = normalize_datetime(dt)
-            if not dt_norm:
-                continue
-            if dt_norm < now_str:
-                continue
-            kept.append(item)
-
-        removed = original_len - len(kept)
-        if removed > 0:
-            self._schedule[:] = kept
-            self._log(f"[Cleanup] removed {removed} invalid/expired record(s)")
-        return removed
+    @staticmethod
+    def _is_stale(item: Any, now_str: str) -> bool:
+        """Invalid record, or datetime before now_str (it can never run)."""
+        if not isinstance(item, dict):
+            return True
+        dt = item.get("datetime", "")
+        if not dt or not isinstance(dt, str):
+            return True
+        dt_norm = normalize_datetime(dt)
+        return not dt_norm or dt_norm < now_str
 
     def _check_schedule(self) -> None:
-        """Reload schedule.json, find records matching current minute, run action, remove from schedule, then clean up."""
-        self._load_schedule()
+        """Take records matching the current minute, and invalid or expired ones, out of the schedule
+        (one transaction), then run the due records. Items added while they run (e.g. by a scheduled
+        prompt) are kept."""
         now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-        to_remove: List[int] = []
-        for i, item in enumerate(self._schedule):
-            if not isinstance(item, dict):
-                continue
-            dt = item.get("datetime", "")
+
+        def is_due(item: Any) -> bool:
+            dt = item.get("datetime", "") if isinstance(item, dict) else ""
             dt_norm = dt.replace("T", " ")[:16] if isinstance(dt, str) else ""
-            if dt_norm.strip() == now_str:
-                self._run_schedule(item)
-                to_remove.append(i)
-        if to_remove:
-            for i in reversed(to_remove):
-                self._schedule.pop(i)
-        cleanup_removed = self._clean_up_schedules()
-        if to_remove or cleanup_removed > 0:
-            self._save_schedule()
-        if not to_remove:
+            return dt_norm.strip() == now_str
+
+        store = get_state_store(self._get_workspace())
+        taken = store.take_items(SCHEDULE, lambda item: is_due(item) or self._is_stale(item, now_str))
+        due = [item for item in taken if is_due(item)]
+        removed = len(taken) - len(due)
+        if removed > 0:
+            self._log(f"[Cleanup] removed {removed} invalid/expired record(s)")
+        self._schedule = store.items(SCHEDULE)
+        for item in due:
+            self._run_schedule(item)
+        if not due:
             self._log("No Action")
 
     def _tick_loop(self) -> None:
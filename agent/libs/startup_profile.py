@@ -0,0 +1,57 @@
+"""
+Startup profile: measure import time and per-phase init time.
+Enable with: ./start_agent.py --startup-profile
+The agent builds everything it would build for a normal run (config, channels, LLM provider),
+prints a timing report to the console and exits without starting the channel loops.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+FLAG = "--startup-profile"
+
+_enabled = False
+_started_at = time.perf_counter()
+_phases: List[Tuple[str, float]] = []
+
+
+def init_from_argv(argv: list, started_at: float = None) -> None:
+    """Enable profiling if argv contains --startup-profile. started_at: perf_counter() at process start."""
+    global _enabled, _started_at
+    _enabled = any(str(a).lower() == FLAG for a in argv[1:])
+    if started_at is not None:
+        _started_at = started_at
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def record(name: str, seconds: float) -> None:
+    """Record a phase that was timed by the caller."""
+    if _enabled:
+        _phases.append((name, seconds))
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the block and record it as a phase (no-op cost when profiling is off)."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+
+def report() -> str:
+    """Return the timing report: one line per phase plus total since process start."""
+    total = time.perf_counter() - _started_at
+    width = max((len(name) for name, _ in _phases), default=10)
+    lines = ["Startup profile:"]
+    for name, seconds in _phases:
+        lines.append(f"  {name.ljust(width)}  {seconds * 1000:8.1f} ms")
+    lines.append(f"  {'total'.ljust(width)}  {total * 1000:8.1f} ms")
+    return "\n".join(lines)
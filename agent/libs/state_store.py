@@ -0,0 +1,273 @@
+"""
+Workspace state store: memory, turn history (and its rolling summary), schedule and pending broadcasts in
+SQLite (WAL mode), workspace/state.db. Replaces memory.json, input_history.json, schedule.json and
+broadcast_pending.json.
+
+- Writes are single transactions that touch only what changed (one memory key, one appended item),
+  so they are O(change) and crash-safe; they are serialized on one writer connection.
+- Reads come from an in-process cache, refilled after a write. In WAL mode readers never wait for the
+  writer. version(name) changes on every write, for callers that cache rendered values.
+- On first open, existing JSON files are imported and renamed to <name>.imported.
+  ./start_agent.py state export [dir] writes them back out; state import [dir] loads them again.
+"""
+import copy
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from libs.debug_log import debug_log
+from libs.workspace_state import read_json, write_json_atomic
+
+STATE_DB = "state.db"
+MEMORY = "memory"
+HISTORY = "history"
+SCHEDULE = "schedule"
+BROADCAST_PENDING = "broadcast_pending"
+HISTORY_SUMMARY = "history_summary"  # one record: rolling summary of turns folded out of history
+LIST_NAMES = (HISTORY, SCHEDULE, BROADCAST_PENDING, HISTORY_SUMMARY)
+JSON_FILES = {
+    MEMORY: "memory.json",
+    HISTORY: "input_history.json",
+    HISTORY_SUMMARY: "history_summary.json",
+    SCHEDULE: "schedule.json",
+    BROADCAST_PENDING: "broadcast_pending.json",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY AUTOINCREMENT, list TEXT NOT NULL, value TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS items_list ON items (list, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_stores: Dict[Path, "StateStore"] = {}
+_stores_lock = threading.Lock()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class StateStore:
+    """State of one workspace. Values returned are copies; change state only through the methods."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(_SCHEMA)
+        self._readers = threading.local()
+        self._cache: Dict[str, Any] = {}
+        self._versions: Dict[str, int] = {name: 0 for name in JSON_FILES}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._readers.conn = conn
+        return conn
+
+    def _transaction(self, names: List[str], work: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run work(conn) in one IMMEDIATE transaction on the writer; invalidate the cache of names."""
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            for name in names:
+                self._cache.pop(name, None)
+                self._versions[name] += 1
+        return result
+
+    # --- Reads ---
+    def version(self, name: str) -> int:
+        """Changes whenever name is written in this process."""
+        return self._versions[name]
+
+    def _read(self, name: str) -> Any:
+        if name in self._cache:
+            return copy.deepcopy(self._cache[name])
+        version = self._versions[name]
+        conn = self._reader()
+        if name == MEMORY:
+            rows = conn.execute("SELECT key, value FROM memory ORDER BY rowid").fetchall()
+            value: Any = {k: json.loads(v) for k, v in rows}
+        else:
+            rows = conn.execute("SELECT value FROM items WHERE list = ? ORDER BY id", (name,)).fetchall()
+            value = [json.loads(v) for (v,) in rows]
+        if self._versions[name] == version:  # no write meanwhile: safe to cache
+            self._cache[name] = value
+        return copy.deepcopy(value)
+
+    def memory(self) -> Dict[str, Any]:
+        return self._read(MEMORY)
+
+    def items(self, name: str) -> List[Any]:
+        """Items of history, history_summary, schedule or broadcast_pending, oldest first."""
+        if name not in LIST_NAMES:
+            raise ValueError(f"Unknown state list: {name}")
+        return self._read(name)
+
+    # --- Writes ---
+    def merge_memory(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Upsert keys of values (other keys unchanged). Returns the keys whose value changed."""
+
+        def work(conn):
+            changed = {}
+            for k, v in values.items():
+                raw = _dumps(v)
+                row = conn.execute("SELECT value FROM memory WHERE key = ?", (str(k),)).fetchone()
+                if row is None or row[0] != raw:
+                    changed[str(k)] = (raw, v)
+            conn.executemany(
+                "INSERT INTO memory (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [(k, raw) for k, (raw, _) in changed.items()],
+            )
+            return {k: v for k, (_, v) in changed.items()}
+
+        if not values:
+            return {}
+        return copy.deepcopy(self._transaction([MEMORY], work))
+
+    def append_items(self, name: str, new_items: List[Any], keep_last: Optional[int] = None) -> None:
+        """Append to a list; with keep_last, delete all but the newest keep_last items."""
+        if name not in LIST_NAMES:
+            raise ValueError(f"Unknown state list: {name}")
+
+        def work(conn):
+            conn.executemany("INSERT INTO items (list, value) VALUES (?, ?)", [(name, _dumps(i)) for i in new_items])
+            if keep_last is not None:
+                conn.execute(
+                    "DELETE FROM items WHERE list = ? AND id NOT IN "
+                    "(SELECT id FROM items WHERE list = ? ORDER BY id DESC LIMIT ?)",
+                    (name, name, max(0, int(keep_last))),
+                )
+
+        self._transaction([name], work)
+
+    def take_items(
+        self, name: str, predicate: Optional[Callable[[Any], bool]] = None, limit: Optional[int] = None
+    ) -> List[Any]:
+        """Delete and return the items of a list that match predicate (all if None), atomically.
+        With limit, at most that many (oldest first)."""
+        if name not in LIST_NAMES:
+            raise ValueError(f"Unknown state list: {name}")
+
+        def work(conn):
+            rows = conn.execute("SELECT id, value FROM items WHERE list = ? ORDER BY id", (name,)).fetchall()
+            taken = [(i, json.loads(v)) for i, v in rows]
+            if predicate is not None:
+                taken = [(i, v) for i, v in taken if predicate(v)]
+            if limit is not None:
+                taken = taken[:max(0, int(limit))]
+            conn.executemany("DELETE FROM items WHERE id = ?", [(i,) for i, _ in taken])
+            return [v for _, v in taken]
+
+        return self._transaction([name], work)
+
+    def replace(self, name: str, value: Any) -> None:
+        """Replace a whole collection (import, clear)."""
+
+        def work(conn):
+            if name == MEMORY:
+                conn.execute("DELETE FROM memory")
+                conn.executemany(
+                    "INSERT INTO memory (key, value) VALUES (?, ?)",
+                    [(str(k), _dumps(v)) for k, v in (value or {}).items()],
+                )
+            else:
+                conn.execute("DELETE FROM items WHERE list = ?", (name,))
+                conn.executemany("INSERT INTO items (list, value) VALUES (?, ?)", [(name, _dumps(i)) for i in value or []])
+
+        self._transaction([name], work)
+
+    # --- JSON import / export ---
+    @staticmethod
+    def _from_json(name: str, data: Any) -> Any:
+        """Collection value from the legacy JSON file shape."""
+        if name == MEMORY:
+            return data if isinstance(data, dict) else {}
+        if name == BROADCAST_PENDING:
+            data = data.get("pending", []) if isinstance(data, dict) else data
+        if isinstance(data, dict):
+            data = [data]
+        return data if isinstance(data, list) else []
+
+    def import_json(self, directory: Path, rename: bool = True) -> Dict[str, int]:
+        """Load every legacy JSON file present in directory (replacing that collection). Imported files
+        are renamed to <name>.imported so they are not mistaken for live state. Returns counts."""
+        counts = {}
+        for name, filename in JSON_FILES.items():
+            path = Path(directory) / filename
+            if not path.exists():
+                continue
+            value = self._from_json(name, read_json(path, None))
+            self.replace(name, value)
+            counts[name] = len(value)
+            if rename:
+                path.replace(path.with_name(filename + ".imported"))
+        debug_log(f"state_store: imported {counts} from {directory}")
+        return counts
+
+    def export_json(self, directory: Path) -> List[Path]:
+        """Write each collection as its legacy JSON file into directory."""
+        written = []
+        for name, filename in JSON_FILES.items():
+            value = self.memory() if name == MEMORY else self.items(name)
+            if name == BROADCAST_PENDING:
+                value = {"pending": value}
+            path = Path(directory) / filename
+            write_json_atomic(path, value, ensure_ascii=False)
+            written.append(path)
+        return written
+
+    def _import_once(self, workspace: Path) -> None:
+        row = self._writer.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        if row is not None:
+            return
+        self.import_json(workspace)
+        self._writer.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', '1')")
+
+
+def get_state_store(workspace: Path) -> StateStore:
+    """Shared store for workspace (workspace/state.db), importing legacy JSON files on first open."""
+    workspace = Path(workspace).resolve()
+    store = _stores.get(workspace)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(workspace)
+            if store is None:
+                store = StateStore(workspace / STATE_DB)
+                store._import_once(workspace)
+                _stores[workspace] = store
+    return store
+
+
+def run_command_line(args: List[str], workspace: Optional[Path] = None) -> None:
+    """./start_agent.py state export [dir] | state import [dir] (default dir: the workspace)."""
+    workspace = workspace or Path(__file__).resolve().parent.parent / "workspace"
+    if not args or args[0].lower() not in ("export", "import"):
+        print("Usage: ./start_agent.py state export [dir] | state import [dir]")
+        sys.exit(1)
+    directory = Path(args[1]) if len(args) > 1 else workspace
+    store = get_state_store(workspace)
+    if args[0].lower() == "export":
+        for path in store.export_json(directory):
+            print(f"Exported {path}")
+    else:
+        counts = store.import_json(directory, rename=directory.resolve() == workspace.resolve())
+        print(f"Imported {counts or 'nothing (no JSON files found)'} from {directory}")
@@ -0,0 +1,102 @@
+"""
+Small in-process BM25 index for ranking short documents (memory entries, action descriptions)
+against a query. Pure Python, no dependencies. Documents are added, replaced and removed one at a
+time, so keeping it in sync costs O(changed document), never a rebuild.
+
+Tokens are lowercase letter/digit runs (underscores split words, so user_name -> user, name) with
+common English suffixes stripped (reminders, reminding -> remind); CJK and hangul runs become
+character bigrams, so "서울에" still matches "서울".
+"""
+import math
+import re
+from typing import Dict, Hashable, List, Tuple
+
+WORD_RE = re.compile(r"[^\W_]+")
+CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+SUFFIXES = ("ing", "ed", "er", "e")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for word in WORD_RE.findall(text.lower()):
+        if CJK_RE.search(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(_stem(word))
+    return tokens
+
+
+class BM25Index:
+    """BM25 (Okapi) over documents keyed by id. Not thread-safe; callers lock."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._lengths: Dict[Hashable, int] = {}
+        self._terms: Dict[Hashable, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Index text under doc_id (replacing an earlier version)."""
+        self.remove(doc_id)
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            self._postings.setdefault(token, {})[doc_id] = tf
+        self._lengths[doc_id] = len(tokens)
+        self._terms[doc_id] = list(counts)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: Hashable) -> None:
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for token in self._terms.pop(doc_id, []):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[token]
+
+    def coverage(self, query: str, ignore: frozenset = frozenset()) -> float:
+        """Share of the distinct query tokens (minus ignore) that occur in any document; 0.0 for none."""
+        tokens = set(tokenize(query)) - ignore
+        if not tokens:
+            return 0.0
+        return sum(1 for token in tokens if token in self._postings) / len(tokens)
+
+    def search(self, query: str, k: int) -> List[Tuple[Hashable, float]]:
+        """Top k (doc_id, score) for query, best first. Documents sharing no term are not returned."""
+        if not self._lengths or k <= 0:
+            return []
+        n = len(self._lengths)
+        avg_length = self._total_length / n or 1.0
+        scores: Dict[Hashable, float] = {}
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
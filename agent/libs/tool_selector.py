@@ -0,0 +1,138 @@
+"""
+Tool selection (optional, off by default): only the actions relevant to the turn go into
+<agent_action> / <router_action>.
+A BM25 index (libs/text_index.py) over each action's name, instruction and params is built from
+agent_action.json and router_action.json, and rebuilt only when one of them changes. The prompt gets
+the top_k actions matching the message and recent history, plus the always-on ones, in file order.
+While the catalog has no more than top_k + always actions, all of it is shown. Matching is lexical, so
+when the query is poorly covered by the catalog's words (fewer than min_coverage of its content words
+occur in any action, e.g. another language or "take a screenshot of ..." against "see a website"), the
+full catalog is shown instead of a guess.
+
+Config (config.json llm):
+  "tool_selection": {"enabled": true, "top_k": 4, "always": ["_MEMORY_WRITE"], "min_coverage": 0.6}
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from libs.debug_log import debug_log
+from libs.text_index import BM25Index, tokenize
+
+DEFAULT_TOOLS_TOP_K = 4
+DEFAULT_ALWAYS_ON = ("_MEMORY_WRITE",)
+DEFAULT_MIN_COVERAGE = 0.6
+# Words that say nothing about which action is meant (not counted for coverage)
+STOP_WORDS = frozenset(tokenize(
+    "a an the of to in on at for from by with and or is are was be it its this that these me my i you your "
+    "we us our what which who how when where can could would will please do does did get give tell show now"
+))
+ACTION_FILES = {"agent": "agent_action.json", "router": "router_action.json"}
+
+_selectors: Dict[Path, "ToolSelector"] = {}
+_selectors_lock = threading.Lock()
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _action_text(action: dict) -> str:
+    """Indexed text of an action: name (underscores split), instruction, params."""
+    params = action.get("params", {})
+    return " ".join(
+        [str(action.get("name", "")), str(action.get("instruction", "")), json.dumps(params, ensure_ascii=False)]
+    )
+
+
+def read_actions(path: Path) -> Optional[list]:
+    """Actions in path, [] if missing or empty, None if not valid JSON (shown as is, unselected)."""
+    if not path.exists():
+        return []
+    raw = path.read_text(encoding="utf-8").strip()
+    if not raw:
+        return []
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    data = data if isinstance(data, list) else [data]
+    return [a for a in data if isinstance(a, dict)]
+
+
+class ToolSelector:
+    """Action catalog of one workspace, indexed for selection."""
+
+    def __init__(self, workspace: Path):
+        self.workspace = Path(workspace)
+        self._stamps: Optional[tuple] = None
+        self._catalog: Dict[str, Optional[list]] = {}
+        self._index = BM25Index()
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        """Reload and re-index the action files if either changed (caller holds the lock)."""
+        stamps = tuple(_stamp(self.workspace / f) for f in ACTION_FILES.values())
+        if stamps == self._stamps:
+            return
+        self._catalog, self._index = {}, BM25Index()
+        for kind, filename in ACTION_FILES.items():
+            actions = read_actions(self.workspace / filename)
+            self._catalog[kind] = actions
+            for i, action in enumerate(actions or []):
+                self._index.add((kind, i), _action_text(action))
+        self._stamps = stamps
+        debug_log(f"tool_selector: indexed {len(self._index)} actions")
+
+    def select(
+        self,
+        query: str,
+        top_k: int = DEFAULT_TOOLS_TOP_K,
+        always: Iterable[str] = DEFAULT_ALWAYS_ON,
+        min_coverage: float = DEFAULT_MIN_COVERAGE,
+    ) -> Tuple[Dict[str, Optional[list]], List[str]]:
+        """({"agent": actions, "router": actions}, dropped action names). Actions keep file order.
+        A kind whose file is not valid JSON maps to None (the caller shows the raw file). The full
+        catalog is returned when less than min_coverage of the query's content words are in it."""
+        with self._lock:
+            self._refresh()
+            catalog, index = self._catalog, self._index
+            always = set(always)
+            total = sum(len(actions or []) for actions in catalog.values())
+            pinned = {
+                (kind, i)
+                for kind, actions in catalog.items()
+                for i, action in enumerate(actions or [])
+                if action.get("name") in always
+            }
+            if total <= top_k + len(pinned):
+                return dict(catalog), []
+            coverage = index.coverage(query, STOP_WORDS)
+            if coverage < min_coverage:
+                debug_log(f"tool_selector: weak match (coverage {coverage:.2f}), showing all actions")
+                return dict(catalog), []
+            keep = pinned | {doc_id for doc_id, _ in index.search(query, top_k)}
+        selected: Dict[str, Optional[list]] = {}
+        dropped: List[str] = []
+        for kind, actions in catalog.items():
+            if actions is None:
+                selected[kind] = None
+                continue
+            selected[kind] = [a for i, a in enumerate(actions) if (kind, i) in keep]
+            dropped.extend(str(a.get("name", "")) for i, a in enumerate(actions) if (kind, i) not in keep)
+        return selected, dropped
+
+
+def get_tool_selector(workspace: Path) -> ToolSelector:
+    """Shared selector for workspace."""
+    workspace = Path(workspace).resolve()
+    selector = _selectors.get(workspace)
+    if selector is None:
+        with _selectors_lock:
+            selector = _selectors.setdefault(workspace, ToolSelector(workspace))
+    return selector
@@ -0,0 +1,169 @@
+"""
+Incremental <tool_code> parser and early action dispatch.
+ToolStreamParser is fed the raw LLM output chunk by chunk and returns each action object of the
+<tool_code> JSON array as soon as its closing brace arrives. EarlyActionDispatcher starts the first
+action while the model is still generating, if its ability is marked SIDE_EFFECT_FREE (e.g.
+_BROWSER_VISION), so a slow page capture begins before the response is complete. process_turn then
+picks up its result instead of executing it again and runs the remaining actions in order as usual,
+each after the previous one's follow-up and summary. Results the final parse does not claim (parse
+error, timeout, changed action) are reported to the user by process_turn.
+"""
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from libs.debug_log import debug_log
+from libs.logger import log
+
+TOOL_CODE_OPEN = "<tool_code>"
+
+
+def is_valid_action(obj) -> bool:
+    """Action shape expected by ActionExecutor: {"name": str, "params": dict}."""
+    return isinstance(obj, dict) and isinstance(obj.get("name"), str) and bool(obj["name"]) and isinstance(
+        obj.get("params"), dict
+    )
+
+
+class ToolStreamParser:
+    """Scans streamed text for <tool_code>[ {...}, {...} ] and yields complete top-level objects.
+    Tracks JSON strings and escapes so braces inside string values do not count."""
+
+    def __init__(self):
+        self._buffer = ""  # text before <tool_code> (only the tail that could hold the marker)
+        self._inside = False  # after <tool_code>
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._current: List[str] = []
+        self.closed = False  # array closed (or malformed); nothing more to parse
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Return action objects completed by this chunk (invalid objects are skipped and logged)."""
+        if self.closed or not chunk:
+            return []
+        if not self._inside:
+            text = self._buffer + chunk
+            idx = text.lower().find(TOOL_CODE_OPEN)
+            if idx < 0:
+                self._buffer = text[-(len(TOOL_CODE_OPEN) - 1):]
+                return []
+            self._inside = True
+            self._buffer = ""
+            chunk = text[idx + len(TOOL_CODE_OPEN):]
+        return self._scan(chunk)
+
+    def _scan(self, text: str) -> List[dict]:
+        found = []
+        for ch in text:
+            if not self._in_array:
+                if ch == "[":
+                    self._in_array = True
+                elif not ch.isspace():
+                    self.closed = True  # not a JSON array; leave it to the full parse
+                    return found
+                continue
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._current = [ch]
+                elif ch == "]":
+                    self.closed = True
+                    return found
+                continue
+            self._current.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = "".join(self._current)
+                    self._current = []
+                    try:
+                        obj = json.loads(raw)
+                    except json.JSONDecodeError:
+                        debug_log(f"ToolStreamParser: skipped unparsable object len={len(raw)}")
+                        continue
+                    if is_valid_action(obj):
+                        found.append(obj)
+                    else:
+                        debug_log(f"ToolStreamParser: skipped invalid action {raw[:120]!r}")
+        return found
+
+
+class EarlyActionDispatcher:
+    """Feeds ToolStreamParser from the raw stream and starts the first action on a worker thread if it
+    has no side effects. Later actions are never dispatched early: they may depend on the follow-ups
+    and summaries of earlier ones (e.g. USE_ARTIFACT), which process_turn runs only after the stream ends."""
+
+    def __init__(self, workspace: Path):
+        self.workspace = workspace
+        self._parser = ToolStreamParser()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stopped = False
+        self._claimed: set = set()
+        self.dispatched: List[tuple] = []  # (action, Future)
+
+    def feed(self, chunk: str) -> None:
+        if self._stopped:
+            return
+        try:
+            actions = self._parser.feed(chunk)
+        except Exception as e:  # never break the LLM stream
+            debug_log(f"EarlyActionDispatcher: parser error {e!r}")
+            self._stopped = True
+            return
+        if actions:
+            self._stopped = True
+            if self._side_effect_free(actions[0]["name"]):
+                self._dispatch(actions[0])
+
+    @staticmethod
+    def _side_effect_free(name: str) -> bool:
+        """Only agent abilities marked SIDE_EFFECT_FREE; router actions are never started early."""
+        from ability import get_action_class
+
+        cls = get_action_class(name)
+        return bool(cls is not None and getattr(cls, "SIDE_EFFECT_FREE", False))
+
+    def _dispatch(self, action: dict) -> None:
+        from libs.action_executor import ActionExecutor
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="early-action")
+        executor = ActionExecutor(action["name"], action["params"], workspace=self.workspace)
+        future = self._pool.submit(executor.execute)
+        self.dispatched.append((action, future))
+        log(f"Early dispatch: {action['name']} (while the model is still generating)")
+
+    def take(self, index: int, action: dict) -> Optional[Future]:
+        """Future for the index-th action of the final parse if it was dispatched early with the same
+        name and params, else None (the caller executes it normally)."""
+        if index < len(self.dispatched) and index not in self._claimed:
+            early, future = self.dispatched[index]
+            if early == action:
+                self._claimed.add(index)
+                return future
+            log(f"Early dispatch: action {index} differs from final parse ({early.get('name')} vs {action.get('name')})")
+        return None
+
+    def unclaimed(self) -> List[tuple]:
+        """(action, Future) of dispatched actions the final parse did not take."""
+        return [d for i, d in enumerate(self.dispatched) if i not in self._claimed]
+
+    def close(self) -> None:
+        """Let dispatched actions finish in the background; accept no new work."""
+        self._stopped = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
@@ -0,0 +1,82 @@
+"""
+Turn engine: runs agent turns on a bounded worker pool.
+Console, Telegram, Headless and the Scheduler call BaseAgent.process() from their own threads;
+the engine caps how many turns run at once (config.json turn_workers, default 4) and queues the rest.
+Shared workspace files are protected per file by libs/workspace_state.py, so turns can overlap.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+DEFAULT_WORKERS = 4
+
+_engine: Optional["TurnEngine"] = None
+_engine_lock = threading.Lock()
+
+
+class TurnEngine:
+    """Bounded pool for turns. run() blocks the calling channel thread until its turn is done."""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS):
+        self.max_workers = max(1, int(max_workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="turn")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "max_wait_ms": 0}
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn on a worker and return its result (exceptions are re-raised in the caller).
+        A turn started from inside a turn (nested process()) runs inline to avoid pool deadlock."""
+        if getattr(self._local, "in_turn", False):
+            return fn(*args, **kwargs)
+        submitted = time.monotonic()
+        with self._lock:
+            self.stats["queued"] += 1
+
+        def work():
+            wait_ms = round((time.monotonic() - submitted) * 1000)
+            with self._lock:
+                self.stats["queued"] -= 1
+                self.stats["running"] += 1
+                self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+            self._local.in_turn = True
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                self._local.in_turn = False
+                with self._lock:
+                    self.stats["running"] -= 1
+                    self.stats["completed" if ok else "failed"] += 1
+
+        return self._pool.submit(work).result()
+
+    def summary(self) -> str:
+        with self._lock:
+            s = dict(self.stats)
+        return (
+            f"workers={self.max_workers} running={s['running']} queued={s['queued']} "
+            f"completed={s['completed']} failed={s['failed']} max_wait_ms={s['max_wait_ms']}"
+        )
+
+
+def get_engine(config: Optional[dict] = None) -> TurnEngine:
+    """Shared engine, created on first use with config.json turn_workers."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    workers = int((config or {}).get("turn_workers", DEFAULT_WORKERS))
+                except (TypeError, ValueError):
+                    workers = DEFAULT_WORKERS
+                _engine = TurnEngine(workers)
+    return _engine
+
+
+def current_engine() -> Optional[TurnEngine]:
+    """Engine of this process, or None before the first turn (for /status)."""
+    return _engine
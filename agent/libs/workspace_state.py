@@ -0,0 +1,56 @@
+"""
+Shared workspace state: per-file locks and atomic JSON writes.
+Turns run concurrently (libs/turn_engine.py), so every read-modify-write of a workspace JSON file
+(e.g. artifacts/index.json) goes through update_json(), which holds the file's lock for the whole
+read-modify-write and replaces the file atomically. Readers never see a half-written file.
+Memory, history, schedule and pending broadcasts live in state.db (libs/state_store.py).
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+_locks: Dict[Path, threading.RLock] = {}
+_locks_lock = threading.Lock()
+
+
+def file_lock(path: Path) -> threading.RLock:
+    """Process-wide lock for path (same lock for every spelling of the same file)."""
+    key = Path(path).resolve()
+    lock = _locks.get(key)
+    if lock is None:
+        with _locks_lock:
+            lock = _locks.setdefault(key, threading.RLock())
+    return lock
+
+
+def read_json(path: Path, default: Any) -> Any:
+    """Parsed JSON from path, or default if missing, empty or invalid."""
+    try:
+        raw = Path(path).read_text(encoding="utf-8").strip()
+        return json.loads(raw) if raw else default
+    except (OSError, json.JSONDecodeError):
+        return default
+
+
+def write_json_atomic(path: Path, data: Any, indent: int = 2, ensure_ascii: bool = True) -> None:
+    """Write JSON to a temp file in the same directory, then os.replace() it over path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, indent=indent, ensure_ascii=ensure_ascii), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def update_json(path: Path, default: Any, update: Callable[[Any], Any]) -> Any:
+    """Read-modify-write path under its lock. update(data) returns the new data (or mutates and
+    returns data). The file is rewritten only if the content changed. Returns the new data."""
+    path = Path(path)
+    with file_lock(path):
+        data = read_json(path, default)
+        before = json.dumps(data, sort_keys=True)
+        new_data = update(data)
+        if json.dumps(new_data, sort_keys=True) != before or not path.exists():
+            write_json_atomic(path, new_data)
+        return new_data
@@ -4,8 +4,19 @@ LLM providers. Each subfolder (ollama, gemini, etc.) contains a provider-specifi
 from libs.base_llm import BaseLLM, LLMResponseError
 
 
-def get_llm(workspace, provider: str = None, model: str = None) -> BaseLLM:
-    """Factory: return the appropriate LLM instance. Uses provider to select class (OllamaLLM, GeminiLLM, etc.)."""
+def get_llm(workspace, provider: str = None, model: str = None, connection: dict = None) -> BaseLLM:
+    """Factory: return the appropriate LLM instance. Uses provider to select class (OllamaLLM, GeminiLLM, etc.).
+    With config.json llm.cascade, the returned LLM tries the cascade's small model first for turns and short
+    summaries and answers itself only on escalation (libs/model_cascade.py).
+    connection: host, keep_alive, options, ... for this instance only (BaseLLM.CONNECTION_KEYS); used for the
+    llm.fallback and llm.cascade.small entries. Absent keys use the top-level llm values."""
+    llm = _create_llm(workspace, provider, model)
+    llm.connection = dict(connection or {})
+    return llm
+
+
+def _create_llm(workspace, provider: str = None, model: str = None) -> BaseLLM:
+    """Instance of the provider class for provider (see get_llm)."""
     import os
     # Provider/model: passed args first, then env (for callers without config, e.g. action_executor)
     provider = (provider or os.getenv("LLM_PROVIDER", "ollama")).lower()
@@ -14,6 +25,9 @@ def get_llm(workspace, provider: str = None, model: str = None) -> BaseLLM:
     if provider == "ollama":
         from llm.ollama.llm import OllamaLLM
         return OllamaLLM(workspace=workspace, provider=provider, model=model)
+    if provider == "ollama_pool":
+        from llm.ollama_pool.llm import OllamaPoolLLM
+        return OllamaPoolLLM(workspace=workspace, provider=provider, model=model)
     if provider == "bridged_gemini":
         from llm.bridged_gemini.llm import BridgedGeminiLLM
         return BridgedGeminiLLM(workspace=workspace, provider=provider, model=model)
@@ -23,4 +37,4 @@ def get_llm(workspace, provider: str = None, model: str = None) -> BaseLLM:
     #if provider == "gemini":
     #    from llm.gemini.llm import GeminiLLM
     #    return GeminiLLM(workspace=workspace, provider=provider, model=model)
-    raise ValueError(f"Unknown LLM_PROVIDER: {provider}. Use ollama, bridged_gemini, openai, or gemini.")
+    raise ValueError(f"Unknown LLM_PROVIDER: {provider}. Use ollama, ollama_pool, bridged_gemini, openai, or gemini.")
@@ -7,6 +7,7 @@ from typing import Optional
 
 from libs.base_llm import BaseLLM
 from libs.gemini_api_bridge import ask_gemini
+from libs.image_store import DEFAULT_MAX_BYTES
 
 
 class BridgedGeminiLLM(BaseLLM):
@@ -17,7 +18,21 @@ class BridgedGeminiLLM(BaseLLM):
         self._redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
 
     def chat(self, prompt: str, options: Optional[list[str]] = None) -> str:
-        return ask_gemini(prompt, redis_url=self._redis_url, options=options, workspace=self.workspace)
+        return ask_gemini(
+            prompt,
+            redis_url=self._redis_url,
+            options=options,
+            workspace=self.workspace,
+            cancel=self.cancel_event(),
+            max_image_bytes=self._max_image_bytes(),
+        )
+
+    def _max_image_bytes(self) -> int:
+        """Decoded image bytes kept per response (config llm.image_max_mb, default 20)."""
+        try:
+            return int(float(self._get_config().get("llm", {}).get("image_max_mb")) * 1024 * 1024)
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_BYTES
 
     def _format_chat_error(self, e: Exception) -> str:
         return f"Error: {e}\n(Ensure bridge is running and Redis is reachable at REDIS_URL)"
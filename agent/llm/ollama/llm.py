@@ -1,23 +1,128 @@
 """
 Ollama LLM. Connects to local Ollama server (ollama serve).
+Holds one ollama.Client per host (config.json llm.host) and passes keep_alive and runtime options
+(llm.keep_alive, llm.options: num_ctx, num_thread, num_predict, ...) on every call. An llm.fallback or
+llm.cascade.small entry may set its own host, keep_alive and options.
 """
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import ollama
 
 from libs.base_llm import BaseLLM
+from libs.logger import log
+
+_clients: dict = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(host: Optional[str] = None) -> ollama.Client:
+    """Shared ollama.Client for host (None = OLLAMA_HOST env or localhost). Reuses HTTP connections."""
+    key = host or ""
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = ollama.Client(host=host) if host else ollama.Client()
+                _clients[key] = client
+    return client
 
 
 class OllamaLLM(BaseLLM):
     """LLM for local Ollama. Handles connection to ollama serve on the network."""
 
+    DEFAULT_KEEP_ALIVE = "30m"
+
     def __init__(self, workspace: Path, provider: str = "ollama", model: Optional[str] = None):
         super().__init__(workspace=workspace, provider=provider, model=model)
 
+    def _llm_config(self) -> dict:
+        """config.json llm, with this instance's own host/keep_alive/options (fallback or cascade entry)."""
+        cfg = self._get_config().get("llm", {})
+        return {**cfg, **self.connection} if self.connection else cfg
+
+    def _client(self) -> ollama.Client:
+        return get_client(self._llm_config().get("host"))
+
+    def _call_kwargs(self) -> dict:
+        """keep_alive and runtime options (num_ctx, num_thread, num_predict, ...) from config.json llm."""
+        cfg = self._llm_config()
+        kwargs = {"keep_alive": cfg.get("keep_alive", self.DEFAULT_KEEP_ALIVE)}
+        options = cfg.get("options")
+        if isinstance(options, dict) and options:
+            kwargs["options"] = options
+        return kwargs
+
     def chat(self, prompt: str, options: Optional[list[str]] = None) -> str:
-        response = ollama.chat(model=self.model, messages=[{"role": "user", "content": prompt}])
+        return self.chat_messages([{"role": "user", "content": prompt}], options=options)
+
+    def chat_stream(self, prompt: str, options: Optional[list[str]] = None) -> Iterator[str]:
+        return self.chat_messages_stream([{"role": "user", "content": prompt}], options=options)
+
+    def chat_messages(self, messages: list, options: Optional[list[str]] = None) -> str:
+        """Streams internally when running under _chat_with_timeout, so a cancelled call closes the HTTP
+        stream (Ollama stops generating when the client disconnects)."""
+        return self._chat_on(self._client(), messages)
+
+    def chat_messages_stream(self, messages: list, options: Optional[list[str]] = None) -> Iterator[str]:
+        return self._stream_on(self._client(), messages)
+
+    def _chat_on(self, client: ollama.Client, messages: list) -> str:
+        """Complete chat on client (streamed internally when the call is cancellable)."""
+        if self.cancel_event() is not None:
+            return "".join(self._stream_on(client, messages))
+        response = client.chat(model=self.model, messages=messages, **self._call_kwargs())
+        self._record_stats(response)
         return response.message.content
 
+    def _stream_on(self, client: ollama.Client, messages: list) -> Iterator[str]:
+        """Stream chat deltas from client; closes the HTTP stream when cancelled or abandoned."""
+        self._check_cancelled()
+        stream = client.chat(model=self.model, messages=messages, stream=True, **self._call_kwargs())
+        try:
+            for part in stream:
+                self._check_cancelled()
+                if part.done:
+                    self._record_stats(part)
+                yield part.message.content or ""
+        finally:
+            stream.close()
+
+    def warm_up(self) -> None:
+        """Load the model into memory (empty generate) and keep it resident for keep_alive."""
+        self._warm_up_on(self._client())
+
+    def _warm_up_on(self, client: ollama.Client, label: str = "") -> bool:
+        start = time.monotonic()
+        where = f" on {label}" if label else ""
+        try:
+            response = client.generate(model=self.model, prompt="", **self._call_kwargs())
+            load_ms = (getattr(response, "load_duration", None) or 0) / 1e6
+            log(f"[Ollama] warm-up {self.model}{where} done in {time.monotonic() - start:.1f}s (load {load_ms:.0f} ms)")
+            return True
+        except Exception as e:
+            log(f"[Ollama] warm-up {self.model}{where} failed: {e}")
+            return False
+
+    def _record_stats(self, response) -> None:
+        """prompt_eval_count drops when Ollama reuses its KV cache for an unchanged prompt prefix.
+        Durations are reported in ms; load_ms > 0 means the model was (re)loaded for this call."""
+
+        def ms(name: str) -> Optional[int]:
+            value = getattr(response, name, None)
+            return round(value / 1e6) if value is not None else None
+
+        self._set_call_stats({
+            "prompt_eval_count": getattr(response, "prompt_eval_count", None),
+            "eval_count": getattr(response, "eval_count", None),
+            "load_ms": ms("load_duration"),
+            "prompt_eval_ms": ms("prompt_eval_duration"),
+            "eval_ms": ms("eval_duration"),
+            "total_ms": ms("total_duration"),
+        })
+
     def _format_chat_error(self, e: Exception) -> str:
         return f"Error: {e}\n(Make sure Ollama is running: ollama serve, ollama pull <model>)"
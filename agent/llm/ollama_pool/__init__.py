@@ -0,0 +1 @@
+from llm.ollama_pool.llm import OllamaPoolLLM
@@ -0,0 +1,238 @@
+"""
+Ollama pool LLM. Spreads chats over several Ollama servers (config.json llm.hosts).
+A background probe checks each host every llm.health_interval_s seconds (ollama ps + list): reachable,
+which models are available and which are loaded. Each chat goes to the healthy host with the model
+warm, then fewest calls in flight, then lowest recent latency. A host that fails before the first
+token is marked down and the chat is retried on the next host, so channels never see the outage.
+Calls, keep_alive, options and stats work as in OllamaLLM.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+import ollama
+
+from libs.base_llm import LLMCancelled
+from libs.logger import log
+from llm.ollama.llm import OllamaLLM, get_client
+
+DEFAULT_HEALTH_INTERVAL_S = 15
+PROBE_TIMEOUT_S = 3
+
+
+def _model_key(name: str) -> str:
+    """Ollama model names compare case-insensitively with an implicit :latest tag."""
+    name = (name or "").strip().lower()
+    return name if ":" in name else f"{name}:latest"
+
+
+def _is_host_error(e: Exception) -> bool:
+    """Errors that mean "try another host": unreachable, transport failure, server error, model missing."""
+    if isinstance(e, (ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(e, ollama.ResponseError):
+        return e.status_code >= 500 or e.status_code == 404
+    return False
+
+
+class HostState:
+    """Health and load of one Ollama host. Mutated under the pool lock."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True  # optimistic until the first probe
+        self.available: Optional[Set[str]] = None  # None = unknown
+        self.loaded: Set[str] = set()
+        self.in_flight = 0
+        self.latency_s = 0.0  # EWMA of call durations
+        self.failures = 0
+        self.last_error = ""
+
+    def describe(self) -> str:
+        state = "up" if self.healthy else f"down ({self.last_error})"
+        return f"{self.url} {state} in_flight={self.in_flight} latency={self.latency_s:.1f}s warm={sorted(self.loaded)}"
+
+
+class HostPool:
+    """Hosts shared by every OllamaPoolLLM with the same host list."""
+
+    def __init__(self, urls: List[str], health_interval_s: float):
+        self.hosts = [HostState(u) for u in urls]
+        self.health_interval_s = max(float(health_interval_s), 1.0)
+        self._lock = threading.Lock()
+        self._probe_clients: Dict[str, ollama.Client] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background health probe (once)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._probe_loop, daemon=True)
+        self._thread.start()
+
+    def _probe_loop(self) -> None:
+        while True:
+            self.probe_all()
+            time.sleep(self.health_interval_s)
+
+    def probe_all(self) -> None:
+        for host in self.hosts:
+            self.probe(host)
+
+    def probe(self, host: HostState) -> None:
+        client = self._probe_clients.get(host.url)
+        if client is None:
+            client = ollama.Client(host=host.url, timeout=PROBE_TIMEOUT_S)
+            self._probe_clients[host.url] = client
+        try:
+            loaded = {_model_key(m.model or m.name or "") for m in client.ps().models}
+            available = {_model_key(m.model or "") for m in client.list().models}
+        except Exception as e:
+            self.mark_down(host, e)
+            return
+        with self._lock:
+            if not host.healthy:
+                log(f"[OllamaPool] {host.url} is up again")
+            host.healthy, host.loaded, host.available, host.failures = True, loaded, available, 0
+
+    def mark_down(self, host: HostState, e: Exception) -> None:
+        with self._lock:
+            if host.healthy:
+                log(f"[OllamaPool] {host.url} marked down: {e}")
+            host.healthy = False
+            host.failures += 1
+            host.last_error = str(e)[:120]
+
+    def pick(self, model: str, exclude: Set[str]) -> Optional[HostState]:
+        """Best host for model: healthy, has the model, warm first, then fewest in flight, then fastest.
+        If no healthy host is left, probe once synchronously before giving up."""
+        key = _model_key(model)
+        for attempt in range(2):
+            with self._lock:
+                candidates = [
+                    h for h in self.hosts
+                    if h.url not in exclude and h.healthy and (h.available is None or key in h.available)
+                ]
+                if candidates:
+                    best = min(candidates, key=lambda h: (key not in h.loaded, h.in_flight, h.latency_s))
+                    best.in_flight += 1
+                    return best
+            if attempt == 0:
+                self.probe_all()
+        return None
+
+    def done(self, host: HostState, model: str, seconds: Optional[float]) -> None:
+        """Call finished on host. seconds=None if it failed or was cancelled."""
+        with self._lock:
+            host.in_flight = max(0, host.in_flight - 1)
+            if seconds is not None:
+                host.latency_s = seconds if host.latency_s == 0 else 0.8 * host.latency_s + 0.2 * seconds
+                host.loaded.add(_model_key(model))
+
+    def mark_warm(self, host: HostState, model: str) -> None:
+        with self._lock:
+            host.loaded.add(_model_key(model))
+
+    def summary(self) -> str:
+        with self._lock:
+            return "; ".join(h.describe() for h in self.hosts)
+
+
+_pools: Dict[Tuple[str, ...], HostPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(urls: List[str], health_interval_s: float = DEFAULT_HEALTH_INTERVAL_S) -> HostPool:
+    key = tuple(urls)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = HostPool(urls, health_interval_s)
+            _pools[key] = pool
+    pool.start()
+    return pool
+
+
+def all_pools() -> Dict[Tuple[str, ...], HostPool]:
+    """Pools created in this process (for /status)."""
+    return dict(_pools)
+
+
+class OllamaPoolLLM(OllamaLLM):
+    """OllamaLLM over several hosts with health checks, least-loaded routing and failover."""
+
+    def __init__(self, workspace: Path, provider: str = "ollama_pool", model: Optional[str] = None):
+        super().__init__(workspace=workspace, provider=provider, model=model)
+
+    def _pool(self) -> HostPool:
+        cfg = self._llm_config()
+        hosts = cfg.get("hosts") or ([cfg["host"]] if cfg.get("host") else ["http://localhost:11434"])
+        return get_pool([str(h) for h in hosts], cfg.get("health_interval_s", DEFAULT_HEALTH_INTERVAL_S))
+
+    def _no_host_error(self, tried: Set[str]) -> ConnectionError:
+        return ConnectionError(f"No healthy Ollama host for {self.model} (tried: {', '.join(sorted(tried)) or 'none'})")
+
+    def chat_messages(self, messages: list, options: Optional[list[str]] = None) -> str:
+        return self._with_failover(lambda client: self._chat_on(client, messages))
+
+    def _with_failover(self, call: Callable[[ollama.Client], str]) -> str:
+        pool, tried = self._pool(), set()
+        while True:
+            host = pool.pick(self.model, tried)
+            if host is None:
+                raise self._no_host_error(tried)
+            tried.add(host.url)
+            start, seconds = time.monotonic(), None
+            try:
+                out = call(get_client(host.url))
+                seconds = time.monotonic() - start
+                return out
+            except LLMCancelled:
+                raise
+            except Exception as e:
+                if not _is_host_error(e):
+                    raise
+                pool.mark_down(host, e)
+                log(f"[OllamaPool] chat failed on {host.url}, failing over: {e}")
+            finally:
+                pool.done(host, self.model, seconds)
+
+    def chat_messages_stream(self, messages: list, options: Optional[list[str]] = None) -> Iterator[str]:
+        """Fails over only before the first delta; a stream that breaks after text was shown raises."""
+        pool, tried = self._pool(), set()
+        while True:
+            host = pool.pick(self.model, tried)
+            if host is None:
+                raise self._no_host_error(tried)
+            tried.add(host.url)
+            start, seconds, started = time.monotonic(), None, False
+            try:
+                for chunk in self._stream_on(get_client(host.url), messages):
+                    started = True
+                    yield chunk
+                seconds = time.monotonic() - start
+                return
+            except LLMCancelled:
+                raise
+            except Exception as e:
+                if started or not _is_host_error(e):
+                    raise
+                pool.mark_down(host, e)
+                log(f"[OllamaPool] stream failed on {host.url}, failing over: {e}")
+            finally:
+                pool.done(host, self.model, seconds)
+
+    def warm_up(self) -> None:
+        """Load the model on every healthy host that has it."""
+        pool = self._pool()
+        pool.probe_all()
+        for host in pool.hosts:
+            if host.healthy and (host.available is None or _model_key(self.model) in host.available):
+                if self._warm_up_on(get_client(host.url), host.url):
+                    pool.mark_warm(host, self.model)
+
+    def _format_chat_error(self, e: Exception) -> str:
+        return f"Error: {e}\n(Check llm.hosts in config.json and that ollama serve runs on each host)"
@@ -3,24 +3,46 @@
 Start the agent. Run from agent/: python start_agent.py  or  ./start_agent.py
 BaseAgent constructor loads config, handles argv (e.g. clear, DEBUG), builds channels.
 
-  ./start_agent.py DEBUG       — append detailed traces to logs/debug.log
-  ./start_agent.py clear       — reset workspace + logs (including debug.log)
+  ./start_agent.py DEBUG             — append detailed traces to logs/debug.log
+  ./start_agent.py clear             — reset workspace + logs (including debug.log)
+  ./start_agent.py --startup-profile — report import time and per-phase init time, then exit
+  ./start_agent.py state export [dir] — write workspace state (state.db) out as JSON files
+  ./start_agent.py state import [dir] — load those JSON files back into state.db
+  ./start_agent.py prompt-bench      — prompt tokens of the workspace per llm.prompt_format, then exit
 
 Interactive config: ./start_agent.py config [key]
   e.g. ./start_agent.py config timeout
   e.g. ./start_agent.py config llm
 """
+import time
+
+_STARTED_AT = time.perf_counter()
+
 import sys
 import warnings
 warnings.filterwarnings("ignore", message="urllib3 v2 only supports OpenSSL")
 warnings.filterwarnings("ignore", module="urllib3")
 
-from libs.agent_config import AgentConfig
-from libs.base_agent import BaseAgent
+from libs import startup_profile
 
 if __name__ == "__main__":
     if len(sys.argv) >= 2 and sys.argv[1].lower() == "config":
+        from libs.agent_config import AgentConfig
+
         key = sys.argv[2].lower() if len(sys.argv) > 2 else None
         AgentConfig.run_interactive(key)
+    elif len(sys.argv) >= 2 and sys.argv[1].lower() == "state":
+        from libs.state_store import run_command_line
+
+        run_command_line(sys.argv[2:])
+    elif len(sys.argv) >= 2 and sys.argv[1].lower() == "prompt-bench":
+        from libs.prompt_format import run_benchmark
+
+        run_benchmark()
     else:
+        startup_profile.init_from_argv(sys.argv, started_at=_STARTED_AT)
+        # Imports above ran before profiling could start; timed against the process start
+        startup_profile.record("bootstrap imports", time.perf_counter() - _STARTED_AT)
+        with startup_profile.phase("import base_agent"):
+            from libs.base_agent import BaseAgent
         BaseAgent().run()
@@ -1,4 +1,27 @@
+import json
+import os
+import threading
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from redis import Redis
+
+from libs.router import log
+
+ARTIFACT_HANDLE_TYPE = "artifact_handle"
+
+_redis_clients: Dict[str, Redis] = {}
+_redis_lock = threading.Lock()
+
+
+def _artifact_redis(url: str) -> Redis:
+    """Redis client shared by all skills for this URL (the client keeps its own connection pool)."""
+    with _redis_lock:
+        client = _redis_clients.get(url)
+        if client is None:
+            client = _redis_clients[url] = Redis.from_url(url)
+        return client
 
 
 class BaseSkill(ABC):
@@ -8,3 +31,31 @@ class BaseSkill(ABC):
     def execute(self, params: dict):
         """Execute the skill. Returns result to send as response."""
         pass
+
+    def fetch_artifact(self, params: dict) -> Optional[Any]:
+        """
+        Artifact for an action sent with option USE_ARTIFACT, or None.
+        The agent sends a handle ({"type": "artifact_handle", "key", "size", "redis_key", "path"});
+        the content is fetched here, only when the skill asks: from Redis, else from the agent's
+        file (same machine or shared disk). An artifact inlined by an older agent is returned as is.
+        """
+        artifact = params.get("artifact")
+        if not (isinstance(artifact, dict) and artifact.get("type") == ARTIFACT_HANDLE_TYPE):
+            return artifact
+        redis_key = artifact.get("redis_key")
+        url = os.getenv("REDIS_URL")
+        if redis_key and url:
+            try:
+                raw = _artifact_redis(url).get(redis_key)
+                if raw is not None:
+                    return json.loads(raw)
+            except Exception as e:
+                log(f"fetch_artifact: Redis {redis_key} failed: {e}")
+        path = Path(artifact.get("path") or "")
+        if path.is_file():
+            try:
+                return json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                log(f"fetch_artifact: {path} failed: {e}")
+        log(f"fetch_artifact: artifact {artifact.get('key', '')[:12]} not found (expired?)")
+        return None
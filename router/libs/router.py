@@ -16,6 +16,16 @@ from redis import Redis
 
 ROUTER_DIR = Path(__file__).resolve().parent.parent
 IN_OUT_LOG = ROUTER_DIR / "logs" / "in_out.log"
+ROUTER_LOG = ROUTER_DIR / "logs" / "router.log"
+
+
+def log(message: str) -> None:
+    """Append a timestamped line to router/logs/router.log and print it to console."""
+    ROUTER_LOG.parent.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(ROUTER_LOG, "a", encoding="utf-8") as f:
+        f.write(f"[{ts}] {message}\n")
+    print(f"[{ts}] {message}", flush=True)
 
 
 def _log_in_out(direction: str, data: str) -> None:
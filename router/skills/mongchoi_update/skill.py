@@ -34,7 +34,7 @@ class MongchoiUpdateSkill(BaseSkill):
         print(params, flush=True)
         print(flush=True)
 
-        artifact = params.get("artifact", {})
+        artifact = self.fetch_artifact(params) or {}
         artifact_content = artifact.get("content", artifact) if isinstance(artifact, dict) else {}
         # content may be a JSON string (from artifact.json) or already a dict
         if isinstance(artifact_content, str):